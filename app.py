@@ -1,36 +1,131 @@
 # Flask backend server
-from flask import Flask, render_template, request, jsonify, session, redirect
+from flask import Flask, render_template, request, jsonify, session, redirect, g, stream_with_context
 from config import Config
+from logger import get_logger
+from json_provider import FastJSONProvider
+from cache import get_response_cache, make_cache_key
+from compression import init_compression, compression_stats
+from jobs import enqueue_telegram_document, enqueue_telegram_export, get_job_status, start_job_workers
+from exports import ExportError, check_export_format, export_filename, iter_export, parse_export_filters
+from insights import get_analytics_insights
 from database import (
     get_user, get_transactions, add_transaction, get_balance,
-    get_statistics, get_debts, add_debt, get_reminders,
+    get_debts, add_debt, get_reminders,
     get_balance_and_statistics, get_income_trend, get_top_expense_categories,
     get_expense_by_category, add_reminder, update_reminder_status,
     get_subscription_payments,
     get_contacts, get_contact_by_id, add_contact, update_contact, delete_contact,
     get_debt_by_id, update_debt, delete_debt,
     get_debt_reminders, add_debt_reminder, delete_debt_reminder,
-    get_currency_rate,
+    get_currency_rates_snapshot, start_currency_rate_service,
     update_user, save_initial_balance, save_debt,
     get_category_transactions, get_category_details,
-    get_balance_trend, get_monthly_comparison, get_category_breakdown,
-    get_daily_spending, get_transaction_stats, get_currency_distribution,
-    get_weekly_comparison
+    get_statistics_bundle, rebuild_daily_rollups, check_user_balances,
+    get_transaction_counts, get_user_data_version, bump_user_data_version,
+    decode_page_cursor, next_page_cursor,
+    get_period_report, build_report_snapshots, REPORT_PERIODS,
+    get_db_connection, get_pool_stats, open_connection_scope, close_connection_scope, connection_scope_active,
+    degraded_read_count
 )
 import os
+import click
+import functools
 import hmac
 import hashlib
 import json
-from urllib.parse import unquote
+import logging
+import threading
+import time as time_module
+from collections import OrderedDict
+from urllib.parse import unquote, urlencode
 from dotenv import load_dotenv
-from decimal import Decimal
-from datetime import datetime, date, time, timedelta
+from werkzeug.exceptions import HTTPException
+from datetime import datetime, date
 
 # .env faylini yuklash
 load_dotenv()
 
 app = Flask(__name__)
 app.config.from_object(Config)
+# Decimal/datetime/timedelta JSON'ga bir o'tishda (orjson bo'lsa C tezligida)
+app.json = FastJSONProvider(app)
+logger = get_logger(__name__)
+
+# Valyuta kurslari fonda yuklanadi va yangilanib turadi
+start_currency_rate_service()
+
+@app.before_request
+def start_request_timer():
+    """So'rov vaqtini o'lchashni boshlash"""
+    g.request_started = time_module.perf_counter()
+
+@app.before_request
+def open_db_scope():
+    """So'rov davomida barcha DB helperlar bitta connection'dan foydalanadi"""
+    if not connection_scope_active():
+        request.environ['balansai.db_scope'] = open_connection_scope()
+
+@app.teardown_request
+def close_db_scope(exc=None):
+    """So'rov tugaganda connection'ni pool'ga qaytarish"""
+    token = request.environ.pop('balansai.db_scope', None)
+    if token is not None:
+        close_connection_scope(token)
+
+@app.after_request
+def log_request(response):
+    """So'rov haqida bitta log yozuvi (route, status, latency)"""
+    started = g.get('request_started')
+    if started is not None and logger.isEnabledFor(logging.INFO):
+        latency_ms = round((time_module.perf_counter() - started) * 1000, 2)
+        logger.info(
+            "%s %s -> %s (%.2f ms)", request.method, request.path, response.status_code, latency_ms,
+            extra={'status': response.status_code, 'latency_ms': latency_ms}
+        )
+    return response
+
+# Javoblarni siqish: log_request'dan keyin ro'yxatdan o'tadi, shuning uchun undan oldin ishlaydi
+init_compression(app)
+
+# Secret key bot token'dan bir marta hisoblanadi
+def _derive_telegram_secret_key(bot_token):
+    """Telegram WebApp secret key (HMAC-SHA256("WebAppData", bot_token))"""
+    if not bot_token:
+        return None
+    return hmac.new("WebAppData".encode(), bot_token.encode(), hashlib.sha256).digest()
+
+_TELEGRAM_SECRET_KEY = _derive_telegram_secret_key(Config.TELEGRAM_BOT_TOKEN)
+
+# Validatsiya qilingan init_data cache: hash -> (init_data, user_id, expires_at)
+_init_data_cache = OrderedDict()
+_init_data_cache_lock = threading.Lock()
+
+def _get_cached_init_data(hash_value, init_data):
+    """Cache'dan user_id olish (faqat init_data to'liq mos va muddati o'tmagan bo'lsa)"""
+    with _init_data_cache_lock:
+        entry = _init_data_cache.get(hash_value)
+        if entry is None:
+            return None
+        cached_init_data, user_id, expires_at = entry
+        if time_module.time() >= expires_at or not hmac.compare_digest(cached_init_data, init_data):
+            del _init_data_cache[hash_value]
+            return None
+        _init_data_cache.move_to_end(hash_value)
+        return user_id
+
+def _cache_init_data(hash_value, init_data, user_id, auth_date):
+    """Muvaffaqiyatli validatsiyani cache'ga saqlash (auth_date muddatidan oshmaydi)"""
+    now = time_module.time()
+    expires_at = now + Config.TELEGRAM_INIT_CACHE_TTL
+    if auth_date:
+        expires_at = min(expires_at, auth_date + Config.TELEGRAM_AUTH_MAX_AGE)
+    if expires_at <= now:
+        return
+    with _init_data_cache_lock:
+        _init_data_cache[hash_value] = (init_data, user_id, expires_at)
+        _init_data_cache.move_to_end(hash_value)
+        while len(_init_data_cache) > Config.TELEGRAM_INIT_CACHE_SIZE:
+            _init_data_cache.popitem(last=False)
 
 # Telegram Mini App validatsiyasi
 def validate_telegram_webapp(init_data):
@@ -38,7 +133,7 @@ def validate_telegram_webapp(init_data):
     try:
         # init_data ni URL decode qilish
         init_data = unquote(init_data)
-        print(f"[DEBUG] Init data received (length: {len(init_data)})")
+        logger.debug("Init data received (length: %s)", len(init_data))
         
         # init_data ni parse qilish
         pairs = {}
@@ -47,49 +142,47 @@ def validate_telegram_webapp(init_data):
                 key, value = pair.split('=', 1)
                 pairs[key] = value
         
-        print(f"[DEBUG] Parsed pairs keys: {list(pairs.keys())}")
+        logger.debug("Parsed pairs keys: %s", list(pairs.keys()))
         
         if 'hash' not in pairs:
-            print("❌ Hash topilmadi")
+            logger.warning("❌ Hash topilmadi")
             # DEBUG mode'da hash yo'q bo'lsa ham parse qilib ko'rish
             if Config.DEBUG and 'user' in pairs:
                 try:
                     user_str = unquote(pairs['user'])
                     user_data = json.loads(user_str)
                     user_id = user_data.get('id')
-                    print(f"[DEBUG] Hash yo'q, lekin DEBUG mode'da user_id parse qilindi: {user_id}")
+                    logger.debug("Hash yo'q, lekin DEBUG mode'da user_id parse qilindi: %s", user_id)
                     return user_id
                 except Exception as e:
-                    print(f"[DEBUG] User parse xatosi: {e}")
+                    logger.debug("User parse xatosi: %s", e)
             return None
         
         hash_value = pairs.pop('hash')
         
         # Bot token tekshiruvi
-        bot_token = Config.TELEGRAM_BOT_TOKEN
-        if not bot_token:
-            print("⚠️ Bot token topilmadi, validatsiya o'tkazib yuborildi (development mode)")
+        secret_key = _TELEGRAM_SECRET_KEY
+        if not secret_key:
+            logger.warning("⚠️ Bot token topilmadi, validatsiya o'tkazib yuborildi (development mode)")
             if 'user' in pairs:
                 try:
                     user_str = unquote(pairs['user'])
                     user_data = json.loads(user_str)
                     user_id = user_data.get('id')
-                    print(f"[DEBUG] Bot token yo'q, user_id parse qilindi: {user_id}")
+                    logger.debug("Bot token yo'q, user_id parse qilindi: %s", user_id)
                     return user_id
                 except Exception as e:
-                    print(f"[DEBUG] User parse xatosi: {e}")
+                    logger.debug("User parse xatosi: %s", e)
             return None
         
+        # Mini App sessiya davomida bir xil init_data yuboradi
+        cached_user_id = _get_cached_init_data(hash_value, init_data)
+        if cached_user_id is not None:
+            return cached_user_id
+        
         # Data string ni yaratish
         data_check_string = '\n'.join(sorted([f"{k}={pairs[k]}" for k in pairs]))
-        print(f"[DEBUG] Data check string created (length: {len(data_check_string)})")
-        
-        # Secret key yaratish (Bot token dan)
-        secret_key = hmac.new(
-            "WebAppData".encode(),
-            bot_token.encode(),
-            hashlib.sha256
-        ).digest()
+        logger.debug("Data check string created (length: %s)", len(data_check_string))
         
         # Hash ni tekshirish
         calculated_hash = hmac.new(
@@ -98,35 +191,44 @@ def validate_telegram_webapp(init_data):
             hashlib.sha256
         ).hexdigest()
         
-        if calculated_hash != hash_value:
-            print(f"❌ Hash mos kelmadi. Received: {hash_value[:10]}..., Calculated: {calculated_hash[:10]}...")
+        if not hmac.compare_digest(calculated_hash, hash_value):
+            logger.warning("❌ Hash mos kelmadi. Received: %s..., Calculated: %s...", hash_value[:10], calculated_hash[:10])
             # DEBUG mode'da hash mos kelmasa ham parse qilib ko'rish
             if Config.DEBUG and 'user' in pairs:
                 try:
                     user_str = unquote(pairs['user'])
                     user_data = json.loads(user_str)
                     user_id = user_data.get('id')
-                    print(f"[DEBUG] Hash mos kelmadi, lekin DEBUG mode'da user_id parse qilindi: {user_id}")
+                    logger.debug("Hash mos kelmadi, lekin DEBUG mode'da user_id parse qilindi: %s", user_id)
                     return user_id
                 except Exception as e:
-                    print(f"[DEBUG] User parse xatosi: {e}")
+                    logger.debug("User parse xatosi: %s", e)
             return None
         
-        print("✅ Hash validatsiyasi muvaffaqiyatli")
+        logger.debug("✅ Hash validatsiyasi muvaffaqiyatli")
+        
+        # Eskirgan init_data qabul qilinmaydi (auth_date yo'q bo'lsa ham)
+        try:
+            auth_date = int(pairs.get('auth_date', 0))
+        except ValueError:
+            auth_date = 0
+        if time_module.time() - auth_date > Config.TELEGRAM_AUTH_MAX_AGE:
+            logger.warning("❌ init_data eskirgan (auth_date: %s)", auth_date)
+            return None
         
         # User ma'lumotlarini olish
         if 'user' in pairs:
             user_str = unquote(pairs['user'])
             user_data = json.loads(user_str)
             user_id = user_data.get('id')
-            print(f"[DEBUG] Valid user_id: {user_id}")
+            logger.debug("Valid user_id: %s", user_id)
+            if user_id:
+                _cache_init_data(hash_value, init_data, user_id, auth_date)
             return user_id
         
         return None
     except Exception as e:
-        print(f"❌ Validatsiya xatosi: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Validatsiya xatosi: %s", e)
         # Xatolik bo'lsa ham DEBUG mode'da parse qilib ko'rish
         if Config.DEBUG and init_data:
             try:
@@ -139,7 +241,7 @@ def validate_telegram_webapp(init_data):
                     user_str = unquote(pairs['user'])
                     user_data = json.loads(user_str)
                     user_id = user_data.get('id')
-                    print(f"[DEBUG] Exception bo'ldi, lekin DEBUG mode'da user_id parse qilindi: {user_id}")
+                    logger.debug("Exception bo'ldi, lekin DEBUG mode'da user_id parse qilindi: %s", user_id)
                     return user_id
             except:
                 pass
@@ -156,32 +258,30 @@ def register():
     # Agar user allaqachon ro'yxatdan o'tgan bo'lsa, asosiy sahifaga yuborish
     try:
         user_id = get_user_id_from_request()
-        print(f"[DEBUG] Register route: user_id = {user_id}")
+        logger.debug("Register route: user_id = %s", user_id)
         
         if user_id:
             user = get_user(user_id)
-            print(f"[DEBUG] Register route: user found = {user is not None}")
+            logger.debug("Register route: user found = %s", user is not None)
             
             if user:
                 # Registration complete tekshiruvi
                 from database import check_registration_complete
                 is_complete = check_registration_complete(user_id)
-                print(f"[DEBUG] Register route: registration_complete = {is_complete}")
+                logger.debug("Register route: registration_complete = %s", is_complete)
                 
                 if is_complete:
                     # Asosiy sahifaga redirect
-                    print(f"[DEBUG] Register route: Redirecting to /")
+                    logger.debug("Register route: Redirecting to /")
                     return redirect('/')
                 else:
-                    print(f"[DEBUG] Register route: Registration not complete, showing registration form")
+                    logger.debug("Register route: Registration not complete, showing registration form")
             else:
-                print(f"[DEBUG] Register route: User not found in database, showing registration form")
+                logger.debug("Register route: User not found in database, showing registration form")
         else:
-            print(f"[DEBUG] Register route: No user_id found, showing registration form")
+            logger.debug("Register route: No user_id found, showing registration form")
     except Exception as e:
-        print(f"[DEBUG] Register route'da tekshirish xatosi: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Register route'da tekshirish xatosi: %s", e)
         # Xatolik bo'lsa ham registration sahifasini ko'rsatish
     
     return render_template('register.html')
@@ -203,16 +303,16 @@ def get_telegram_init_data():
     # Avval header dan olish
     init_data = request.headers.get('X-Telegram-Init-Data')
     if init_data:
-        print(f"[DEBUG] Init data header dan olindi (length: {len(init_data)})")
+        logger.debug("Init data header dan olindi (length: %s)", len(init_data))
         return init_data
     
     # Keyin query parameter dan
     init_data = request.args.get('_auth') or request.args.get('initData')
     if init_data:
-        print(f"[DEBUG] Init data query parameter dan olindi (length: {len(init_data)})")
+        logger.debug("Init data query parameter dan olindi (length: %s)", len(init_data))
         return init_data
     
-    print("[DEBUG] Init data topilmadi")
+    logger.debug("Init data topilmadi")
     return None
 
 def parse_user_id_from_init_data(init_data):
@@ -231,10 +331,10 @@ def parse_user_id_from_init_data(init_data):
             user_data = json.loads(user_str)
             user_id = user_data.get('id')
             if user_id:
-                print(f"[DEBUG] User ID parse qilindi (validatsiyasiz): {user_id}")
+                logger.debug("User ID parse qilindi (validatsiyasiz): %s", user_id)
                 return user_id
     except Exception as e:
-        print(f"[DEBUG] Parse xatosi: {e}")
+        logger.debug("Parse xatosi: %s", e)
     return None
 
 def get_user_id_from_request():
@@ -244,15 +344,17 @@ def get_user_id_from_request():
     # Test user_id ni query parameter dan olish (DEBUG mode uchun)
     test_user_id = request.args.get('test_user_id')
     if test_user_id and Config.DEBUG:
-        print(f"[DEBUG] Test mode: user_id={test_user_id}")
-        return int(test_user_id)
+        logger.debug("Test mode: user_id=%s", test_user_id)
+        g.user_id = int(test_user_id)
+        return g.user_id
     
     # Agar init_data bo'sh bo'lsa
     if not init_data:
         if Config.DEBUG:
             # DEBUG mode'da default test user_id
-            print(f"[DEBUG] Init data yo'q, default test user_id ishlatilmoqda")
-            return 123456789
+            logger.debug("Init data yo'q, default test user_id ishlatilmoqda")
+            g.user_id = 123456789
+            return g.user_id
         return None
     
     # Validatsiya qilish
@@ -260,12 +362,119 @@ def get_user_id_from_request():
     
     # Agar validatsiya muvaffaqiyatsiz bo'lsa va DEBUG mode bo'lsa, parse qilib olish
     if not user_id and Config.DEBUG:
-        print(f"[DEBUG] Validatsiya muvaffaqiyatsiz, parse qilib olinmoqda...")
+        logger.debug("Validatsiya muvaffaqiyatsiz, parse qilib olinmoqda...")
         user_id = parse_user_id_from_init_data(init_data)
     
+    # Log konteksti uchun
+    g.user_id = user_id
     return user_id
 
+def _request_data_version(user_id):
+    """Foydalanuvchi data version'i (bitta so'rov davomida bir marta o'qiladi)"""
+    key = 'balansai.data_version'
+    if key not in request.environ:
+        request.environ[key] = get_user_data_version(user_id) if user_id else None
+    return request.environ[key]
+
+# So'rov parametrlaridagi autentifikatsiya ma'lumotlari: cache kalitiga kirmaydi, ichki so'rovlarga uzatiladi
+_INTERNAL_AUTH_ARGS = ('_auth', 'initData', 'test_user_id')
+
+def _response_version_key(user_id, data_version, view_kwargs):
+    """Javobni aniqlaydigan kalit: (user_id, endpoint, params, data_version, kurslar, sana)"""
+    params = [(key, value) for key, value in request.args.items(multi=True) if key not in _INTERNAL_AUTH_ARGS]
+    params.extend(view_kwargs.items())
+    # UZS summalar kurslarga, "oxirgi N kun" oynalari bugungi sanaga bog'liq
+    return make_cache_key(
+        user_id, request.endpoint, params,
+        data_version['token'], get_currency_rates_snapshot().version, date.today().isoformat()
+    )
+
+def cached_user_response(view):
+    """
+    Javobni (user_id, endpoint, params, data_version) bo'yicha cache qilish.
+    Har qanday yozuv data_version'ni oshiradi, shuning uchun eski javob qaytmaydi.
+    DB xatoligi tufayli bo'sh/nol qiymatlar bilan yig'ilgan javob cache qilinmaydi.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = get_user_id_from_request()
+        data_version = _request_data_version(user_id)
+        if data_version is None:
+            return view(*args, **kwargs)
+        
+        key = _response_version_key(user_id, data_version, kwargs)
+        cache = get_response_cache()
+        body = cache.get(key)
+        if body is not None:
+            response = app.response_class(body, mimetype='application/json')
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        
+        degraded_before = degraded_read_count()
+        response = app.make_response(view(*args, **kwargs))
+        if degraded_read_count() != degraded_before:
+            return response
+        if response.status_code == 200 and response.mimetype == 'application/json':
+            cache.set(key, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+def _set_validators(response, etag, last_modified=None):
+    """ETag/Last-Modified va har safar qayta tekshirish (private, no-cache)"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def conditional_user_response(view):
+    """
+    GET javoblari uchun data_version'dan olingan ETag.
+    If-None-Match mos kelsa view chaqirilmaydi: 304 (DB so'rovlari va serializatsiyasiz).
+    ETag RESPONSE_CACHE_TTL oralig'ida yangilanadi (bot to'g'ridan-to'g'ri yozgan o'zgarishlar uchun).
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+        user_id = get_user_id_from_request()
+        data_version = _request_data_version(user_id)
+        if data_version is None:
+            return view(*args, **kwargs)
+        
+        time_bucket = int(time_module.time() // max(1, Config.RESPONSE_CACHE_TTL))
+        version_key = f"{_response_version_key(user_id, data_version, kwargs)}:{time_bucket}"
+        etag = 'v' + hashlib.sha1(version_key.encode()).hexdigest()[:24]
+        # Siqilgan javoblarda ETag weak bo'ladi (W/"..."), shuning uchun weak solishtirish
+        if request.if_none_match.contains_weak(etag):
+            return _set_validators(app.response_class(status=304), etag, data_version['updated_at'])
+        
+        degraded_before = degraded_read_count()
+        response = app.make_response(view(*args, **kwargs))
+        # Xatolik bilan yig'ilgan javobga ETag berilmaydi (keyingi so'rov qayta hisoblaydi)
+        if response.status_code == 200 and degraded_read_count() == degraded_before:
+            _set_validators(response, etag, data_version['updated_at'])
+        return response
+    return wrapper
+
+def content_etag_response(view):
+    """
+    Bot ham o'zgartirishi mumkin bo'lgan ro'yxatlar uchun javob mazmunidan olingan ETag.
+    Body baribir hisoblanadi, lekin 304 da tarmoq orqali yuborilmaydi.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        response = app.make_response(view(*args, **kwargs))
+        if request.method == 'GET' and response.status_code == 200 and not response.direct_passthrough:
+            response.add_etag()
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response.make_conditional(request)
+        return response
+    return wrapper
+
 @app.route('/api/user', methods=['GET'])
+@cached_user_response
 def get_user_info():
     """Foydalanuvchi ma'lumotlarini olish"""
     try:
@@ -311,6 +520,7 @@ def get_user_info():
         return jsonify({'error': error_msg}), 500
 
 @app.route('/api/transactions', methods=['GET'])
+@conditional_user_response
 def api_get_transactions():
     """Tranzaksiyalarni olish"""
     try:
@@ -322,27 +532,34 @@ def api_get_transactions():
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
         
-        transactions = get_transactions(user_id, limit, offset, transaction_type)
+        # Keyset pagination (?cursor=): javob {transactions, next_cursor} ko'rinishida
+        use_cursor = 'cursor' in request.args
+        page_cursor = request.args.get('cursor') or None
+        if page_cursor:
+            try:
+                decode_page_cursor(page_cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        transactions = get_transactions(user_id, limit, offset, transaction_type, page_cursor=page_cursor)
+        next_cursor = next_page_cursor(transactions, limit)
         
         # Agar transactions bo'sh bo'lsa yoki None bo'lsa
         if not transactions:
+            if use_cursor:
+                return jsonify({'transactions': [], 'next_cursor': None})
             return jsonify([])
         
-        # Decimal ni float ga konvertatsiya qilish
-        for t in transactions:
-            for key, value in t.items():
-                if isinstance(value, Decimal):
-                    t[key] = float(value)
-                elif isinstance(value, type(None)):
-                    t[key] = None
-                elif isinstance(value, datetime):
-                    t[key] = value.isoformat()
-        
-        return jsonify(transactions)
+        if use_cursor:
+            return jsonify({'transactions': transactions, 'next_cursor': next_cursor})
+        
+        # Eski klientlar uchun ro'yxat, keyingi cursor header orqali
+        response = jsonify(transactions)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     except Exception as e:
-        print(f"❌ API: Tranzaksiyalarni olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Tranzaksiyalarni olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/transactions', methods=['POST'])
@@ -384,10 +601,12 @@ def api_add_transaction():
             return jsonify({'error': 'Tranzaksiya qo\'shishda xatolik'}), 500
 
     except Exception as e:
-        print(f"❌ API: Tranzaksiya qo'shishda xatolik: {e}")
+        logger.error("❌ API: Tranzaksiya qo'shishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/balance', methods=['GET'])
+@conditional_user_response
+@cached_user_response
 def api_get_balance():
     """Balansni olish"""
     try:
@@ -401,6 +620,8 @@ def api_get_balance():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/statistics', methods=['GET'])
+@conditional_user_response
+@cached_user_response
 def api_get_statistics():
     """Statistikani olish (period parametri bilan)"""
     try:
@@ -417,52 +638,29 @@ def api_get_statistics():
         }
         days = days_map.get(period, 30)
         
-        # Asosiy statistika
-        stats = get_statistics(user_id, days)
-        total_income = stats.get('income', 0.0)
-        total_expense = stats.get('expense', 0.0)
-        
-        # Balance trend
-        balance_trend = get_balance_trend(user_id, days)
-        
-        # Monthly comparison
-        monthly_comparison = get_monthly_comparison(user_id, days)
-        
-        # Category breakdown
-        category_breakdown = get_category_breakdown(user_id, days)
-        
-        # Daily spending
-        daily_spending = get_daily_spending(user_id, days)
-        
-        # Transaction count va average
-        transaction_count, average_transaction = get_transaction_stats(user_id, days)
-        
-        # Currency distribution
-        currency_distribution = get_currency_distribution(user_id, days)
-        
-        # Weekly comparison
-        weekly_comparison = get_weekly_comparison(user_id, days)
+        # Barcha panellar bitta so'rov bilan hisoblanadi
+        stats = get_statistics_bundle(user_id, days)
         
         return jsonify({
             'success': True,
-            'total_income': total_income,
-            'total_expense': total_expense,
-            'balance_trend': balance_trend,
-            'monthly_comparison': monthly_comparison,
-            'category_breakdown': category_breakdown,
-            'daily_spending': daily_spending,
-            'transaction_count': transaction_count,
-            'average_transaction': average_transaction,
-            'currency_distribution': currency_distribution,
-            'weekly_comparison': weekly_comparison
+            'total_income': stats['income'],
+            'total_expense': stats['expense'],
+            'balance_trend': stats['balance_trend'],
+            'monthly_comparison': stats['monthly_comparison'],
+            'category_breakdown': stats['category_breakdown'],
+            'daily_spending': stats['daily_spending'],
+            'transaction_count': stats['transaction_count'],
+            'average_transaction': stats['average_transaction'],
+            'currency_distribution': stats['currency_distribution'],
+            'weekly_comparison': stats['weekly_comparison']
         })
     except Exception as e:
-        print(f"❌ API: Statistika olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Statistika olishda xatolik: %s", e)
         return jsonify({'error': str(e), 'success': False}), 500
 
 @app.route('/api/statistics/income-trend', methods=['GET'])
+@conditional_user_response
+@cached_user_response
 def api_get_income_trend():
     """Daromad dinamikasini olish"""
     try:
@@ -475,12 +673,12 @@ def api_get_income_trend():
         
         return jsonify(trend)
     except Exception as e:
-        print(f"❌ API: Daromad dinamikasini olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Daromad dinamikasini olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/statistics/top-categories', methods=['GET'])
+@conditional_user_response
+@cached_user_response
 def api_get_top_categories():
     """Top kategoriyalarni olish"""
     try:
@@ -492,19 +690,14 @@ def api_get_top_categories():
         limit = int(request.args.get('limit', 5))
         categories = get_top_expense_categories(user_id, limit, days)
         
-        # Decimal ni float ga konvertatsiya
-        for cat in categories:
-            if isinstance(cat.get('amount_original'), Decimal):
-                cat['amount_original'] = float(cat['amount_original'])
-        
         return jsonify(categories)
     except Exception as e:
-        print(f"❌ API: Top kategoriyalarni olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Top kategoriyalarni olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/statistics/expense-by-category', methods=['GET'])
+@conditional_user_response
+@cached_user_response
 def api_get_expense_by_category():
     """Kategoriya bo'yicha xarajatlar"""
     try:
@@ -517,12 +710,52 @@ def api_get_expense_by_category():
         
         return jsonify(categories)
     except Exception as e:
-        print(f"❌ API: Kategoriya bo'yicha xarajatlarni olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Kategoriya bo'yicha xarajatlarni olishda xatolik: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reports/<period>', methods=['GET'])
+@conditional_user_response
+@cached_user_response
+def api_get_period_report(period):
+    """Davr hisoboti (week, month, year); ?date=YYYY-MM-DD bilan o'tgan davrlar"""
+    try:
+        user_id = get_user_id_from_request()
+        if not user_id:
+            return jsonify({'error': 'Unauthorized'}), 401
+        
+        if period not in REPORT_PERIODS:
+            return jsonify({'error': f"period: {', '.join(REPORT_PERIODS)}"}), 400
+        at = None
+        if request.args.get('date'):
+            try:
+                at = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': "date formati YYYY-MM-DD bo'lishi kerak"}), 400
+            if at > date.today():
+                return jsonify({'error': "date kelajakda bo'lmasligi kerak"}), 400
+        
+        return jsonify(get_period_report(user_id, period, at))
+    except Exception as e:
+        logger.exception("❌ API: Hisobotni olishda xatolik: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/insights', methods=['GET'])
+@conditional_user_response
+@cached_user_response
+def api_get_analytics_insights():
+    """Insight'lar: xarajat o'sishi, anomaliyalar, takroriy to'lovlar, burn rate"""
+    try:
+        user_id = get_user_id_from_request()
+        if not user_id:
+            return jsonify({'error': 'Unauthorized'}), 401
+        
+        return jsonify(get_analytics_insights(user_id))
+    except Exception as e:
+        logger.exception("❌ API: Insight'larni olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/contacts', methods=['GET'])
+@content_etag_response
 def api_get_contacts():
     """Kontaktlar ro'yxatini olish"""
     try:
@@ -532,19 +765,9 @@ def api_get_contacts():
         
         contacts = get_contacts(user_id)
         
-        # Datetime ni string ga konvertatsiya qilish
-        for c in contacts:
-            for key, value in c.items():
-                if isinstance(value, datetime):
-                    c[key] = value.isoformat()
-                elif isinstance(value, type(None)):
-                    c[key] = None
-        
         return jsonify(contacts)
     except Exception as e:
-        print(f"❌ API: Kontaktlarni olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Kontaktlarni olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/contacts', methods=['POST'])
@@ -581,9 +804,7 @@ def api_add_contact():
         else:
             return jsonify({'success': True, 'id': None, 'message': 'Kontakt qo\'shildi (faqat nom bilan)'}), 201
     except Exception as e:
-        print(f"❌ API: Kontakt qo'shishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Kontakt qo'shishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/contacts/<int:contact_id>', methods=['PUT', 'PATCH'])
@@ -606,9 +827,7 @@ def api_update_contact(contact_id):
         else:
             return jsonify({'error': 'Kontakt yangilanmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Kontakt yangilashda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Kontakt yangilashda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/contacts/<int:contact_id>', methods=['DELETE'])
@@ -626,12 +845,11 @@ def api_delete_contact(contact_id):
         else:
             return jsonify({'error': 'Kontakt o\'chirilmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Kontakt o'chirishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Kontakt o'chirishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/debts', methods=['GET'])
+@content_etag_response
 def api_get_debts():
     """Qarzlar ro'yxatini olish"""
     try:
@@ -645,21 +863,9 @@ def api_get_debts():
         
         debts = get_debts(user_id, contact_id)
         
-        # Decimal ni float ga konvertatsiya qilish
-        for d in debts:
-            for key, value in d.items():
-                if isinstance(value, Decimal):
-                    d[key] = float(value)
-                elif isinstance(value, datetime):
-                    d[key] = value.isoformat()
-                elif isinstance(value, type(None)):
-                    d[key] = None
-        
         return jsonify(debts)
     except Exception as e:
-        print(f"❌ API: Qarzlarni olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Qarzlarni olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/debts', methods=['POST'])
@@ -692,9 +898,7 @@ def api_add_debt():
         else:
             return jsonify({'error': 'Qarz qo\'shilmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Qarz qo'shishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Qarz qo'shishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/debts/<int:debt_id>', methods=['PUT', 'PATCH'])
@@ -719,9 +923,7 @@ def api_update_debt(debt_id):
         else:
             return jsonify({'error': 'Qarz yangilanmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Qarz yangilashda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Qarz yangilashda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/debts/<int:debt_id>', methods=['DELETE'])
@@ -739,9 +941,7 @@ def api_delete_debt(debt_id):
         else:
             return jsonify({'error': 'Qarz o\'chirilmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Qarz o'chirishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Qarz o'chirishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/debts/<int:debt_id>/reminders', methods=['GET'])
@@ -754,19 +954,9 @@ def api_get_debt_reminders(debt_id):
         
         reminders = get_debt_reminders(user_id, debt_id)
         
-        # Datetime ni string ga konvertatsiya qilish
-        for r in reminders:
-            for key, value in r.items():
-                if isinstance(value, datetime):
-                    r[key] = value.isoformat()
-                elif isinstance(value, type(None)):
-                    r[key] = None
-        
         return jsonify(reminders)
     except Exception as e:
-        print(f"❌ API: Qarz eslatmalarini olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Qarz eslatmalarini olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/debts/<int:debt_id>/reminders', methods=['POST'])
@@ -792,9 +982,7 @@ def api_add_debt_reminder(debt_id):
         else:
             return jsonify({'error': 'Eslatma qo\'shilmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Qarz eslatmasi qo'shishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Qarz eslatmasi qo'shishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/debts/reminders/<int:reminder_id>', methods=['DELETE'])
@@ -812,12 +1000,11 @@ def api_delete_debt_reminder(reminder_id):
         else:
             return jsonify({'error': 'Eslatma o\'chirilmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Qarz eslatmasini o'chirishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Qarz eslatmasini o'chirishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/reminders', methods=['GET', 'POST'])
+@content_etag_response
 def api_reminders():
     """Eslatmalarni olish va qo'shish"""
     user_id = get_user_id_from_request()
@@ -833,33 +1020,9 @@ def api_reminders():
             if not reminders:
                 return jsonify([])
             
-            # Decimal ni float ga konvertatsiya qilish va boshqa turdagi ma'lumotlarni JSON ga moslashtirish
-            for r in reminders:
-                for key, value in r.items():
-                    if isinstance(value, Decimal):
-                        r[key] = float(value)
-                    elif isinstance(value, type(None)):
-                        r[key] = None
-                    elif isinstance(value, datetime):
-                        r[key] = value.isoformat()
-                    elif isinstance(value, (date, time)):
-                        r[key] = str(value)
-                    elif isinstance(value, timedelta):
-                        # timedelta ni sekundlarga konvertatsiya qilish
-                        r[key] = value.total_seconds()
-                    elif isinstance(value, bool):
-                        r[key] = value
-                    elif isinstance(value, (int, float, str)):
-                        r[key] = value
-                    else:
-                        # Boshqa turdagi ma'lumotlarni string ga konvertatsiya qilish
-                        r[key] = str(value)
-            
             return jsonify(reminders)
         except Exception as e:
-            print(f"❌ API: Eslatmalarni olishda xatolik: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ API: Eslatmalarni olishda xatolik: %s", e)
             return jsonify({'error': str(e)}), 500
     
     elif request.method == 'POST':
@@ -881,9 +1044,7 @@ def api_reminders():
             else:
                 return jsonify({'error': 'Eslatma qo\'shilmadi'}), 500
         except Exception as e:
-            print(f"❌ API: Eslatma qo'shishda xatolik: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ API: Eslatma qo'shishda xatolik: %s", e)
             return jsonify({'error': str(e)}), 500
 
 @app.route('/api/reminders/<int:reminder_id>', methods=['PATCH'])
@@ -904,9 +1065,7 @@ def api_update_reminder(reminder_id):
         else:
             return jsonify({'error': 'Eslatma yangilanmadi'}), 500
     except Exception as e:
-        print(f"❌ API: Eslatma yangilashda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Eslatma yangilashda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/profile/stats', methods=['GET'])
@@ -917,9 +1076,8 @@ def api_get_profile_stats():
         if not user_id:
             return jsonify({'error': 'Unauthorized'}), 401
         
-        # Tranzaksiyalar soni
-        transactions = get_transactions(user_id, limit=1000)
-        total_transactions = len(transactions) if transactions else 0
+        # Tranzaksiyalar soni (ledger hisoblagichlaridan, qatorlar o'qilmaydi)
+        transaction_counts = get_transaction_counts(user_id)
         
         # Balans va statistika
         balance_stats = get_balance_and_statistics(user_id, days=30)
@@ -935,7 +1093,8 @@ def api_get_profile_stats():
                 registered_at = str(user['created_at'])
         
         return jsonify({
-            'total_transactions': total_transactions,
+            'total_transactions': transaction_counts['total'],
+            'transaction_counts': transaction_counts,
             'balance': balance_stats['balance'],
             'income': balance_stats['income'],
             'expense': balance_stats['expense'],
@@ -944,9 +1103,7 @@ def api_get_profile_stats():
             'last_activity': datetime.now().isoformat()
         })
     except Exception as e:
-        print(f"❌ API: Profile statistika olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Profile statistika olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/profile/payments', methods=['GET'])
@@ -963,34 +1120,20 @@ def api_get_payments_history():
         # Tarif to'lovlarini olish
         payments = get_subscription_payments(user_id, limit, offset)
         
-        # Decimal ni float ga konvertatsiya qilish
-        for p in payments:
-            for key, value in p.items():
-                if isinstance(value, Decimal):
-                    p[key] = float(value)
-                elif isinstance(value, datetime):
-                    p[key] = value.isoformat()
-                elif value is None:
-                    p[key] = None
-        
         return jsonify(payments)
     except Exception as e:
-        print(f"❌ API: Tarif to'lovlarini olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Tarif to'lovlarini olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/currency-rates', methods=['GET'])
 def api_get_currency_rates():
-    """Valyuta kurslarini olish"""
+    """Valyuta kurslarini olish (to'liq snapshot, ETag bilan)"""
     try:
-        rates = {
-            'USD': get_currency_rate('USD'),
-            'EUR': get_currency_rate('EUR'),
-            'RUB': get_currency_rate('RUB'),
-            'TRY': get_currency_rate('TRY')
-        }
-        return jsonify(rates)
+        snapshot = get_currency_rates_snapshot()
+        response = jsonify(snapshot.rates)
+        response.set_etag(f"rates-{snapshot.version}")
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1112,6 +1255,7 @@ def set_tariff(user_id):
                     "UPDATE users SET tariff = %s, tariff_expires_at = %s, updated_at = NOW() WHERE user_id = %s",
                     (tariff, trial_expires_at, user_id)
                 )
+                bump_user_data_version(connection, user_id)
                 connection.commit()
                 return jsonify({
                     'success': True,
@@ -1138,20 +1282,15 @@ def api_get_category_transactions(category_name):
         
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
+        page_cursor = request.args.get('cursor') or None
+        if page_cursor:
+            try:
+                decode_page_cursor(page_cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
-        transactions = get_category_transactions(user_id, category_name, limit, offset)
-        
-        # Decimal va datetime ni JSON ga moslashtirish
-        for t in transactions:
-            for key, value in t.items():
-                if isinstance(value, Decimal):
-                    t[key] = float(value)
-                elif isinstance(value, datetime):
-                    t[key] = value.isoformat()
-                elif isinstance(value, (date, time)):
-                    t[key] = str(value)
-                elif value is None:
-                    t[key] = None
+        transactions = get_category_transactions(user_id, category_name, limit, offset, page_cursor=page_cursor)
+        next_cursor = next_page_cursor(transactions, limit)
         
         # Jami summani hisoblash
         details = get_category_details(user_id, category_name)
@@ -1161,12 +1300,11 @@ def api_get_category_transactions(category_name):
             'total_amount': float(details.get('net_amount', 0)),
             'total_income': float(details.get('total_income', 0)),
             'total_expense': float(details.get('total_expense', 0)),
-            'transaction_count': details.get('transaction_count', 0)
+            'transaction_count': details.get('transaction_count', 0),
+            'next_cursor': next_cursor
         })
     except Exception as e:
-        print(f"❌ API: Kategoriya tranzaksiyalarini olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Kategoriya tranzaksiyalarini olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/category/<category_name>/details', methods=['GET'])
@@ -1179,80 +1317,389 @@ def api_get_category_details(category_name):
         
         details = get_category_details(user_id, category_name)
 
-        # Decimal ni float ga konvertatsiya qilish
-        for key, value in details.items():
-            if isinstance(value, Decimal):
-                details[key] = float(value)
-
         return jsonify(details)
     except Exception as e:
-        print(f"❌ API: Kategoriya tafsilotlarini olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ API: Kategoriya tafsilotlarini olishda xatolik: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
+# ============================================
+# BOOTSTRAP & BATCH ENDPOINTS
+# ============================================
+
+# Mini App ochilganda kerak bo'ladigan bo'limlar (tartibi javobda saqlanadi)
+BOOTSTRAP_SECTIONS = OrderedDict([
+    ('user', '/api/user'),
+    ('config', '/api/config'),
+    ('currency_rates', '/api/currency-rates'),
+    ('transactions', '/api/transactions?limit=50'),
+    ('income_trend', '/api/statistics/income-trend?period=auto'),
+    ('top_categories', '/api/statistics/top-categories?limit=5&days=30'),
+    ('reminders', '/api/reminders'),
+    ('contacts', '/api/contacts'),
+    ('debts', '/api/debts'),
+])
+
+# Ichki so'rovlarga faqat autentifikatsiya ma'lumotlari uzatiladi
+_INTERNAL_AUTH_HEADERS = ('X-Telegram-Init-Data',)
+
+def dispatch_internal_get(url, params=None):
+    """
+    GET endpoint'ni joriy so'rov ichida chaqirish (HTTP'siz).
+    Joriy connection scope, initData cache'i va data_version qayta ishlatiladi.
+    """
+    path, _, query = url.partition('?')
+    adapter = app.url_map.bind_to_environ(request.environ)
+    endpoint, view_args = adapter.match(path, method='GET')
+    
+    args = [(key, value) for key, value in request.args.items(multi=True) if key in _INTERNAL_AUTH_ARGS]
+    query_string = '&'.join(part for part in (query, urlencode(params or {}, doseq=True), urlencode(args)) if part)
+    headers = {name: request.headers[name] for name in _INTERNAL_AUTH_HEADERS if name in request.headers}
+    environ_base = {key: request.environ[key] for key in ('balansai.data_version', 'REMOTE_ADDR') if key in request.environ}
+    with app.test_request_context(path, method='GET', query_string=query_string, headers=headers, environ_base=environ_base):
+        return app.make_response(app.view_functions[endpoint](**view_args))
+
+def _internal_error(response):
+    """Ichki javobdan xatolik obyekti ({status, error, code})"""
+    error = {'status': response.status_code}
+    body = None
+    if not response.is_streamed and response.is_json:
+        try:
+            body = app.json.loads(response.get_data())
+        except ValueError:
+            body = None
+    if isinstance(body, dict):
+        error.update({key: body[key] for key in ('error', 'message', 'code') if key in body})
+    error.setdefault('error', response.status)
+    return error
+
+def run_internal_get(url, params=None):
+    """Ichki GET natijasi: (JSON body, None) yoki (None, xatolik obyekti)"""
+    try:
+        response = dispatch_internal_get(url, params)
+    except HTTPException as e:
+        return None, {'status': e.code, 'error': e.name}
+    except Exception as e:
+        logger.exception("❌ API: Ichki so'rov (%s) xatolik: %s", url, e)
+        return None, {'status': 500, 'error': str(e)}
+    if response.is_streamed or not response.is_json:
+        # Body o'qilmaydi: stream generator'i ishga tushmaydi, resurslari yopiladi
+        response.close()
+        if response.status_code == 200:
+            return None, {'status': 406, 'error': "Faqat JSON javob qaytaradigan endpoint'lar qo'llab-quvvatlanadi"}
+        return None, _internal_error(response)
+    if response.status_code == 200:
+        return response.get_data().strip(), None
+    return None, _internal_error(response)
+
+@app.route('/api/bootstrap', methods=['GET'])
+def api_bootstrap():
+    """
+    Ilova ochilishi uchun bir nechta endpoint javobi bitta so'rovda.
+    ?sections=user,transactions,... (default: hammasi); har bir bo'lim xatosi alohida qaytadi.
+    """
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    requested = [name.strip() for name in request.args.get('sections', '').split(',') if name.strip()]
+    unknown = [name for name in requested if name not in BOOTSTRAP_SECTIONS]
+    if unknown:
+        return jsonify({
+            'error': f"Noma'lum bo'limlar: {', '.join(unknown)}",
+            'available': list(BOOTSTRAP_SECTIONS)
+        }), 400
+    names = [name for name in BOOTSTRAP_SECTIONS if not requested or name in requested]
+    # Bo'limlar bitta data_version o'qishidan foydalanadi
+    _request_data_version(user_id)
+    
+    parts = []
+    errors = {}
+    timings = []
+    for name in names:
+        started = time_module.perf_counter()
+        body, error = run_internal_get(BOOTSTRAP_SECTIONS[name])
+        if error is None:
+            # Bo'lim body'si qayta parse qilinmaydi, JSON sifatida to'g'ridan-to'g'ri qo'shiladi
+            parts.append(b'"' + name.encode() + b'":' + body)
+        else:
+            errors[name] = error
+        timings.append((name, (time_module.perf_counter() - started) * 1000))
+    
+    body = b'{"sections":{' + b','.join(parts) + b'},"errors":' + app.json.dumps_bytes(errors) + b'}\n'
+    response = app.response_class(body, mimetype='application/json')
+    response.headers['Cache-Control'] = 'private, no-store'
+    response.headers['Server-Timing'] = ', '.join(f"{name};dur={duration:.2f}" for name, duration in timings)
+    return response
+
+# Batch orqali chaqirib bo'lmaydigan yo'llar (rekursiya, admin va stream qilinadigan eksport)
+_BATCH_FORBIDDEN_PREFIXES = ('/api/batch', '/api/bootstrap', '/api/admin', '/api/export')
+
+def _batch_item_url(item):
+    """Batch elementidan (url, params) yoki xatolik matni"""
+    if not isinstance(item, dict):
+        return None, None, "Element obyekt bo'lishi kerak"
+    path = item.get('path')
+    params = item.get('params') or {}
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return None, None, "path /api/ bilan boshlanishi kerak"
+    if path.split('?', 1)[0].startswith(_BATCH_FORBIDDEN_PREFIXES):
+        return None, None, f"{path} batch orqali chaqirilmaydi"
+    if not isinstance(params, dict):
+        return None, None, "params obyekt bo'lishi kerak"
+    return path, params, None
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """
+    Bir nechta GET so'rovini bitta HTTP so'rovda bajarish.
+    Body: {"requests": [{"path": "/api/debts/5/reminders", "params": {...}}, ...]}
+    Javob: {"results": [{"status": 200, "body": ...} | {"status": 4xx/5xx, "error": ...}]} (so'rovlar tartibida)
+    """
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': "requests ro'yxati majburiy"}), 400
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return jsonify({'error': f"Bitta batch'da ko'pi bilan {Config.BATCH_MAX_ITEMS} ta so'rov"}), 400
+    
+    _request_data_version(user_id)
+    results = []
+    timings = []
+    for index, item in enumerate(items):
+        path, params, invalid = _batch_item_url(item)
+        if invalid:
+            results.append(app.json.dumps_bytes({'status': 400, 'error': invalid}))
+            continue
+        started = time_module.perf_counter()
+        body, error = run_internal_get(path, params)
+        timings.append((index, (time_module.perf_counter() - started) * 1000))
+        if error is None:
+            results.append(b'{"status":200,"body":' + body + b'}')
+        else:
+            results.append(app.json.dumps_bytes(error))
+    
+    response = app.response_class(b'{"results":[' + b','.join(results) + b']}\n', mimetype='application/json')
+    response.headers['Cache-Control'] = 'private, no-store'
+    response.headers['Server-Timing'] = ', '.join(f"item{index};dur={duration:.2f}" for index, duration in timings)
+    return response
+
+
+# ============================================
+# ADMIN ENDPOINTS
+# ============================================
+
+def is_admin_request():
+    """X-Admin-Token header ADMIN_TOKEN bilan mos keladimi"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(Config.ADMIN_TOKEN) and hmac.compare_digest(token, Config.ADMIN_TOKEN)
+
+@app.route('/api/admin/pool-stats', methods=['GET'])
+def api_admin_pool_stats():
+    """Connection pool metrikalari (checkout, kutish vaqti, band/bo'sh connection'lar)"""
+    if not is_admin_request():
+        return jsonify({'error': 'Not found'}), 404
+    response = jsonify(get_pool_stats())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/admin/cache-stats', methods=['GET'])
+def api_admin_cache_stats():
+    """Javob cache'i statistikasi (hit/miss, hajm)"""
+    if not is_admin_request():
+        return jsonify({'error': 'Not found'}), 404
+    response = jsonify(get_response_cache().stats())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/admin/compression-stats', methods=['GET'])
+def api_admin_compression_stats():
+    """Endpoint bo'yicha siqish statistikasi (CPU vaqti, baytlar, nisbat)"""
+    if not is_admin_request():
+        return jsonify({'error': 'Not found'}), 404
+    response = jsonify(compression_stats.snapshot())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 # ============================================
 # TELEGRAM EXPORT ENDPOINT
 # ============================================
 
 @app.route('/api/export/telegram', methods=['POST'])
 def api_export_to_telegram():
-    """Eksport faylini Telegram botga yuborish"""
-    import requests
-
+    """Eksport faylini Telegram botga yuborish (navbatga qo'yiladi, 202 + job_id)"""
     try:
         user_id = get_user_id_from_request()
         if not user_id:
             return jsonify({'error': 'Unauthorized'}), 401
 
-        # Faylni olish
-        if 'file' not in request.files:
+        if request.content_length and request.content_length > Config.EXPORT_MAX_UPLOAD_BYTES:
+            return jsonify({'error': 'Fayl juda katta'}), 413
+
+        if not Config.TELEGRAM_BOT_TOKEN:
+            return jsonify({'error': 'Bot token mavjud emas'}), 500
+
+        # Fayl yuklanmagan bo'lsa eksport server tomonda yaratiladi: {"format": "csv", "date_from": ...}
+        params = request.form if request.files or request.form else (request.get_json(silent=True) or {})
+        caption = params.get('caption', 'Balans AI Eksport')
+        if 'file' in request.files:
+            # Fayl diskka yoziladi, Telegram'ga fonda yuboriladi (qayta urinishlar bilan)
+            job_id = enqueue_telegram_document(user_id, request.files['file'], caption)
+        elif params.get('format'):
+            export_args = {key: str(params[key]) for key in ('date_from', 'date_to', 'category', 'type') if params.get(key)}
+            try:
+                job_id = enqueue_telegram_export(user_id, params['format'], export_args, caption)
+            except ExportError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
             return jsonify({'error': 'Fayl topilmadi'}), 400
 
-        file = request.files['file']
-        caption = request.form.get('caption', 'Balans AI Eksport')
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f"/api/export/jobs/{job_id}",
+            'message': 'Fayl navbatga qo\'yildi'
+        }), 202
 
-        # Telegram Bot Token
-        bot_token = Config.TELEGRAM_BOT_TOKEN
-        if not bot_token:
-            return jsonify({'error': 'Bot token mavjud emas'}), 500
+    except Exception as e:
+        logger.exception("❌ Export to Telegram xatosi: %s", e)
+        return jsonify({'error': str(e)}), 500
 
-        # Telegram API ga fayl yuborish
-        telegram_url = f"https://api.telegram.org/bot{bot_token}/sendDocument"
+@app.route('/api/export', methods=['GET'])
+def api_export_transactions():
+    """
+    Tranzaksiyalarni fayl sifatida yuklab olish: ?format=csv|json|ndjson|xlsx&date_from=&date_to=&category=&type=
+    Qatorlar DB'dan bufersiz o'qilib, javob bo'laklab yuboriladi (xotira qatorlar soniga bog'liq emas).
+    """
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    export_format = request.args.get('format', 'csv')
+    try:
+        mimetype, _ = check_export_format(export_format)
+        filters = parse_export_filters(request.args)
+        chunks = iter_export(user_id, export_format, filters)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(export_format)}"'
+    response.headers['Cache-Control'] = 'private, no-store'
+    # nginx/proxy javobni bufer qilmasin
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/export/jobs/<job_id>', methods=['GET'])
+def api_export_job_status(job_id):
+    """Eksport job holati (queued, sending, done, failed)"""
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    status = get_job_status(job_id, user_id)
+    if status is None:
+        return jsonify({'error': 'Job topilmadi'}), 404
+    response = jsonify(status)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
-        # Faylni yuborish
-        files = {
-            'document': (file.filename, file.stream, file.content_type or 'application/octet-stream')
-        }
-        data = {
-            'chat_id': user_id,
-            'caption': caption,
-            'parse_mode': 'HTML'
-        }
 
-        response = requests.post(telegram_url, files=files, data=data, timeout=30)
+# ============================================
+# CLI BUYRUQLARI
+# ============================================
 
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('ok'):
-                print(f"✅ Eksport yuborildi: user_id={user_id}, file={file.filename}")
-                return jsonify({'success': True, 'message': 'Fayl Telegram ga yuborildi'})
-            else:
-                print(f"❌ Telegram API xatosi: {result}")
-                return jsonify({'error': 'Telegram API xatosi'}), 500
+@app.cli.command('rebuild-rollups')
+@click.option('--user-id', type=int, default=None, help='Faqat bitta foydalanuvchi uchun')
+def rebuild_rollups_command(user_id):
+    """Kunlik agregatlar jadvalini qayta qurish (backfill)"""
+    result = rebuild_daily_rollups(user_id)
+    click.echo(f"✅ Kunlik agregatlar qayta qurildi: {result['users']} foydalanuvchi, {result['rows']} qator")
+
+@app.cli.command('build-report-snapshots')
+@click.option('--user-id', type=int, default=None, help='Faqat bitta foydalanuvchi uchun')
+def build_report_snapshots_command(user_id):
+    """Yopilgan oy/yillar hisobot snapshot'larini yaratish (oy boshida cron bilan)"""
+    result = build_report_snapshots(user_id)
+    click.echo(f"✅ Hisobot snapshot'lari tayyor: {result['users']} foydalanuvchi, {result['periods']} davr")
+
+@app.cli.command('check-balances')
+@click.option('--user-id', type=int, default=None, help='Faqat bitta foydalanuvchi uchun')
+@click.option('--repair', is_flag=True, help='Farqli foydalanuvchilarni qayta hisoblash (jadvalni ham yaratadi)')
+def check_balances_command(user_id, repair):
+    """user_balances ledgerini transactions bilan solishtirish"""
+    drift = check_user_balances(user_id, repair=repair)
+    for item in drift:
+        click.echo(
+            f"⚠️ user_id={item['user_id']} {item['currency']} {item['field']}: "
+            f"kutilgan={item['expected']}, ledger={item['actual']}"
+        )
+    if not drift:
+        click.echo("✅ Ledger transactions bilan mos")
+    elif repair:
+        click.echo(f"✅ {len({item['user_id'] for item in drift})} foydalanuvchi ledgeri tuzatildi")
+
+@app.cli.command('db-migrate')
+@click.option('--status', is_flag=True, help="Faqat migratsiyalar holatini ko'rsatish")
+@click.option('--target', type=int, default=None, help="Shu versiyagacha qo'llash")
+def db_migrate_command(status, target):
+    """Sxema migratsiyalarini qo'llash (jadvallar va index'lar)"""
+    from migrations import migrate, migration_status
+    if not status:
+        applied = migrate(target)
+        if applied:
+            click.echo(f"✅ Qo'llangan migratsiyalar: {', '.join(map(str, applied))}")
         else:
-            print(f"❌ Telegram request xatosi: {response.status_code} - {response.text}")
-            return jsonify({'error': 'Telegram ga yuborishda xatolik'}), 500
-
-    except Exception as e:
-        print(f"❌ Export to Telegram xatosi: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+            click.echo("✅ Yangi migratsiya yo'q")
+    for item in migration_status():
+        mark = '✅' if item['applied_at'] else '⏳'
+        click.echo(f"{mark} {item['version']:>3} {item['name']} {item['applied_at'] or ''}")
+
+@app.cli.command('explain-queries')
+@click.option('--user-id', type=int, default=None, help="Tekshiriladigan foydalanuvchi (default: seed foydalanuvchisi)")
+@click.option('--seed', type=int, default=0, help="Oldin shuncha sintetik tranzaksiya yozish (faqat local baza!)")
+@click.option('--raw', is_flag=True, help="Agregat jadvallarsiz (fallback) so'rovlarni tekshirish")
+@click.option('--cleanup', is_flag=True, help="Oxirida seed ma'lumotlarini o'chirish")
+@click.option('--verbose', is_flag=True, help="To'liq EXPLAIN rejasini chiqarish")
+def explain_queries_command(user_id, seed, raw, cleanup, verbose):
+    """database.py so'rovlarini EXPLAIN qilib to'liq skan va filesort'larni topish"""
+    from migrations import explain_queries, seed_explain_data, cleanup_explain_data, EXPLAIN_SEED_USER_ID
+    user_id = user_id or EXPLAIN_SEED_USER_ID
+    if seed:
+        seed_explain_data(user_id, seed)
+        click.echo(f"🌱 {seed} ta sintetik tranzaksiya yozildi (user_id={user_id})")
+    try:
+        results = explain_queries(user_id, raw=raw)
+    finally:
+        if cleanup:
+            cleanup_explain_data(user_id)
+    
+    flagged = 0
+    for item in results:
+        mark = '⚠️' if item['issues'] else '✅'
+        click.echo(f"{mark} {item['helper']}: {item['query'] or ''}")
+        for issue in item['issues']:
+            click.echo(f"      - {issue}")
+        if verbose:
+            for row in item['plan']:
+                click.echo(
+                    f"      {row.get('table')} type={row.get('type')} key={row.get('key')} "
+                    f"rows={row.get('rows')} extra={row.get('Extra') or ''}"
+                )
+        if item['issues']:
+            flagged += 1
+    click.echo(f"{len(results)} ta so'rov tekshirildi, {flagged} tasida muammo")
+    if flagged:
+        raise SystemExit(1)
 
 
 if __name__ == '__main__':
+    # Eksport navbati: oldingi ishga tushirishdan qolgan job'lar ham yuboriladi
+    start_job_workers()
     port = int(os.getenv('PORT', 5003))
     app.run(debug=Config.DEBUG, host='0.0.0.0', port=port)
 
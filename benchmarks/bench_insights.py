@@ -0,0 +1,109 @@
+# /api/analytics/insights hisoblash vaqti: 100k tranzaksiyali foydalanuvchi
+#
+#   python benchmarks/bench_insights.py                       # sintetik tarix, faqat Python (DB siz)
+#   python benchmarks/bench_insights.py --user-id 123         # bazada: insight'lar va alohida helper'lar (.env dagi MySQL)
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import insights  # noqa: E402
+
+
+def synthetic_transactions(count, days, today):
+    """created_at bo'yicha tartiblangan (created_at, type, currency, category, amount), oylik va haftalik to'lovlar bilan"""
+    rng = random.Random(42)
+    start = datetime.combine(today, datetime.min.time()) - timedelta(days=days - 1)
+    step = days * 86400 / count
+    categories = ['Oziq-ovqat', 'Transport', 'Kafe', 'Uy-joy', "Sog'liq", 'Kiyim', 'Boshqa']
+    rows = []
+    for i in range(count):
+        currency = rng.choice(('UZS', 'UZS', 'USD'))
+        rows.append((
+            start + timedelta(seconds=i * step),
+            rng.choice(('expense', 'expense', 'expense', 'income', 'debt')),
+            currency,
+            rng.choice(categories),
+            round(rng.uniform(1000, 500000) if currency == 'UZS' else rng.uniform(1, 40), 2),
+        ))
+    # Takroriy to'lovlar (aniqlanishi kerak): oylik aloqa va haftalik sport zali
+    day = start
+    while day.date() <= today:
+        if day.day == 5:
+            rows.append((day.replace(hour=9), 'expense', 'UZS', 'Aloqa', 99000.0))
+        if day.weekday() == 0:
+            rows.append((day.replace(hour=7), 'expense', 'USD', 'Sport', 15.0))
+        day += timedelta(days=1)
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def _use_default_rates():
+    """Sintetik rejimda kurslar DB siz (default kurslar, fon yangilovchi ishga tushmaydi)"""
+    database._rates_snapshot = database.CurrencyRateSnapshot(dict(database._DEFAULT_CURRENCY_RATES), time.time())
+    database._rates_refresher_pid = os.getpid()
+
+
+def _median_ms(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def bench_python(count, days, repeat):
+    _use_default_rates()
+    today = date.today()
+    transactions = synthetic_transactions(count, days, today)
+    window_start = insights.insight_window_start(today)
+    # Kunlik agregatlar (transaction_daily_rollups bilan bir xil qatorlar)
+    rows = [row for row in database._bucket_daily_rows(iter(transactions)) if row['date'] >= window_start]
+    currency_totals = [
+        {'currency': 'UZS', 'income_total': 900000000, 'expense_total': 850000000},
+        {'currency': 'USD', 'income_total': 5000, 'expense_total': 4200},
+    ]
+
+    median_ms, result = _median_ms(lambda: insights.compute_insights(rows, currency_totals, 2, today), repeat)
+    print(f"Sintetik: {len(transactions)} tranzaksiya ({days} kun) -> oynada {len(rows)} agregat qator")
+    print(f"compute_insights: median {median_ms:.2f} ms")
+    print(f"  expenseGrowth={result['expenseGrowth']}, topCategory={result['topCategory']}, "
+          f"anomaliyalar={len(result['anomalies'])}, burnRate={result['burnRate']['daily']:,.0f}/kun")
+    for item in result['recurring']:
+        print(f"  🔁 {item['category']}: {item['amount']} {item['currency']} ({item['interval']}, "
+              f"{item['occurrences']} marta, keyingisi {item['nextDate']})")
+
+
+def bench_database(user_id, repeat):
+    for name, func in (
+        ('insights (bitta connection)', lambda: insights.get_analytics_insights(user_id)),
+        ('statistika to\'plami (30 kun)', lambda: database.get_statistics_bundle(user_id, 30)),
+    ):
+        median_ms, _ = _median_ms(func, repeat)
+        print(f"{name:>28}: median {median_ms:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Insight'lar hisoblash vaqti")
+    parser.add_argument('--user-id', type=int, help="Bazada o'lchanadigan foydalanuvchi")
+    parser.add_argument('--rows', type=int, default=100000, help="Sintetik tranzaksiyalar soni")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.user_id:
+        bench_database(args.user_id, args.repeat)
+    else:
+        bench_python(args.rows, args.days, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
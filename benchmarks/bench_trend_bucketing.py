@@ -0,0 +1,101 @@
+# Kunlik summalar: SQL GROUP BY DATE(created_at) (sql) va Python stream (stream) rejimlarini solishtirish
+#
+#   python benchmarks/bench_trend_bucketing.py                    # faqat Python bir o'tish (sintetik qatorlar)
+#   python benchmarks/bench_trend_bucketing.py --user-id 123      # bazada ikkala rejim (.env dagi MySQL)
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def synthetic_rows(count, days):
+    """created_at bo'yicha tartiblangan (created_at, type, currency, category, amount) qatorlari"""
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=days)
+    step = days * 86400 / count
+    categories = ['Oziq-ovqat', 'Transport', 'Kafe', 'Uy-joy', "Sog'liq", 'Kiyim', 'Aloqa', 'Boshqa']
+    return [
+        (
+            start + timedelta(seconds=i * step),
+            rng.choice(('expense', 'expense', 'expense', 'income', 'debt')),
+            rng.choice(('UZS', 'UZS', 'USD')),
+            rng.choice(categories),
+            round(rng.uniform(1000, 500000), 2),
+        )
+        for i in range(count)
+    ]
+
+
+def bench_python(count, days, repeat):
+    rows = synthetic_rows(count, days)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        buckets = database._bucket_daily_rows(iter(rows))
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"Python bir o'tish: {count} qator -> {len(buckets)} agregat, "
+          f"median {statistics.median(timings):.2f} ms ({count / statistics.median(timings) * 1000:,.0f} qator/s)")
+
+
+def _totals_by_key(rows):
+    return {
+        (str(row['date']), row['transaction_type'], row['currency'], row['category'] or ''): (int(row['count']), float(row['total']))
+        for row in rows
+    }
+
+
+def bench_database(user_id, days, repeat):
+    # Agregat jadvali bo'lsa ham fallback yo'li o'lchanadi
+    database.assume_tables_missing('transaction_daily_rollups')
+    date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    results = {}
+    for mode in ('sql', 'stream'):
+        Config.TREND_BUCKETING = mode
+        timings = []
+        rows = []
+        for _ in range(repeat):
+            connection = database.get_db_connection()
+            try:
+                with connection.cursor() as cursor:
+                    started = time.perf_counter()
+                    rows = database._fetch_daily_totals(cursor, user_id, date_from)
+                    timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+        results[mode] = _totals_by_key(rows)
+        print(f"{mode:>6}: {len(rows)} agregat, median {statistics.median(timings):.2f} ms, "
+              f"min {min(timings):.2f} ms, max {max(timings):.2f} ms")
+
+    sql_totals, stream_totals = results['sql'], results['stream']
+    mismatched = [
+        key for key in set(sql_totals) | set(stream_totals)
+        if key not in sql_totals or key not in stream_totals
+        or sql_totals[key][0] != stream_totals[key][0]
+        or abs(sql_totals[key][1] - stream_totals[key][1]) > 0.01
+    ]
+    print("✅ Natijalar bir xil" if not mismatched else f"❌ {len(mismatched)} ta agregat farq qiladi")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kunlik summalar rejimlarini solishtirish")
+    parser.add_argument('--user-id', type=int, help="Bazada o'lchanadigan foydalanuvchi")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--rows', type=int, default=100000, help="Sintetik qatorlar soni")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    bench_python(args.rows, args.days, args.repeat)
+    if args.user_id:
+        bench_database(args.user_id, args.days, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
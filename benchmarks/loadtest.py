@@ -0,0 +1,170 @@
+# Yuklama testi: gunicorn worker rejimlarini (sync, gthread, gevent) bir xil yuklamada solishtirish
+#
+#   python benchmarks/loadtest.py --url http://127.0.0.1:8000 --test-user-id 123
+#   python benchmarks/loadtest.py --spawn sync,gthread,gevent --test-user-id 123 --concurrency 64
+#
+# --spawn har bir rejim uchun gunicorn -c gunicorn.conf.py app:app ni alohida portda ishga tushiradi
+# (.env dagi MySQL ishlatiladi). Telegram initData bilan: --init-data "query_id=...&hash=..."
+import argparse
+import http.client
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit, urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PATHS = [
+    '/api/balance',
+    '/api/transactions?limit=50',
+    '/api/statistics/income-trend?period=auto',
+    '/api/debts',
+]
+
+
+def _with_test_user(path, test_user_id):
+    if not test_user_id:
+        return path
+    return path + ('&' if '?' in path else '?') + urlencode({'test_user_id': test_user_id})
+
+
+def run_load(base_url, paths, concurrency, duration, headers):
+    """concurrency ta thread duration soniya davomida so'rov yuboradi (har biri keep-alive connection bilan)"""
+    target = urlsplit(base_url)
+    deadline = time.monotonic() + duration
+    latencies = []
+    statuses = {}
+    errors = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        local_latencies = []
+        local_statuses = {}
+        local_errors = 0
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        index = offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+                local_latencies.append((time.perf_counter() - started) * 1000)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) if latencies else 0.0,
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'statuses': statuses,
+        'errors': sum(errors),
+    }
+
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def spawn_gunicorn(worker_class, port, extra_env):
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class, PORT=str(port), **extra_env)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    if not _wait_for_port(port):
+        process.kill()
+        raise RuntimeError(f"{worker_class}: gunicorn {port} portda ishga tushmadi")
+    return process
+
+
+def print_result(name, result):
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(result['statuses'].items()))
+    print(f"{name:>8}: {result['rps']:8.1f} req/s  p50 {result['p50']:7.2f} ms  p95 {result['p95']:7.2f} ms  "
+          f"p99 {result['p99']:7.2f} ms  ({result['requests']} so'rov; {statuses}; xatolik: {result['errors']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gunicorn worker rejimlari uchun yuklama testi")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="Ishlab turgan server (--spawn bo'lmasa)")
+    parser.add_argument('--spawn', help="Solishtiriladigan worker rejimlari, masalan: sync,gthread,gevent")
+    parser.add_argument('--port', type=int, default=8765, help="--spawn uchun port")
+    parser.add_argument('--workers', type=int, default=2, help="--spawn uchun WEB_CONCURRENCY")
+    parser.add_argument('--threads', type=int, default=8, help="--spawn uchun GUNICORN_THREADS")
+    parser.add_argument('--path', action='append', dest='paths', help="Endpoint (bir necha marta berish mumkin)")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--test-user-id', help="DEBUG serverda ?test_user_id=")
+    parser.add_argument('--init-data', help="X-Telegram-Init-Data header qiymati")
+    args = parser.parse_args()
+
+    paths = [_with_test_user(path, args.test_user_id) for path in (args.paths or DEFAULT_PATHS)]
+    headers = {'Accept-Encoding': 'gzip'}
+    if args.init_data:
+        headers['X-Telegram-Init-Data'] = args.init_data
+
+    print(f"{args.concurrency} ta parallel mijoz, {args.duration:.0f} s, endpoint'lar: {', '.join(paths)}")
+    if not args.spawn:
+        run_load(args.url, paths, args.concurrency, args.warmup, headers)
+        print_result('server', run_load(args.url, paths, args.concurrency, args.duration, headers))
+        return
+
+    extra_env = {'WEB_CONCURRENCY': str(args.workers), 'GUNICORN_THREADS': str(args.threads)}
+    for worker_class in [name.strip() for name in args.spawn.split(',') if name.strip()]:
+        try:
+            process = spawn_gunicorn(worker_class, args.port, extra_env)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            continue
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            run_load(base_url, paths, args.concurrency, args.warmup, headers)
+            print_result(worker_class, run_load(base_url, paths, args.concurrency, args.duration, headers))
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
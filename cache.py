@@ -0,0 +1,162 @@
+# Foydalanuvchi javoblari cache'i (jarayon ichidagi LRU yoki Redis)
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from logger import get_logger
+
+try:
+    import redis
+except ImportError:  # redis ixtiyoriy, faqat RESPONSE_CACHE_BACKEND=redis uchun kerak
+    redis = None
+
+logger = get_logger(__name__)
+
+
+class LocalLRUCache:
+    """Jarayon ichidagi LRU cache (umumiy hajmi baytlarda cheklangan)"""
+
+    backend = 'local'
+
+    def __init__(self, max_bytes, default_ttl):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_size(self, key, value):
+        return len(key) + len(value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._bytes -= self._entry_size(key, value)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._entry_size(key, old[0])
+            self._entries[key] = (value, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, (old_value, _) = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_key, old_value)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class RedisCache:
+    """Worker'lar o'rtasida umumiy cache (Redis yoki mos server: Valkey, KeyDB)"""
+
+    backend = 'redis'
+
+    def __init__(self, url, default_ttl):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis uchun 'redis' paketi o'rnatilmagan")
+        self.default_ttl = default_ttl
+        # Cache ishlamasa so'rov kutib qolmasligi uchun qisqa timeout
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.errors = 0
+
+    def get(self, key):
+        try:
+            return self._client.get(key)
+        except redis.RedisError as e:
+            self.errors += 1
+            logger.warning("⚠️ Redis cache o'qishda xatolik: %s", e)
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            self._client.set(key, value, ex=ttl or self.default_ttl)
+        except redis.RedisError as e:
+            self.errors += 1
+            logger.warning("⚠️ Redis cache yozishda xatolik: %s", e)
+
+    def stats(self):
+        return {'backend': self.backend, 'errors': self.errors}
+
+
+class NullCache:
+    """Cache o'chirilgan (RESPONSE_CACHE_BACKEND=none)"""
+
+    backend = 'none'
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def stats(self):
+        return {'backend': self.backend}
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def _create_cache():
+    backend = Config.RESPONSE_CACHE_BACKEND
+    if backend == 'redis':
+        return RedisCache(Config.REDIS_URL, Config.RESPONSE_CACHE_TTL)
+    if backend == 'none':
+        return NullCache()
+    return LocalLRUCache(Config.RESPONSE_CACHE_MAX_BYTES, Config.RESPONSE_CACHE_TTL)
+
+
+def get_response_cache():
+    """Javob cache'ini olish (har bir jarayon uchun bitta, fork'dan keyin qayta yaratiladi)"""
+    global _cache, _cache_pid
+    pid = os.getpid()
+    if _cache is None or _cache_pid != pid:
+        with _cache_lock:
+            if _cache is None or _cache_pid != pid:
+                try:
+                    _cache = _create_cache()
+                except Exception as e:
+                    logger.error("❌ Javob cache'ini yaratishda xatolik, cache o'chirildi: %s", e)
+                    _cache = NullCache()
+                _cache_pid = pid
+    return _cache
+
+
+def make_cache_key(user_id, endpoint, params, *versions):
+    """(user_id, endpoint, params, versiyalar) bo'yicha cache kaliti"""
+    params_part = '&'.join(f"{key}={value}" for key, value in sorted(params))
+    params_hash = hashlib.sha1(params_part.encode()).hexdigest()[:16]
+    return f"balansai:resp:{user_id}:{endpoint}:{':'.join(str(version) for version in versions)}:{params_hash}"
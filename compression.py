@@ -0,0 +1,261 @@
+# Javoblarni siqish (brotli/gzip) va oldindan siqilgan static fayllar
+#
+#   python compression.py                 # static/ dagi js/css/svg uchun .br va .gz variantlarini yaratish
+#   python compression.py --force         # hammasini qayta siqish
+import argparse
+import gzip
+import mimetypes
+import os
+import threading
+import time
+
+from werkzeug.security import safe_join
+
+from config import Config
+from logger import get_logger
+
+try:
+    import brotli
+except ImportError:  # brotli ixtiyoriy, bo'lmasa faqat gzip ishlatiladi
+    brotli = None
+
+logger = get_logger(__name__)
+
+# Static variantlar: (Content-Encoding, fayl kengaytmasi)
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+PRECOMPRESS_EXTENSIONS = ('.js', '.css', '.svg', '.html', '.json', '.txt')
+
+
+def supported_encodings():
+    """Server qo'llab-quvvatlaydigan kodlashlar (afzallik tartibida)"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding header'ini {kodlash: q} ko'rinishiga keltirish"""
+    weights = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    return weights
+
+
+def choose_encoding(header, available=None):
+    """Mijoz qabul qiladigan eng yaxshi kodlash (yoki None)"""
+    weights = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in available or supported_encodings():
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_bytes(data, encoding, level=None):
+    """Ma'lumotni berilgan kodlash bilan siqish"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY if level is None else level)
+    # mtime=0: bir xil body uchun bir xil natija
+    return gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+def _add_vary(response, value):
+    vary = response.vary
+    if value not in vary:
+        vary.add(value)
+
+
+class CompressionStats:
+    """Endpoint bo'yicha siqish statistikasi (CPU vaqti va tejalgan baytlar)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, encoding, size_in, size_out, duration_ms):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint or '-', {
+                'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'encodings': {}
+            })
+            entry['responses'] += 1
+            entry['bytes_in'] += size_in
+            entry['bytes_out'] += size_out
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['encodings'][encoding] = entry['encodings'].get(encoding, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, entry in self._endpoints.items():
+                endpoints[endpoint] = dict(
+                    entry,
+                    encodings=dict(entry['encodings']),
+                    total_ms=round(entry['total_ms'], 3),
+                    max_ms=round(entry['max_ms'], 3),
+                    avg_ms=round(entry['total_ms'] / entry['responses'], 3),
+                    ratio=round(entry['bytes_out'] / entry['bytes_in'], 3) if entry['bytes_in'] else None,
+                )
+        return {
+            'encodings': list(supported_encodings()),
+            'min_size': Config.COMPRESS_MIN_SIZE,
+            'endpoints': endpoints,
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def compress_response(response, request):
+    """
+    JSON/HTML/CSS/JS javoblarini COMPRESS_MIN_SIZE dan katta bo'lsa siqish.
+    Streaming va fayl javoblari (direct_passthrough) o'tkazib yuboriladi.
+    """
+    if not Config.COMPRESS_ENABLED or response.mimetype not in Config.COMPRESS_MIMETYPES:
+        return response
+    _add_vary(response, 'Accept-Encoding')
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or request.method == 'HEAD'):
+        return response
+
+    data = response.get_data()
+    if len(data) < Config.COMPRESS_MIN_SIZE:
+        return response
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    started = time.perf_counter()
+    compressed = compress_bytes(data, encoding)
+    duration_ms = (time.perf_counter() - started) * 1000
+    compression_stats.record(request.endpoint, encoding, len(data), len(compressed), duration_ms)
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # Siqilgan body boshqa baytlar: strong ETag weak'ga aylanadi (If-None-Match weak solishtiriladi)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    response.headers.add('Server-Timing', f'compress;dur={duration_ms:.2f};desc="{encoding} {len(data)}>{len(compressed)}"')
+    return response
+
+
+def precompressed_variant(static_folder, filename, accept_encoding):
+    """Mos oldindan siqilgan fayl: (kodlash, nisbiy yo'l) yoki None (manbadan eski bo'lsa ishlatilmaydi)"""
+    source_path = safe_join(static_folder, filename)
+    if source_path is None:
+        return None
+    try:
+        source_mtime = os.stat(source_path).st_mtime
+    except (OSError, ValueError):
+        return None
+    # Fayllar build vaqtida yaratilgan, serverda brotli o'rnatilmagan bo'lsa ham .br yuboriladi
+    weights = parse_accept_encoding(accept_encoding)
+    for encoding, suffix in STATIC_ENCODINGS:
+        if weights.get(encoding, weights.get('*', 0.0)) <= 0:
+            continue
+        try:
+            if os.stat(source_path + suffix).st_mtime >= source_mtime:
+                return encoding, filename + suffix
+        except OSError:
+            continue
+    return None
+
+
+def init_compression(app):
+    """Flask ilovasiga siqishni ulash (after_request va static fayl variantlari)"""
+    from flask import request, send_from_directory
+
+    @app.after_request
+    def compress_after_request(response):
+        """Javobni siqish (log_request'dan oldin ishlaydi)"""
+        return compress_response(response, request)
+
+    static_view = app.view_functions.get('static')
+    if static_view is None:
+        return
+
+    def static_with_precompressed(filename):
+        """Static fayl: .br/.gz varianti bo'lsa o'shani yuborish"""
+        variant = None
+        if Config.COMPRESS_ENABLED and filename.endswith(PRECOMPRESS_EXTENSIONS):
+            variant = precompressed_variant(app.static_folder, filename, request.headers.get('Accept-Encoding'))
+        if variant is None:
+            response = static_view(filename=filename)
+            if filename.endswith(PRECOMPRESS_EXTENSIONS):
+                _add_vary(response, 'Accept-Encoding')
+            return response
+        encoding, variant_name = variant
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(
+            app.static_folder, variant_name, mimetype=mimetype,
+            max_age=app.get_send_file_max_age(filename)
+        )
+        response.headers['Content-Encoding'] = encoding
+        _add_vary(response, 'Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = static_with_precompressed
+
+
+def precompress_static(static_folder, force=False, min_size=None):
+    """static/ dagi matnli fayllar uchun .br (brotli 11) va .gz (gzip 9) variantlarini yaratish"""
+    min_size = Config.COMPRESS_MIN_SIZE if min_size is None else min_size
+    encodings = [(encoding, suffix) for encoding, suffix in STATIC_ENCODINGS if encoding in supported_encodings()]
+    if brotli is None:
+        logger.warning("⚠️ brotli o'rnatilmagan, faqat .gz variantlari yaratiladi")
+    written = skipped = 0
+    for root, _, files in os.walk(static_folder):
+        for name in sorted(files):
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            source_stat = os.stat(path)
+            if source_stat.st_size < min_size:
+                continue
+            data = None
+            for encoding, suffix in encodings:
+                target = path + suffix
+                if not force and os.path.exists(target) and os.stat(target).st_mtime >= source_stat.st_mtime:
+                    skipped += 1
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                compressed = compress_bytes(data, encoding, level=11 if encoding == 'br' else 9)
+                if len(compressed) >= len(data):
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                written += 1
+                logger.info("📦 %s: %d -> %d bayt (%s)", os.path.relpath(target, static_folder),
+                            len(data), len(compressed), encoding)
+    return {'written': written, 'skipped': skipped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static fayllarni oldindan siqish (.br, .gz)")
+    parser.add_argument('--static-folder', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    parser.add_argument('--force', action='store_true', help="Yangi variantlarni ham qayta siqish")
+    args = parser.parse_args()
+    result = precompress_static(args.static_folder, force=args.force)
+    print(f"✅ {result['written']} ta fayl yozildi, {result['skipped']} ta yangi (o'tkazib yuborildi)")
+
+
+if __name__ == '__main__':
+    main()
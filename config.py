@@ -10,6 +10,19 @@ class Config:
     MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'BalansAiBot')
     MYSQL_PORT = int(os.getenv('MYSQL_PORT', 3306))
     
+    # Connection pool konfiguratsiyasi (har bir gunicorn worker o'z pool'iga ega)
+    # DB_MAX_CONNECTIONS - barcha worker'lar uchun umumiy limit, worker'lar soniga bo'linadi
+    WEB_CONCURRENCY = max(1, int(os.getenv('WEB_CONCURRENCY', 1)))
+    DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', 20))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 0)) or max(2, DB_MAX_CONNECTIONS // WEB_CONCURRENCY)
+    DB_POOL_MIN_CACHED = int(os.getenv('DB_POOL_MIN_CACHED', min(2, DB_POOL_MAX)))
+    DB_POOL_MAX_CACHED = int(os.getenv('DB_POOL_MAX_CACHED', DB_POOL_MAX))
+    DB_POOL_IDLE_PING = int(os.getenv('DB_POOL_IDLE_PING', 30))  # Shuncha soniya bo'sh turgan connection ping qilinadi
+    DB_POOL_SLOW_WAIT_MS = int(os.getenv('DB_POOL_SLOW_WAIT_MS', 100))  # Bundan uzoq kutish log'ga yoziladi
+    DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 5))
+    DB_READ_TIMEOUT = int(os.getenv('DB_READ_TIMEOUT', 10))
+    DB_WRITE_TIMEOUT = int(os.getenv('DB_WRITE_TIMEOUT', 10))
+    
     # Flask konfiguratsiyasi
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here-change-in-production')
     # Development uchun default True, production'da .env orqali False qiling
@@ -17,7 +30,54 @@ class Config:
     # Local development uchun True qiling
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     
+    # Agregat jadvali bo'lmaganda kunlik summalar qanday hisoblanadi:
+    # sql - GROUP BY DATE(created_at), stream - index tartibida o'qib Python'da bir o'tishda
+    TREND_BUCKETING = os.getenv('TREND_BUCKETING', 'sql').lower()
+    
+    # Foydalanuvchi javoblari cache'i: local (jarayon ichidagi LRU), redis yoki none
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'local').lower()
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 32 MB
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))  # Bot to'g'ridan-to'g'ri yozgan o'zgarishlar uchun
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Javoblarni siqish (brotli bo'lmasa gzip); COMPRESS_MIN_SIZE dan kichik javoblar siqilmaydi
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # baytlarda
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))  # 11 juda sekin, faqat static uchun
+    COMPRESS_MIMETYPES = frozenset(os.getenv(
+        'COMPRESS_MIMETYPES',
+        'application/json,text/html,text/css,text/javascript,application/javascript,image/svg+xml,text/plain'
+    ).split(','))
+    
+    # /api/batch: bitta so'rovdagi ichki GET so'rovlari soni
+    BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 20))
+    
+    # Telegram'ga eksport navbati (fayllar diskda, yuborish fonda)
+    TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')  # test uchun lokal stub
+    EXPORT_JOBS_DIR = os.getenv('EXPORT_JOBS_DIR', os.path.join(os.getenv('TMPDIR', '/tmp'), 'balansai-export-jobs'))
+    EXPORT_JOB_WORKERS = int(os.getenv('EXPORT_JOB_WORKERS', 2))  # har bir process'da
+    EXPORT_JOB_MAX_ATTEMPTS = int(os.getenv('EXPORT_JOB_MAX_ATTEMPTS', 5))
+    EXPORT_JOB_BACKOFF = float(os.getenv('EXPORT_JOB_BACKOFF', 2))  # soniya, har urinishda 2 barobar
+    EXPORT_JOB_BACKOFF_MAX = float(os.getenv('EXPORT_JOB_BACKOFF_MAX', 300))
+    EXPORT_JOB_TIMEOUT = int(os.getenv('EXPORT_JOB_TIMEOUT', 30))  # Telegram so'rovi timeout'i
+    EXPORT_JOB_POLL_INTERVAL = float(os.getenv('EXPORT_JOB_POLL_INTERVAL', 5))
+    EXPORT_JOB_RETENTION = int(os.getenv('EXPORT_JOB_RETENTION', 3600))  # tugagan job holati shuncha saqlanadi
+    EXPORT_MAX_UPLOAD_BYTES = int(os.getenv('EXPORT_MAX_UPLOAD_BYTES', 50 * 1024 * 1024))  # Bot API limiti
+    
+    # Admin endpoint'lar uchun token (bo'sh bo'lsa admin endpoint'lar o'chiq)
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    
     # Telegram Mini App konfiguratsiyasi
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '8087310424:AAGn99-GObyu8cU7ADPNTt950K3scdtGXUQ')
     TELEGRAM_BOT_USERNAME = os.getenv('TELEGRAM_BOT_USERNAME', 'BalansAiBot')  # Bot username (@username)
-
+    
+    # init_data validatsiyasi cache'i (hash bo'yicha, auth_date muddatidan oshmaydi)
+    TELEGRAM_INIT_CACHE_SIZE = int(os.getenv('TELEGRAM_INIT_CACHE_SIZE', 4096))
+    TELEGRAM_INIT_CACHE_TTL = int(os.getenv('TELEGRAM_INIT_CACHE_TTL', 3600))  # 1 soat
+    TELEGRAM_AUTH_MAX_AGE = int(os.getenv('TELEGRAM_AUTH_MAX_AGE', 86400))  # 24 soat
+    
+    # Logging konfiguratsiyasi
+    # LOG_LEVEL: DEBUG, INFO, WARNING, ERROR (default: DEBUG mode'da DEBUG, aks holda INFO)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()  # text yoki json
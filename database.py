@@ -1,11 +1,157 @@
 # Database connection va helper funksiyalar
 import pymysql
 from dbutils.pooled_db import PooledDB
+from dbutils.steady_db import SteadyDBConnection
 from config import Config
 from datetime import datetime, timedelta, date, time
 from decimal import Decimal
 from typing import Optional, List, Dict, Any
+from logger import get_logger
+from models import TransactionCursor, SSTransactionCursor, TRANSACTION_COLUMNS
+import contextvars
 import threading
+import time as time_module
+import base64
+import hashlib
+import json
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ixtiyoriy, bo'lmasa oddiy Python yo'li ishlatiladi
+    np = None
+
+logger = get_logger(__name__)
+
+# Pool metrikalari (checkout'lar, kutish vaqti, connection almashinuvi)
+_POOL_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+class _PoolMetrics:
+    """Connection pool statistikasi (thread-safe hisoblagichlar)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_errors = 0
+        self.waited = 0
+        self.slow_waits = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(_POOL_WAIT_BUCKETS_MS) + 1)
+        self.created = 0
+        self.closed = 0
+        self.idle_pings = 0
+        self.idle_ping_failures = 0
+
+    def record_checkout(self, wait_ms, waited):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            if wait_ms > self.wait_max_ms:
+                self.wait_max_ms = wait_ms
+            if waited:
+                self.waited += 1
+            if wait_ms >= Config.DB_POOL_SLOW_WAIT_MS:
+                self.slow_waits += 1
+            for index, bound in enumerate(_POOL_WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.wait_buckets[index] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            labels = ['le_%dms' % bound for bound in _POOL_WAIT_BUCKETS_MS] + ['gt_%dms' % _POOL_WAIT_BUCKETS_MS[-1]]
+            return {
+                'checkouts': self.checkouts,
+                'checkout_errors': self.checkout_errors,
+                'waited': self.waited,
+                'slow_waits': self.slow_waits,
+                'wait_avg_ms': round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max_ms, 3),
+                'wait_histogram': dict(zip(labels, self.wait_buckets)),
+                'created': self.created,
+                'closed': self.closed,
+                'idle_pings': self.idle_pings,
+                'idle_ping_failures': self.idle_ping_failures,
+            }
+
+_pool_metrics = _PoolMetrics()
+
+class _SteadyConnection(SteadyDBConnection):
+    """Faqat uzoq bo'sh turgan connection'ni ping qiladi va almashinuvni hisoblaydi"""
+
+    _idle_since = None
+
+    def _create(self):
+        con = super()._create()
+        _pool_metrics.increment('created')
+        return con
+
+    def _close(self):
+        if not self._closed:
+            _pool_metrics.increment('closed')
+        super()._close()
+
+    def _ping_check(self, ping=1, reconnect=True):
+        # Pool har checkout'da ping qiladi, biz faqat idle muddatidan oshganda ruxsat beramiz
+        idle_since = self._idle_since
+        if ping == 1 and idle_since is not None:
+            self._idle_since = None
+            if time_module.monotonic() - idle_since < Config.DB_POOL_IDLE_PING:
+                return True
+            _pool_metrics.increment('idle_pings')
+            alive = super()._ping_check(ping, reconnect)
+            if not alive:
+                _pool_metrics.increment('idle_ping_failures')
+            return alive
+        return super()._ping_check(ping, reconnect)
+
+class _InstrumentedPool(PooledDB):
+    """Kutish vaqti va bo'sh/band connection'larni kuzatadigan PooledDB"""
+
+    def __init__(self, *args, **kwargs):
+        # mincached connection'larni ochish checkout sifatida hisoblanmaydi
+        self._metrics_ready = False
+        super().__init__(*args, **kwargs)
+        self._metrics_ready = True
+
+    def steady_connection(self):
+        return _SteadyConnection(
+            self._creator, self._maxusage, self._setsession,
+            self._failures, self._ping, True, *self._args, **self._kwargs)
+
+    def connection(self, shareable=False):
+        if not self._metrics_ready:
+            return super().connection(shareable)
+        waited = bool(self._maxconnections and self._connections >= self._maxconnections)
+        started = time_module.perf_counter()
+        try:
+            con = super().connection(shareable)
+        except Exception:
+            _pool_metrics.increment('checkout_errors')
+            raise
+        wait_ms = (time_module.perf_counter() - started) * 1000
+        _pool_metrics.record_checkout(wait_ms, waited)
+        if wait_ms >= Config.DB_POOL_SLOW_WAIT_MS:
+            logger.warning(
+                "⚠️ Connection pool'dan connection olish %.1f ms kutdi (band: %s/%s)",
+                wait_ms, self._connections, self._maxconnections
+            )
+        return con
+
+    def cache(self, con):
+        con._idle_since = time_module.monotonic()
+        super().cache(con)
+
+    def stats(self):
+        """Band va bo'sh connection'lar soni"""
+        with self._lock:
+            return {'in_use': self._connections, 'idle': len(self._idle_cache)}
 
 # Connection Pool yaratish (bitta marta)
 _pool = None
@@ -18,16 +164,16 @@ def _get_pool():
         with _pool_lock:
             if _pool is None:
                 try:
-                    _pool = PooledDB(
+                    _pool = _InstrumentedPool(
                         creator=pymysql,
-                        maxconnections=20,  # Maksimal connectionlar soni
-                        mincached=5,  # Minimal cache qilingan connectionlar
-                        maxcached=10,  # Maksimal cache qilingan connectionlar
-                        maxshared=10,  # Maksimal shared connectionlar
+                        maxconnections=Config.DB_POOL_MAX,  # Worker uchun maksimal connectionlar soni
+                        mincached=Config.DB_POOL_MIN_CACHED,  # Minimal cache qilingan connectionlar
+                        maxcached=Config.DB_POOL_MAX_CACHED,  # Maksimal cache qilingan connectionlar
+                        maxshared=0,  # PyMySQL connection'larni thread'lar o'rtasida bo'lishib bo'lmaydi
                         blocking=True,  # Connection kutish
                         maxusage=None,  # Har bir connection necha marta ishlatilishi mumkin
                         setsession=[],  # Session sozlamalari
-                        ping=1,  # Connection'ni tekshirish (1 = har bir ishlatishdan oldin)
+                        ping=1,  # Checkout'da tekshirish, lekin faqat DB_POOL_IDLE_PING dan ko'p bo'sh turgan bo'lsa
                         host=Config.MYSQL_HOST,
                         user=Config.MYSQL_USER,
                         password=Config.MYSQL_PASSWORD,
@@ -35,17 +181,119 @@ def _get_pool():
                         port=Config.MYSQL_PORT,
                         cursorclass=pymysql.cursors.DictCursor,
                         charset='utf8mb4',
-                        connect_timeout=5,
-                        read_timeout=10,
-                        write_timeout=10
+                        connect_timeout=Config.DB_CONNECT_TIMEOUT,
+                        read_timeout=Config.DB_READ_TIMEOUT,
+                        write_timeout=Config.DB_WRITE_TIMEOUT
+                    )
+                    logger.info(
+                        "✅ Connection pool yaratildi (max=%s, min_cached=%s, max_cached=%s)",
+                        Config.DB_POOL_MAX, Config.DB_POOL_MIN_CACHED, Config.DB_POOL_MAX_CACHED
                     )
-                    print("✅ Connection pool yaratildi")
                 except Exception as e:
-                    print(f"❌ Connection pool yaratishda xatolik: {e}")
+                    logger.error("❌ Connection pool yaratishda xatolik: %s", e)
                     raise
     return _pool
 
+def reset_pool_after_fork():
+    """Fork'dan keyin ota process pool'ini tashlab yuborish (gunicorn preload_app uchun)"""
+    global _pool
+    # Socket'lar ota process bilan umumiy, shuning uchun close() chaqirilmaydi
+    _pool = None
+
+def get_pool_stats():
+    """Connection pool metrikalari (admin endpoint uchun)"""
+    stats = {
+        'config': {
+            'max_connections': Config.DB_POOL_MAX,
+            'min_cached': Config.DB_POOL_MIN_CACHED,
+            'max_cached': Config.DB_POOL_MAX_CACHED,
+            'idle_ping_seconds': Config.DB_POOL_IDLE_PING,
+            'workers': Config.WEB_CONCURRENCY,
+        },
+        'in_use': 0,
+        'idle': 0,
+    }
+    pool = _pool
+    if isinstance(pool, _InstrumentedPool):
+        stats.update(pool.stats())
+    stats.update(_pool_metrics.snapshot())
+    return stats
+
+# So'rov doirasidagi connection (Flask before_request/teardown_request ochadi va yopadi)
+_connection_scope = contextvars.ContextVar('balansai_connection_scope', default=None)
+
+class _ConnectionScope:
+    """Bitta so'rov uchun connection (birinchi kerak bo'lganda pool'dan olinadi)"""
+    __slots__ = ('connection', 'degraded_reads')
+
+    def __init__(self):
+        self.connection = None
+        self.degraded_reads = 0
+
+class _ScopedConnection:
+    """Scope connection'i uchun proxy: close() uni pool'ga qaytarmaydi"""
+    __slots__ = ('_connection',)
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def close(self):
+        # Connection scope yopilganda pool'ga qaytariladi
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+def open_connection_scope(connection=None):
+    """Joriy kontekst uchun connection scope ochish (token qaytaradi), connection oldindan berilishi mumkin"""
+    scope = _ConnectionScope()
+    scope.connection = connection
+    return _connection_scope.set(scope)
+
+def close_connection_scope(token):
+    """Connection scope'ni yopish va connection'ni pool'ga qaytarish"""
+    scope = _connection_scope.get()
+    _connection_scope.reset(token)
+    if scope is None or scope.connection is None:
+        return
+    connection = scope.connection
+    scope.connection = None
+    try:
+        # Yakunlanmagan tranzaksiya pool'ga qaytib ketmasin
+        connection.rollback()
+    except Exception as e:
+        logger.warning("⚠️ Scope connection rollback xatosi: %s", e)
+    finally:
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning("⚠️ Scope connection yopishda xatolik: %s", e)
+
+def connection_scope_active():
+    """Joriy kontekstda connection scope ochiqmi"""
+    return _connection_scope.get() is not None
+
+def mark_degraded_read():
+    """O'qish helper'i xatolik tufayli bo'sh/nol qiymat qaytardi (bunday javob cache qilinmaydi)"""
+    scope = _connection_scope.get()
+    if scope is not None:
+        scope.degraded_reads += 1
+
+def degraded_read_count():
+    """Joriy scope'da xatolik bilan tugagan o'qishlar soni (javobdan oldin va keyin solishtiriladi)"""
+    scope = _connection_scope.get()
+    return scope.degraded_reads if scope is not None else 0
+
 def get_db_connection():
+    """MySQL database ulanishini olish (scope bo'lsa undagi connection, bo'lmasa pool'dan)"""
+    scope = _connection_scope.get()
+    if scope is None:
+        return _checkout_connection()
+    if scope.connection is None:
+        scope.connection = _checkout_connection()
+    return _ScopedConnection(scope.connection)
+
+def _checkout_connection():
     """MySQL database ulanishini pool'dan olish (optimallashtirilgan)"""
     try:
         pool = _get_pool()
@@ -54,15 +302,17 @@ def get_db_connection():
     except pymysql.err.OperationalError as e:
         error_msg = str(e)
         if "Access denied" in error_msg:
-            print(f"❌ Database ulanish xatosi: Foydalanuvchi yoki parol noto'g'ri")
-            print(f"   Yoki IP manzilingiz ({Config.MYSQL_HOST}) whitelist'da yo'q")
+            logger.error(
+                "❌ Database ulanish xatosi: Foydalanuvchi yoki parol noto'g'ri. Yoki IP manzilingiz (%s) whitelist'da yo'q",
+                Config.MYSQL_HOST
+            )
         elif "Can't connect" in error_msg:
-            print(f"❌ Database ulanish xatosi: Serverga ulanib bo'lmadi ({Config.MYSQL_HOST}:{Config.MYSQL_PORT})")
+            logger.error("❌ Database ulanish xatosi: Serverga ulanib bo'lmadi (%s:%s)", Config.MYSQL_HOST, Config.MYSQL_PORT)
         else:
-            print(f"❌ Database ulanish xatosi: {error_msg}")
+            logger.error("❌ Database ulanish xatosi: %s", error_msg)
         raise
     except Exception as e:
-        print(f"❌ Database ulanish xatosi: {e}")
+        logger.error("❌ Database ulanish xatosi: %s", e)
         raise
 
 def get_user(user_id):
@@ -73,7 +323,8 @@ def get_user(user_id):
             cursor.execute("SELECT * FROM users WHERE user_id = %s", (user_id,))
             return cursor.fetchone()
     except Exception as e:
-        print(f"❌ Foydalanuvchini olishda xatolik: {e}")
+        logger.error("❌ Foydalanuvchini olishda xatolik: %s", e)
+        mark_degraded_read()
         return None
     finally:
         connection.close()
@@ -104,10 +355,11 @@ def update_user(user_id, name=None, source=None, account_type=None):
             
             query = f"UPDATE users SET {', '.join(updates)} WHERE user_id = %s"
             cursor.execute(query, params)
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return True
     except Exception as e:
-        print(f"❌ Foydalanuvchi ma'lumotlarini yangilashda xatolik: {e}")
+        logger.error("❌ Foydalanuvchi ma'lumotlarini yangilashda xatolik: %s", e)
         connection.rollback()
         return False
     finally:
@@ -140,10 +392,11 @@ def save_initial_balance(user_id, cash_balance=0, card_balance=0):
                     VALUES (%s, 'income', %s, 'boshlang_ich_balans', 'UZS', 'Boshlang''ich balans')
                 """, (user_id, total_balance))
             
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return True
     except Exception as e:
-        print(f"❌ Boshlang'ich balansni saqlashda xatolik: {e}")
+        logger.error("❌ Boshlang'ich balansni saqlashda xatolik: %s", e)
         connection.rollback()
         return False
     finally:
@@ -173,17 +426,50 @@ def save_debt(user_id, person_name, amount, direction, due_date=None):
                 VALUES (%s, 'debt', %s, %s, 'UZS', %s, %s, %s)
             """, (user_id, amount, f'qarz_{direction}', f'Qarz: {person_name}', due_date, direction))
             
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return True
     except Exception as e:
-        print(f"❌ Qarzni saqlashda xatolik: {e}")
+        logger.error("❌ Qarzni saqlashda xatolik: %s", e)
         connection.rollback()
         return False
     finally:
         connection.close()
 
-def get_category_transactions(user_id, category_name, limit=50, offset=0):
-    """Kategoriya bo'yicha tranzaksiyalarni olish"""
+def encode_page_cursor(created_at, row_id):
+    """Keyset pagination uchun opaque cursor yaratish (created_at, id)"""
+    payload = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_page_cursor(page_cursor):
+    """Cursor'ni (created_at, id) ga qaytarish (noto'g'ri bo'lsa ValueError)"""
+    try:
+        padded = page_cursor + '=' * (-len(page_cursor) % 4)
+        created_at_str, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(created_at_str), int(row_id)
+    except Exception:
+        raise ValueError("Noto'g'ri cursor")
+
+def next_page_cursor(rows, limit):
+    """Sahifa to'liq bo'lsa keyingi sahifa uchun cursor (aks holda None)"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_page_cursor(last['created_at'], last['id'])
+
+def _keyset_clause(page_cursor):
+    """
+    (created_at, id) bo'yicha keyingi sahifa sharti.
+    created_at <= X qismi index range scan beradi, qolgani tie-break.
+    """
+    created_at, row_id = decode_page_cursor(page_cursor)
+    return (
+        " AND created_at <= %s AND (created_at < %s OR id < %s)",
+        [created_at, created_at, row_id]
+    )
+
+def get_category_transactions(user_id, category_name, limit=50, offset=0, page_cursor=None):
+    """Kategoriya bo'yicha tranzaksiyalarni olish (offset yoki cursor bilan)"""
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
@@ -196,26 +482,28 @@ def get_category_transactions(user_id, category_name, limit=50, offset=0):
             category_contact = cursor.fetchone()
             
             if category_contact:
-                category_contact_id = category_contact['id']
                 # category_contact_id bo'yicha tranzaksiyalar
-                cursor.execute("""
-                    SELECT * FROM transactions 
-                    WHERE user_id = %s AND category_contact_id = %s
-                    ORDER BY created_at DESC 
-                    LIMIT %s OFFSET %s
-                """, (user_id, category_contact_id, limit, offset))
+                query = "SELECT * FROM transactions WHERE user_id = %s AND category_contact_id = %s"
+                params = [user_id, category_contact['id']]
             else:
                 # category nomi bo'yicha tranzaksiyalar (eski usul)
-                cursor.execute("""
-                    SELECT * FROM transactions 
-                    WHERE user_id = %s AND category = %s
-                    ORDER BY created_at DESC 
-                    LIMIT %s OFFSET %s
-                """, (user_id, category_name, limit, offset))
+                query = "SELECT * FROM transactions WHERE user_id = %s AND category = %s"
+                params = [user_id, category_name]
+            
+            if page_cursor:
+                # Keyset pagination: chuqur sahifalar ham birinchi sahifa narxida
+                clause, clause_params = _keyset_clause(page_cursor)
+                query += clause + " ORDER BY created_at DESC, id DESC LIMIT %s"
+                params.extend(clause_params + [limit])
+            else:
+                query += " ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s"
+                params.extend([limit, offset])
             
+            cursor.execute(query, params)
             return cursor.fetchall()
     except Exception as e:
-        print(f"❌ Kategoriya tranzaksiyalarini olishda xatolik: {e}")
+        logger.error("❌ Kategoriya tranzaksiyalarini olishda xatolik: %s", e)
+        mark_degraded_read()
         return []
     finally:
         connection.close()
@@ -265,7 +553,8 @@ def get_category_details(user_id, category_name):
                 'net_amount': 0
             }
     except Exception as e:
-        print(f"❌ Kategoriya tafsilotlarini olishda xatolik: {e}")
+        logger.error("❌ Kategoriya tafsilotlarini olishda xatolik: %s", e)
+        mark_degraded_read()
         return {
             'transaction_count': 0,
             'total_income': 0,
@@ -285,7 +574,7 @@ def check_registration_complete(user_id):
             user = cursor.fetchone()
             
             if not user:
-                print(f"[DEBUG] User {user_id} topilmadi")
+                logger.debug("User %s topilmadi", user_id)
                 return False
             
             # Asosiy maydonlar to'ldirilganligini tekshirish
@@ -294,22 +583,22 @@ def check_registration_complete(user_id):
             has_account_type = user.get('account_type') and user.get('account_type') != ''
             has_phone = user.get('phone') and user.get('phone') != ''
             
-            print(f"[DEBUG] Registration check for user {user_id}:")
-            print(f"  - name: {has_name} ({user.get('name')})")
-            print(f"  - source: {has_source} ({user.get('source')})")
-            print(f"  - account_type: {has_account_type} ({user.get('account_type')})")
-            print(f"  - phone: {has_phone} ({user.get('phone')})")
+            logger.debug(
+                "Registration check for user %s: name=%s (%s), source=%s (%s), account_type=%s (%s), phone=%s (%s)",
+                user_id, has_name, user.get('name'), has_source, user.get('source'),
+                has_account_type, user.get('account_type'), has_phone, user.get('phone')
+            )
             
             # Agar asosiy maydonlar to'ldirilmagan bo'lsa
             if not (has_name and has_source and has_account_type):
-                print(f"[DEBUG] Asosiy maydonlar to'liq emas")
+                logger.debug("Asosiy maydonlar to'liq emas")
                 return False
             
             # Onboarding yakunlanganligini tekshirish (boshlang'ich balans mavjudligi)
             # Lekin agar phone bo'lsa va asosiy maydonlar to'liq bo'lsa, registration complete deb hisoblaymiz
             # (chunki eski userlar uchun boshlang'ich balans bo'lmasligi mumkin)
             if has_phone and has_name and has_source and has_account_type:
-                print(f"[DEBUG] User {user_id} ro'yxatdan to'liq o'tgan (phone + asosiy maydonlar)")
+                logger.debug("User %s ro'yxatdan to'liq o'tgan (phone + asosiy maydonlar)", user_id)
                 return True
             
             # Agar phone yo'q bo'lsa, boshlang'ich balansni tekshirish
@@ -320,88 +609,906 @@ def check_registration_complete(user_id):
             result = cursor.fetchone()
             has_initial_balance = result.get('count', 0) > 0 if result else False
             
-            print(f"[DEBUG] Has initial balance: {has_initial_balance}")
+            logger.debug("Has initial balance: %s", has_initial_balance)
             
             return has_initial_balance
     except Exception as e:
-        print(f"❌ Registration complete tekshirishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Registration complete tekshirishda xatolik: %s", e)
+        mark_degraded_read()
         return False
     finally:
         connection.close()
 
-# Valyuta kurslari cache (5 daqiqa)
-_currency_cache = {}
-_currency_cache_time = {}
+# ============================================
+# VALYUTA KURSLARI XIZMATI
+# ============================================
+
+_DEFAULT_CURRENCY_RATES = {'UZS': 1.0, 'USD': 12750.0, 'EUR': 13800.0, 'RUB': 135.0, 'TRY': 370.0}
 _CACHE_TTL = 300  # 5 daqiqa
+_REFRESH_INTERVAL = 240  # TTL tugashidan oldin fonda yangilash
 
-def get_currency_rate(currency_code='UZS'):
-    """Valyuta kursini olish (cache bilan optimallashtirilgan)"""
-    # Cache tekshirish
-    import time
-    current_time = time.time()
+_NUMPY_MIN_ROWS = 256  # Kichik ro'yxatlarda NumPy overhead foydadan katta
+
+class CurrencyRateSnapshot:
+    """Valyuta kurslarining o'zgarmas snapshot'i (versiya va kurslar massivi bilan)"""
+    __slots__ = ('rates', 'version', 'loaded_at', 'currency_index', 'unknown_index', 'rate_array', 'rate_vector')
     
-    if currency_code in _currency_cache:
-        cache_time = _currency_cache_time.get(currency_code, 0)
-        if current_time - cache_time < _CACHE_TTL:
-            return _currency_cache[currency_code]
+    def __init__(self, rates, loaded_at):
+        self.rates = rates
+        self.loaded_at = loaded_at
+        # Versiya kurslarning o'zidan olinadi, shuning uchun barcha worker'larda bir xil
+        digest = hashlib.sha1(repr(sorted(rates.items())).encode()).hexdigest()
+        self.version = digest[:16]
+        # Valyuta kodi -> indeks; oxirgi indeks noma'lum valyutalar uchun (kurs 1.0)
+        codes = sorted(rates)
+        self.currency_index = {code: i for i, code in enumerate(codes)}
+        self.unknown_index = len(codes)
+        self.rate_array = [rates[code] for code in codes] + [1.0]
+        self.rate_vector = np.array(self.rate_array, dtype=np.float64) if np is not None else None
     
-    # Cache eskirgan yoki yo'q, database'dan olish
+    def rate(self, currency_code):
+        """Valyuta kursi (noma'lum valyuta uchun 1.0)"""
+        return self.rates.get(currency_code, 1.0)
+
+# Joriy snapshot faqat butunlay almashtiriladi, o'qish uchun lock kerak emas
+_rates_snapshot = None
+_rates_refresh_lock = threading.Lock()
+_rates_refresher_pid = None
+
+def _load_currency_rates():
+    """currency_rates jadvalini bitta so'rov bilan yuklash"""
+    import time
+    rates = dict(_DEFAULT_CURRENCY_RATES)
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            cursor.execute("SELECT rate_to_uzs FROM currency_rates WHERE currency_code = %s", (currency_code,))
-            result = cursor.fetchone()
-            if result:
-                rate = float(result['rate_to_uzs'])
-                # Cache'ga saqlash
-                _currency_cache[currency_code] = rate
-                _currency_cache_time[currency_code] = current_time
-                return rate
-            # Agar kurs topilmasa, default qiymat
-            defaults = {'UZS': 1.0, 'USD': 12750.0, 'EUR': 13800.0, 'RUB': 135.0, 'TRY': 370.0}
-            rate = defaults.get(currency_code, 1.0)
-            _currency_cache[currency_code] = rate
-            _currency_cache_time[currency_code] = current_time
-            return rate
-    except Exception as e:
-        print(f"❌ Valyuta kursini olishda xatolik: {e}")
-        defaults = {'UZS': 1.0, 'USD': 12750.0, 'EUR': 13800.0, 'RUB': 135.0, 'TRY': 370.0}
-        rate = defaults.get(currency_code, 1.0)
-        _currency_cache[currency_code] = rate
-        _currency_cache_time[currency_code] = current_time
-        return rate
+            cursor.execute("SELECT currency_code, rate_to_uzs FROM currency_rates")
+            for row in cursor.fetchall():
+                rates[row['currency_code']] = float(row['rate_to_uzs'])
     finally:
         connection.close()
+    return CurrencyRateSnapshot(rates, time.time())
+
+def refresh_currency_rates(wait=True):
+    """Snapshot'ni yangilash (xatolik bo'lsa eski snapshot saqlanadi)"""
+    global _rates_snapshot
+    if not _rates_refresh_lock.acquire(blocking=wait):
+        return _rates_snapshot  # Boshqa thread allaqachon yangilayapti
+    try:
+        _rates_snapshot = _load_currency_rates()
+    except Exception as e:
+        logger.error("❌ Valyuta kurslarini yuklashda xatolik: %s", e)
+        # Eski (yoki default) kurslar keyingi intervalgacha ishlatiladi
+        import time
+        rates = _rates_snapshot.rates if _rates_snapshot is not None else dict(_DEFAULT_CURRENCY_RATES)
+        _rates_snapshot = CurrencyRateSnapshot(rates, time.time())
+    finally:
+        _rates_refresh_lock.release()
+    return _rates_snapshot
+
+def _currency_rate_refresher():
+    """Fon thread: kurslarni TTL tugashidan oldin yangilab turish"""
+    import time
+    while True:
+        refresh_currency_rates()
+        time.sleep(_REFRESH_INTERVAL)
+
+def start_currency_rate_service():
+    """Fon yangilovchini ishga tushirish (fork'dan keyin har bir process'da qayta)"""
+    global _rates_refresher_pid
+    import os
+    pid = os.getpid()
+    if _rates_refresher_pid == pid:
+        return
+    with _rates_refresh_lock:
+        if _rates_refresher_pid == pid:
+            return
+        _rates_refresher_pid = pid
+    thread = threading.Thread(target=_currency_rate_refresher, name='currency-rates', daemon=True)
+    thread.start()
+
+def get_currency_rates_snapshot():
+    """
+    Joriy kurslar snapshot'i (stale-while-revalidate).
+    Faqat hali yuklanmagan process'da bir marta DB ga murojaat qiladi.
+    """
+    import time
+    start_currency_rate_service()
+    snapshot = _rates_snapshot
+    if snapshot is None:
+        return refresh_currency_rates()
+    if time.time() - snapshot.loaded_at > _CACHE_TTL:
+        # Eskirgan snapshot qaytariladi, yangilash fonda
+        threading.Thread(target=refresh_currency_rates, args=(False,), daemon=True).start()
+    return snapshot
+
+def get_currency_rate(currency_code='UZS'):
+    """Valyuta kursini olish (snapshot'dan, so'rov yo'lida DB ga murojaatsiz)"""
+    return get_currency_rates_snapshot().rate(currency_code)
 
 def convert_to_uzs(amount, from_currency):
     """Summani UZS ga konvertatsiya qilish"""
     if from_currency == 'UZS':
         return float(amount)
-    rate = get_currency_rate(from_currency)
+    rate = get_currency_rates_snapshot().rate(from_currency)
     return float(amount) * rate
 
-def get_transactions(user_id, limit=50, offset=0, transaction_type=None):
-    """Tranzaksiyalarni olish (optimallashtirilgan)"""
+def convert_totals_to_uzs(totals, currencies):
+    """
+    Summalar ustunini valyutalar ustuni bo'yicha UZS ga bir o'tishda konvertatsiya qilish.
+    Katta ro'yxatlar uchun NumPy (o'rnatilgan bo'lsa) ishlatiladi.
+    """
+    snapshot = get_currency_rates_snapshot()
+    currency_index = snapshot.currency_index
+    unknown_index = snapshot.unknown_index
+    indexes = [currency_index.get(code, unknown_index) for code in currencies]
+    
+    count = len(indexes)
+    if snapshot.rate_vector is not None and count >= _NUMPY_MIN_ROWS:
+        amounts = np.fromiter(map(float, totals), dtype=np.float64, count=count)
+        rates = snapshot.rate_vector[np.fromiter(indexes, dtype=np.intp, count=count)]
+        return (amounts * rates).tolist()
+    
+    rate_array = snapshot.rate_array
+    return [float(total) * rate_array[i] for total, i in zip(totals, indexes)]
+
+def _rows_to_uzs(rows, total_key='total'):
+    """Guruhlangan qatorlarning summalarini UZS ga konvertatsiya qilish"""
+    return convert_totals_to_uzs([row[total_key] for row in rows], [row['currency'] for row in rows])
+
+# Kategoriyasiz tranzaksiyalar (NULL yoki '') barcha endpoint'larda shu nom bilan ko'rsatiladi
+UNCATEGORIZED = 'Boshqa'
+
+def category_label(category):
+    """Kategoriya nomi (agregatlarda NULL ham '' bo'lib saqlanadi)"""
+    return category or UNCATEGORIZED
+
+# ============================================
+# KUNLIK AGREGATLAR (transaction_daily_rollups)
+# ============================================
+
+DAILY_ROLLUPS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS transaction_daily_rollups (
+        user_id BIGINT NOT NULL,
+        day DATE NOT NULL,
+        transaction_type VARCHAR(20) NOT NULL,
+        currency VARCHAR(10) NOT NULL,
+        category VARCHAR(255) NOT NULL DEFAULT '',
+        tx_count INT UNSIGNED NOT NULL DEFAULT 0,
+        total_amount DECIMAL(20, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, transaction_type, currency, category),
+        KEY idx_rollups_user_type_day (user_id, transaction_type, day)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+USER_BALANCES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS user_balances (
+        user_id BIGINT NOT NULL,
+        currency VARCHAR(10) NOT NULL,
+        income_total DECIMAL(20, 2) NOT NULL DEFAULT 0,
+        expense_total DECIMAL(20, 2) NOT NULL DEFAULT 0,
+        debt_total DECIMAL(20, 2) NOT NULL DEFAULT 0,
+        tx_count INT UNSIGNED NOT NULL DEFAULT 0,
+        income_count INT UNSIGNED NOT NULL DEFAULT 0,
+        expense_count INT UNSIGNED NOT NULL DEFAULT 0,
+        debt_count INT UNSIGNED NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, currency)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+USER_DATA_VERSIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS user_data_versions (
+        user_id BIGINT NOT NULL,
+        version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3),
+        PRIMARY KEY (user_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Eski user_balances jadvaliga tur bo'yicha hisoblagichlarni qo'shish
+USER_BALANCES_COUNT_COLUMNS_SQL = """
+    ALTER TABLE user_balances
+        ADD COLUMN income_count INT UNSIGNED NOT NULL DEFAULT 0 AFTER tx_count,
+        ADD COLUMN expense_count INT UNSIGNED NOT NULL DEFAULT 0 AFTER income_count,
+        ADD COLUMN debt_count INT UNSIGNED NOT NULL DEFAULT 0 AFTER expense_count
+"""
+
+# Agregat jadval to'liq to'ldirilgani va trigger'lar o'rnatilgani belgisi (o'qishlar shundan keyin o'tadi)
+AGGREGATE_STATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS aggregate_state (
+        table_name VARCHAR(64) NOT NULL,
+        ready_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (table_name)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Tranzaksiyaning kunlik agregatga ulushi ({row} - NEW yoki OLD)
+_ROLLUP_KEY_SQL = """
+    user_id = {row}.user_id AND day = DATE({row}.created_at) AND transaction_type = {row}.transaction_type
+    AND currency = {row}.currency AND category = COALESCE({row}.category, '')
+"""
+
+_ROLLUP_ADD_SQL = """
+    INSERT INTO transaction_daily_rollups 
+        (user_id, day, transaction_type, currency, category, tx_count, total_amount)
+    VALUES ({row}.user_id, DATE({row}.created_at), {row}.transaction_type, {row}.currency,
+            COALESCE({row}.category, ''), 1, {row}.amount)
+    ON DUPLICATE KEY UPDATE 
+        tx_count = tx_count + 1,
+        total_amount = total_amount + VALUES(total_amount);
+"""
+
+_ROLLUP_SUBTRACT_SQL = """
+    UPDATE transaction_daily_rollups 
+    SET tx_count = tx_count - LEAST(tx_count, 1), total_amount = total_amount - {row}.amount
+    WHERE """ + _ROLLUP_KEY_SQL + """;
+    DELETE FROM transaction_daily_rollups WHERE """ + _ROLLUP_KEY_SQL + """ AND tx_count = 0;
+"""
+
+# Tranzaksiyaning balans ledgeriga ulushi ({row} - NEW yoki OLD; hisoblagich ustunlari kerak)
+_BALANCE_ADD_SQL = """
+    INSERT INTO user_balances
+        (user_id, currency, income_total, expense_total, debt_total, tx_count,
+         income_count, expense_count, debt_count)
+    VALUES ({row}.user_id, {row}.currency,
+            IF({row}.transaction_type = 'income', {row}.amount, 0),
+            IF({row}.transaction_type = 'expense', {row}.amount, 0),
+            IF({row}.transaction_type = 'debt', {row}.amount, 0),
+            1,
+            IF({row}.transaction_type = 'income', 1, 0),
+            IF({row}.transaction_type = 'expense', 1, 0),
+            IF({row}.transaction_type = 'debt', 1, 0))
+    ON DUPLICATE KEY UPDATE
+        income_total = income_total + VALUES(income_total),
+        expense_total = expense_total + VALUES(expense_total),
+        debt_total = debt_total + VALUES(debt_total),
+        tx_count = tx_count + 1,
+        income_count = income_count + VALUES(income_count),
+        expense_count = expense_count + VALUES(expense_count),
+        debt_count = debt_count + VALUES(debt_count);
+"""
+
+_BALANCE_SUBTRACT_SQL = """
+    UPDATE user_balances
+    SET income_total = income_total - IF({row}.transaction_type = 'income', {row}.amount, 0),
+        expense_total = expense_total - IF({row}.transaction_type = 'expense', {row}.amount, 0),
+        debt_total = debt_total - IF({row}.transaction_type = 'debt', {row}.amount, 0),
+        tx_count = tx_count - LEAST(tx_count, 1),
+        income_count = income_count - LEAST(income_count, IF({row}.transaction_type = 'income', 1, 0)),
+        expense_count = expense_count - LEAST(expense_count, IF({row}.transaction_type = 'expense', 1, 0)),
+        debt_count = debt_count - LEAST(debt_count, IF({row}.transaction_type = 'debt', 1, 0))
+    WHERE user_id = {row}.user_id AND currency = {row}.currency;
+"""
+
+# Tranzaksiya tushgan oy va yil snapshot'larini o'chirish (keyingi so'rov agregatlardan qayta yig'adi)
+_SNAPSHOT_INVALIDATE_SQL = """
+    DELETE FROM report_snapshots
+    WHERE user_id = {row}.user_id AND (
+        (period_type = 'month' AND period_start = DATE({row}.created_at) - INTERVAL (DAYOFMONTH({row}.created_at) - 1) DAY)
+        OR (period_type = 'year' AND period_start = MAKEDATE(YEAR({row}.created_at), 1))
+    );
+"""
+
+# (trigger nomi, hodisa, yangilanadigan jadval, tana) - bot to'g'ridan-to'g'ri yozgan qatorlar ham agregatlarga tushadi
+_TRANSACTION_TRIGGERS = [
+    ('trg_tx_rollups_ai', 'INSERT', 'transaction_daily_rollups', _ROLLUP_ADD_SQL.format(row='NEW')),
+    ('trg_tx_rollups_ad', 'DELETE', 'transaction_daily_rollups', _ROLLUP_SUBTRACT_SQL.format(row='OLD')),
+    ('trg_tx_rollups_au', 'UPDATE', 'transaction_daily_rollups',
+     _ROLLUP_SUBTRACT_SQL.format(row='OLD') + _ROLLUP_ADD_SQL.format(row='NEW')),
+    ('trg_tx_balances_ai', 'INSERT', 'user_balances', _BALANCE_ADD_SQL.format(row='NEW')),
+    ('trg_tx_balances_ad', 'DELETE', 'user_balances', _BALANCE_SUBTRACT_SQL.format(row='OLD')),
+    ('trg_tx_balances_au', 'UPDATE', 'user_balances',
+     _BALANCE_SUBTRACT_SQL.format(row='OLD') + _BALANCE_ADD_SQL.format(row='NEW')),
+    ('trg_tx_snapshots_ai', 'INSERT', 'report_snapshots', _SNAPSHOT_INVALIDATE_SQL.format(row='NEW')),
+    ('trg_tx_snapshots_ad', 'DELETE', 'report_snapshots', _SNAPSHOT_INVALIDATE_SQL.format(row='OLD')),
+    ('trg_tx_snapshots_au', 'UPDATE', 'report_snapshots',
+     _SNAPSHOT_INVALIDATE_SQL.format(row='OLD') + _SNAPSHOT_INVALIDATE_SQL.format(row='NEW')),
+]
+
+# Foydalanuvchi ma'lumotlari versiyasini oshirish ({row} - NEW yoki OLD)
+_DATA_VERSION_BUMP_SQL = """
+    INSERT INTO user_data_versions (user_id, version) VALUES ({row}.user_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+"""
+
+def _data_version_triggers(table, prefix):
+    return [
+        (f'trg_{prefix}_version_ai', 'INSERT', table, _DATA_VERSION_BUMP_SQL.format(row='NEW')),
+        (f'trg_{prefix}_version_ad', 'DELETE', table, _DATA_VERSION_BUMP_SQL.format(row='OLD')),
+        (f'trg_{prefix}_version_au', 'UPDATE', table,
+         _DATA_VERSION_BUMP_SQL.format(row='OLD') + _DATA_VERSION_BUMP_SQL.format(row='NEW')),
+    ]
+
+# (trigger nomi, hodisa, jadval, tana) - bot to'g'ridan-to'g'ri yozganda ham javob cache'i va ETag'lar eskiradi
+_DATA_VERSION_TRIGGERS = (
+    _data_version_triggers('transactions', 'tx') + _data_version_triggers('debts', 'debts')
+    + _data_version_triggers('users', 'users')
+)
+
+# Jadval mavjudligi cache (mavjud bo'lmasa qayta tekshirish oralig'i)
+_table_exists_cache = {}
+_TABLE_RECHECK_TTL = 60  # 1 daqiqa
+
+def _table_exists(cursor, table_name):
+    """Jadval mavjudligini tekshirish (cache bilan)"""
+    import time
+    current_time = time.time()
+    
+    cached = _table_exists_cache.get(table_name)
+    if cached is not None:
+        exists, checked_at = cached
+        if exists or current_time - checked_at < _TABLE_RECHECK_TTL:
+            return exists
+    
+    try:
+        cursor.execute("SHOW TABLES LIKE %s", (table_name,))
+        exists = cursor.fetchone() is not None
+    except Exception as e:
+        logger.error("❌ Jadvalni tekshirishda xatolik (%s): %s", table_name, e)
+        exists = False
+    _table_exists_cache[table_name] = (exists, current_time)
+    return exists
+
+def _column_exists(cursor, table_name, column_name):
+    """Ustun mavjudligini tekshirish (jadval cache'i bilan bir xil qoida)"""
+    import time
+    cache_key = f"{table_name}.{column_name}"
+    current_time = time.time()
+    
+    cached = _table_exists_cache.get(cache_key)
+    if cached is not None:
+        exists, checked_at = cached
+        if exists or current_time - checked_at < _TABLE_RECHECK_TTL:
+            return exists
+    
+    try:
+        cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE %s", (column_name,))
+        exists = cursor.fetchone() is not None
+    except Exception as e:
+        logger.error("❌ Ustunni tekshirishda xatolik (%s): %s", cache_key, e)
+        exists = False
+    _table_exists_cache[cache_key] = (exists, current_time)
+    return exists
+
+def reset_schema_cache():
+    """Jadval/ustun mavjudligi cache'ini tozalash (migratsiyalardan keyin)"""
+    _table_exists_cache.clear()
+
+def assume_tables_missing(*table_names):
+    """Jadvallarni mavjud emas deb hisoblash (fallback so'rovlarni tekshirish uchun)"""
+    for table_name in table_names:
+        _table_exists_cache[table_name] = (False, float('inf'))
+
+def _aggregate_ready(cursor, table_name):
+    """Agregat jadval to'ldirilgan va trigger'lar bilan yangilanib turadimi (aggregate_state belgisi)"""
+    import time
+    cache_key = f"ready:{table_name}"
+    current_time = time.time()
+    
+    cached = _table_exists_cache.get(cache_key)
+    if cached is not None:
+        ready, checked_at = cached
+        if ready or current_time - checked_at < _TABLE_RECHECK_TTL:
+            return ready
+    
+    ready = False
+    if _table_exists(cursor, 'aggregate_state'):
+        try:
+            cursor.execute("SELECT 1 FROM aggregate_state WHERE table_name = %s", (table_name,))
+            ready = cursor.fetchone() is not None
+        except Exception as e:
+            logger.error("❌ Agregat holatini tekshirishda xatolik (%s): %s", table_name, e)
+    _table_exists_cache[cache_key] = (ready, current_time)
+    return ready
+
+def _mark_aggregate_ready(cursor, table_name):
+    """To'liq backfill'dan keyin o'qishlarni agregat jadvalga o'tkazish"""
+    cursor.execute("INSERT IGNORE INTO aggregate_state (table_name) VALUES (%s)", (table_name,))
+    _table_exists_cache[f"ready:{table_name}"] = (True, 0)
+
+def _create_triggers(cursor, triggers):
+    """
+    (nom, hodisa, jadval, tana) trigger'larini yaratish (mavjudlari o'zgartirilmaydi,
+    shuning uchun qayta chaqirilganda yozuvlar o'tkazib yuborilmaydi). TRIGGER huquqi kerak.
+    """
+    cursor.execute("""
+        SELECT TRIGGER_NAME as name FROM information_schema.TRIGGERS 
+        WHERE TRIGGER_SCHEMA = DATABASE()
+    """)
+    existing = {row['name'] for row in cursor.fetchall()}
+    for name, event, table, body in triggers:
+        if name in existing:
+            continue
+        try:
+            cursor.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW BEGIN {body} END")
+        except pymysql.MySQLError as e:
+            logger.error(
+                "❌ %s trigger'ini yaratib bo'lmadi (TRIGGER huquqi yoki log_bin_trust_function_creators kerak): %s",
+                name, e
+            )
+            raise
+        logger.info("🔧 %s.%s trigger'i yaratildi", table, name)
+
+def install_transaction_triggers(cursor, target_table):
+    """target_table'ni yangilaydigan transactions trigger'larini yaratish"""
+    _create_triggers(cursor, [
+        (name, event, 'transactions', body)
+        for name, event, target, body in _TRANSACTION_TRIGGERS if target == target_table
+    ])
+
+def install_data_version_triggers(cursor):
+    """transactions, debts va users o'zgarganda (bot yozgan bo'lsa ham) user_data_versions'ni oshiradigan trigger'lar"""
+    _create_triggers(cursor, _DATA_VERSION_TRIGGERS)
+
+def _rollups_available(cursor):
+    """Kunlik agregatlar jadvalidan o'qish mumkinmi (to'ldirilgan va trigger'lar o'rnatilgan)"""
+    return _table_exists(cursor, 'transaction_daily_rollups') and _aggregate_ready(cursor, 'transaction_daily_rollups')
+
+def _balances_available(cursor):
+    """Balans ledgeridan o'qish mumkinmi (to'ldirilgan va trigger'lar o'rnatilgan)"""
+    return _table_exists(cursor, 'user_balances') and _aggregate_ready(cursor, 'user_balances')
+
+def _balance_counts_available(cursor):
+    """Ledgerda tur bo'yicha tranzaksiya hisoblagichlari bormi"""
+    return _balances_available(cursor) and _column_exists(cursor, 'user_balances', 'income_count')
+
+def _data_versions_available(cursor):
+    """Foydalanuvchi ma'lumotlari versiyasi jadvali mavjudmi"""
+    return _table_exists(cursor, 'user_data_versions')
+
+def bump_user_data_version(connection, user_id):
+    """
+    Foydalanuvchi ma'lumotlari versiyasini oshirish (javob cache'ini bekor qiladi).
+    Yozuv bilan bitta DB tranzaksiyasida, commit'dan oldin chaqiriladi.
+    Alohida cursor ishlatiladi (chaqiruvchining lastrowid/rowcount'i o'zgarmaydi).
+    """
+    with connection.cursor() as cursor:
+        if not _data_versions_available(cursor):
+            return
+        cursor.execute("""
+            INSERT INTO user_data_versions (user_id, version) 
+            VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """, (user_id,))
+
+def get_user_data_version(user_id):
+    """
+    Foydalanuvchi ma'lumotlari versiyasi: {'token', 'updated_at'}.
+    Token oxirgi tranzaksiya id'sini ham o'z ichiga oladi (bot to'g'ridan-to'g'ri yozgan tranzaksiyalar ham sezilsin).
+    Versiya jadvali bo'lmasa None (cache ishlatilmaydi).
+    """
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            if not _data_versions_available(cursor):
+                return None
+            cursor.execute("""
+                SELECT 
+                    v.version,
+                    v.updated_at,
+                    t.id as last_transaction_id,
+                    t.created_at as last_transaction_at
+                FROM (SELECT %s as user_id) u
+                LEFT JOIN user_data_versions v ON v.user_id = u.user_id
+                LEFT JOIN (
+                    SELECT id, created_at, user_id FROM transactions 
+                    WHERE user_id = %s 
+                    ORDER BY created_at DESC, id DESC 
+                    LIMIT 1
+                ) t ON t.user_id = u.user_id
+            """, (user_id, user_id))
+            row = cursor.fetchone() or {}
+            updated_at = max(
+                (value for value in (row.get('updated_at'), row.get('last_transaction_at')) if value is not None),
+                default=None
+            )
+            return {
+                'token': f"{row.get('version') or 0}.{row.get('last_transaction_id') or 0}",
+                'updated_at': updated_at
+            }
+    except Exception as e:
+        logger.error("❌ Ma'lumotlar versiyasini olishda xatolik: %s", e)
+        return None
+    finally:
+        connection.close()
+
+def rebuild_daily_rollups(user_id=None):
+    """
+    Kunlik agregatlarni transactions jadvalidan qayta qurish (backfill).
+    user_id berilmasa barcha foydalanuvchilar uchun. Qayta ishga tushirish xavfsiz.
+    Avval trigger'lar o'rnatiladi (backfill paytidagi yozuvlar ham tushadi), o'qishlar esa
+    faqat to'liq backfill tugagach agregat jadvalga o'tadi; ungacha transactions'dan hisoblanadi.
+    """
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
+            cursor.execute(DAILY_ROLLUPS_TABLE_SQL)
+            cursor.execute(AGGREGATE_STATE_TABLE_SQL)
+            _table_exists_cache['transaction_daily_rollups'] = (True, 0)
+            _table_exists_cache['aggregate_state'] = (True, 0)
+            install_transaction_triggers(cursor, 'transaction_daily_rollups')
+            
+            if user_id is not None:
+                user_ids = [user_id]
+            else:
+                cursor.execute("SELECT DISTINCT user_id FROM transactions")
+                user_ids = [row['user_id'] for row in cursor.fetchall()]
+            
+            rows_written = 0
+            # Snapshot'lar agregatlardan yasalgan: ular ham qayta hisoblanadi
+            snapshots_available = _table_exists(cursor, 'report_snapshots')
+            # Har bir foydalanuvchi alohida DB tranzaksiyasida qayta quriladi (o'quvchilar eski yoki yangi holatni ko'radi).
+            # INSERT ... SELECT foydalanuvchi qatorlarini qulflaydi: parallel yozuvning trigger'i commit'dan keyin qo'shadi
+            for uid in user_ids:
+                cursor.execute("DELETE FROM transaction_daily_rollups WHERE user_id = %s", (uid,))
+                if snapshots_available:
+                    cursor.execute("DELETE FROM report_snapshots WHERE user_id = %s", (uid,))
+                cursor.execute("""
+                    INSERT INTO transaction_daily_rollups 
+                        (user_id, day, transaction_type, currency, category, tx_count, total_amount)
+                    SELECT 
+                        user_id, DATE(created_at), transaction_type, currency, COALESCE(category, ''),
+                        COUNT(*), SUM(amount)
+                    FROM transactions 
+                    WHERE user_id = %s
+                    GROUP BY user_id, DATE(created_at), transaction_type, currency, COALESCE(category, '')
+                """, (uid,))
+                rows_written += cursor.rowcount
+                connection.commit()
+            
+            if user_id is None:
+                _mark_aggregate_ready(cursor, 'transaction_daily_rollups')
+                connection.commit()
+            return {'users': len(user_ids), 'rows': rows_written}
+    except Exception as e:
+        logger.error("❌ Kunlik agregatlarni qayta qurishda xatolik: %s", e)
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+# Valyuta bo'yicha umumiy summalar (user_balances bilan bir xil ustunlar)
+_CURRENCY_TOTALS_SQL = """
+    SELECT 
+        user_id,
+        currency,
+        SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END) as income_total,
+        SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END) as expense_total,
+        SUM(CASE WHEN transaction_type = 'debt' THEN amount ELSE 0 END) as debt_total,
+        COUNT(*) as tx_count,
+        SUM(transaction_type = 'income') as income_count,
+        SUM(transaction_type = 'expense') as expense_count,
+        SUM(transaction_type = 'debt') as debt_count
+    FROM transactions 
+    WHERE user_id = %s
+    GROUP BY user_id, currency
+"""
+
+def _fetch_currency_totals(cursor, user_id):
+    """
+    Foydalanuvchining valyuta bo'yicha umumiy summalari:
+    currency, income_total, expense_total, debt_total, tx_count.
+    Ledger tayyor bo'lsa O(valyutalar), aks holda butun tarix guruhlanadi.
+    """
+    if _balances_available(cursor):
+        cursor.execute("""
+            SELECT currency, income_total, expense_total, debt_total, tx_count
+            FROM user_balances 
+            WHERE user_id = %s
+        """, (user_id,))
+    else:
+        cursor.execute(_CURRENCY_TOTALS_SQL, (user_id,))
+    return cursor.fetchall()
+
+def get_transaction_counts(user_id):
+    """
+    Foydalanuvchi tranzaksiyalari soni: total, income, expense, debt.
+    Ledger hisoblagichlari bo'lsa O(valyutalar), aks holda (user_id, transaction_type) index bo'yicha COUNT.
+    """
+    counts = {'total': 0, 'income': 0, 'expense': 0, 'debt': 0}
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            if _balance_counts_available(cursor):
+                cursor.execute("""
+                    SELECT 
+                        COALESCE(SUM(tx_count), 0) as total,
+                        COALESCE(SUM(income_count), 0) as income,
+                        COALESCE(SUM(expense_count), 0) as expense,
+                        COALESCE(SUM(debt_count), 0) as debt
+                    FROM user_balances 
+                    WHERE user_id = %s
+                """, (user_id,))
+                row = cursor.fetchone() or {}
+                for key in counts:
+                    counts[key] = int(row.get(key) or 0)
+            else:
+                cursor.execute("""
+                    SELECT transaction_type, COUNT(*) as count
+                    FROM transactions 
+                    WHERE user_id = %s
+                    GROUP BY transaction_type
+                """, (user_id,))
+                for row in cursor.fetchall():
+                    count = int(row['count'])
+                    counts['total'] += count
+                    if row['transaction_type'] in counts:
+                        counts[row['transaction_type']] += count
+            return counts
+    except Exception as e:
+        logger.error("❌ Tranzaksiyalar sonini olishda xatolik: %s", e)
+        mark_degraded_read()
+        return counts
+    finally:
+        connection.close()
+
+def check_user_balances(user_id=None, repair=False):
+    """
+    user_balances ledgerini transactions jadvali bilan solishtirish.
+    Farqlar ro'yxatini qaytaradi; repair=True bo'lsa farqli foydalanuvchilar qayta hisoblanadi.
+    repair=True avval trigger'larni o'rnatadi; barcha foydalanuvchilar tekshirilgach o'qishlar ledgerga o'tadi.
+    """
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            if repair:
+                cursor.execute(USER_BALANCES_TABLE_SQL)
+                cursor.execute(AGGREGATE_STATE_TABLE_SQL)
+                _table_exists_cache['user_balances'] = (True, 0)
+                _table_exists_cache['aggregate_state'] = (True, 0)
+                if not _column_exists(cursor, 'user_balances', 'income_count'):
+                    cursor.execute(USER_BALANCES_COUNT_COLUMNS_SQL)
+                    _table_exists_cache['user_balances.income_count'] = (True, 0)
+                # Trigger'lar tekshiruvdan oldin: keyingi yozuvlar ledgerga trigger orqali tushadi,
+                # oldingilari (bot yozgan qatorlar ham) quyida farq sifatida topilib tuzatiladi
+                install_transaction_triggers(cursor, 'user_balances')
+            elif not _table_exists(cursor, 'user_balances'):
+                raise RuntimeError("user_balances jadvali mavjud emas (--repair bilan yarating)")
+            
+            fields = ('income_total', 'expense_total', 'debt_total', 'tx_count')
+            if _column_exists(cursor, 'user_balances', 'income_count'):
+                fields += ('income_count', 'expense_count', 'debt_count')
+            
+            if user_id is not None:
+                user_ids = [user_id]
+            else:
+                cursor.execute("""
+                    SELECT user_id FROM transactions
+                    UNION
+                    SELECT user_id FROM user_balances
+                """)
+                user_ids = [row['user_id'] for row in cursor.fetchall()]
+            
+            drift = []
+            for uid in user_ids:
+                # Ikkala o'qish bitta snapshot'da (parallel yozuvlar soxta farq bermasligi uchun)
+                cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+                cursor.execute(_CURRENCY_TOTALS_SQL, (uid,))
+                expected = {row['currency']: row for row in cursor.fetchall()}
+                cursor.execute(f"""
+                    SELECT currency, {', '.join(fields)}
+                    FROM user_balances 
+                    WHERE user_id = %s
+                """, (uid,))
+                actual = {row['currency']: row for row in cursor.fetchall()}
+                connection.commit()
+                
+                user_drift = []
+                for currency in sorted(set(expected) | set(actual)):
+                    exp_row = expected.get(currency)
+                    act_row = actual.get(currency)
+                    for field in fields:
+                        exp_value = exp_row[field] if exp_row else 0
+                        act_value = act_row[field] if act_row else 0
+                        if Decimal(exp_value) != Decimal(act_value):
+                            user_drift.append({
+                                'user_id': uid,
+                                'currency': currency,
+                                'field': field,
+                                'expected': float(exp_value),
+                                'actual': float(act_value)
+                            })
+                
+                if user_drift and repair:
+                    # INSERT ... SELECT foydalanuvchi qatorlarini qulflaydi, parallel yozuvlar kutadi
+                    cursor.execute("DELETE FROM user_balances WHERE user_id = %s", (uid,))
+                    cursor.execute(f"""
+                        INSERT INTO user_balances 
+                            (user_id, currency, {', '.join(fields)})
+                        SELECT user_id, currency, {', '.join(fields)}
+                        FROM ({_CURRENCY_TOTALS_SQL}) totals
+                    """, (uid,))
+                    connection.commit()
+                drift.extend(user_drift)
+            
+            if repair and user_id is None:
+                _mark_aggregate_ready(cursor, 'user_balances')
+                connection.commit()
+            return drift
+    except Exception as e:
+        logger.error("❌ Balans ledgerini tekshirishda xatolik: %s", e)
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+def _fetch_daily_totals(cursor, user_id, date_from=None, transaction_type=None, date_to=None, lock=False):
+    """
+    Kunlik agregatlarni olish: date, transaction_type, currency, category, count, total.
+    date_to (sana, kiritilmaydi) berilsa oraliq [date_from, date_to) bo'ladi.
+    Agregat jadvali mavjud bo'lsa undan, aks holda transactions jadvalidan guruhlab olinadi.
+    total DOUBLE qilib olinadi (har bir qator uchun Decimal yaratilmaydi).
+    lock=True: agregat qatorlari commit'gacha qulflanadi (parallel yozuv trigger'i snapshot'dan keyin ishlaydi).
+    """
+    conditions = ["user_id = %s"]
+    params = [user_id]
+    
+    if _rollups_available(cursor):
+        if date_from is not None:
+            conditions.append("day >= %s")
+            params.append(date_from.date() if isinstance(date_from, datetime) else date_from)
+        if date_to is not None:
+            conditions.append("day < %s")
+            params.append(date_to)
+        if transaction_type:
+            conditions.append("transaction_type = %s")
+            params.append(transaction_type)
+        cursor.execute(f"""
+            SELECT 
+                day as date,
+                transaction_type,
+                currency,
+                category,
+                tx_count as count,
+                total_amount + 0E0 as total
+            FROM transaction_daily_rollups 
+            WHERE {' AND '.join(conditions)}
+            {'LOCK IN SHARE MODE' if lock else ''}
+        """, params)
+        return cursor.fetchall()
+    
+    if date_from is not None:
+        conditions.append("created_at >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("created_at < %s")
+        params.append(date_to)
+    if transaction_type:
+        conditions.append("transaction_type = %s")
+        params.append(transaction_type)
+    if Config.TREND_BUCKETING == 'stream':
+        return _stream_daily_totals(cursor, conditions, params)
+    cursor.execute(f"""
+        SELECT 
+            DATE(created_at) as date,
+            transaction_type,
+            currency,
+            category,
+            COUNT(*) as count,
+            SUM(amount) + 0E0 as total
+        FROM transactions 
+        WHERE {' AND '.join(conditions)}
+        GROUP BY DATE(created_at), transaction_type, currency, category
+    """, params)
+    return cursor.fetchall()
+
+def _bucket_daily_rows(rows):
+    """
+    created_at bo'yicha tartiblangan (created_at, type, currency, category, amount) qatorlarini
+    kunlik agregatlarga bir o'tishda yig'ish. Xotirada faqat joriy kun turadi.
+    """
+    results = []
+    current_day = None
+    day_end = None
+    buckets = {}
+    for created_at, transaction_type, currency, category, amount in rows:
+        if day_end is None or created_at >= day_end:
+            # Yangi kun: oldingi kun agregatlarini chiqarish
+            for (t_type, t_currency, t_category), (count, total) in buckets.items():
+                results.append({
+                    'date': current_day, 'transaction_type': t_type, 'currency': t_currency,
+                    'category': t_category, 'count': count, 'total': total
+                })
+            buckets = {}
+            current_day = created_at.date()
+            day_end = datetime.combine(current_day, time.min) + timedelta(days=1)
+        key = (transaction_type, currency, category)
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = [1, amount]
+        else:
+            bucket[0] += 1
+            bucket[1] += amount
+    for (t_type, t_currency, t_category), (count, total) in buckets.items():
+        results.append({
+            'date': current_day, 'transaction_type': t_type, 'currency': t_currency,
+            'category': t_category, 'count': count, 'total': total
+        })
+    return results
+
+def _stream_daily_totals(cursor, conditions, params):
+    """
+    Kunlik agregatlarni Python'da hisoblash: DB faqat index tartibidagi qatorlarni beradi
+    (idx_tx_user_created_cover bo'yicha, GROUP BY/vaqtinchalik jadvalsiz), natija bufersiz o'qiladi.
+    """
+    stream = cursor.connection.cursor(pymysql.cursors.SSCursor)
+    try:
+        stream.execute(f"""
+            SELECT created_at, transaction_type, currency, category, amount + 0E0
+            FROM transactions 
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_at
+        """, params)
+        return _bucket_daily_rows(stream.fetchall_unbuffered())
+    finally:
+        stream.close()
+
+def get_transactions(user_id, limit=50, offset=0, transaction_type=None, page_cursor=None):
+    """Tranzaksiyalarni olish (offset yoki keyset cursor bilan), Transaction obyektlari ro'yxati"""
+    connection = get_db_connection()
+    try:
+        # Qatorlar dict o'rniga ixcham Transaction obyektlari sifatida quriladi
+        with connection.cursor(TransactionCursor) as cursor:
             # Faqat kerakli ustunlarni olish (SELECT * o'rniga)
-            columns = "id, user_id, transaction_type, amount, currency, category, description, created_at, due_date, debt_direction"
+            query = f"SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE user_id = %s"
+            params = [user_id]
             if transaction_type:
-                query = f"SELECT {columns} FROM transactions WHERE user_id = %s AND transaction_type = %s ORDER BY created_at DESC LIMIT %s OFFSET %s"
-                cursor.execute(query, (user_id, transaction_type, limit, offset))
+                query += " AND transaction_type = %s"
+                params.append(transaction_type)
+            
+            if page_cursor:
+                # Keyset pagination: o'tkazib yuborilgan qatorlar o'qilmaydi
+                clause, clause_params = _keyset_clause(page_cursor)
+                query += clause + " ORDER BY created_at DESC, id DESC LIMIT %s"
+                params.extend(clause_params + [limit])
             else:
-                query = f"SELECT {columns} FROM transactions WHERE user_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s"
-                cursor.execute(query, (user_id, limit, offset))
+                query += " ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s"
+                params.extend([limit, offset])
+            
+            cursor.execute(query, params)
             return cursor.fetchall()
     except Exception as e:
-        print(f"❌ Tranzaksiyalarni olishda xatolik: {e}")
+        logger.error("❌ Tranzaksiyalarni olishda xatolik: %s", e)
+        mark_degraded_read()
         return []  # Xatolik bo'lsa bo'sh ro'yxat qaytarish
     finally:
         connection.close()
 
+def iter_export_transactions(user_id, date_from=None, date_to=None, category=None, transaction_type=None):
+    """
+    Eksport uchun tranzaksiyalar generatori (SSTransactionCursor, natija bufersiz o'qiladi).
+    Streaming javob so'rov scope'idan uzoq yashashi mumkin, shuning uchun alohida connection olinadi.
+    """
+    conditions = ["user_id = %s"]
+    params = [user_id]
+    if date_from:
+        conditions.append("created_at >= %s")
+        params.append(date_from)
+    if date_to:
+        # date_to kuni ham kiradi
+        conditions.append("created_at < %s")
+        params.append(date_to + timedelta(days=1))
+    if category:
+        conditions.append("category = %s")
+        params.append(category)
+    if transaction_type:
+        conditions.append("transaction_type = %s")
+        params.append(transaction_type)
+    
+    connection = _checkout_connection()
+    try:
+        with connection.cursor(SSTransactionCursor) as cursor:
+            cursor.execute(f"""
+                SELECT {TRANSACTION_COLUMNS} FROM transactions
+                WHERE {' AND '.join(conditions)}
+                ORDER BY created_at DESC, id DESC
+            """, params)
+            for row in cursor.fetchall_unbuffered():
+                yield row
+    finally:
+        connection.close()
+
 def add_transaction(user_id, transaction_type, amount, currency='UZS', category=None, description=None, due_date=None, debt_direction=None):
     """Yangi tranzaksiya qo'shish"""
     connection = get_db_connection()
@@ -411,8 +1518,14 @@ def add_transaction(user_id, transaction_type, amount, currency='UZS', category=
                        (user_id, transaction_type, amount, currency, category, description, due_date, debt_direction, created_at)
                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
             cursor.execute(query, (user_id, transaction_type, amount, currency, category, description, due_date, debt_direction, datetime.now()))
+            transaction_id = cursor.lastrowid
+            bump_user_data_version(connection, user_id)
             connection.commit()
-            return cursor.lastrowid
+            return transaction_id
+    except Exception:
+        # Yarim yozilgan tranzaksiya umumiy connection'da qolib ketmasin
+        connection.rollback()
+        raise
     finally:
         connection.close()
 
@@ -421,32 +1534,17 @@ def get_currency_balances(user_id):
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    currency,
-                    transaction_type,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s 
-                GROUP BY currency, transaction_type
-            """, (user_id,))
-            results = cursor.fetchall()
+            results = _fetch_currency_totals(cursor, user_id)
             
             # Har bir valyuta uchun balans
             currency_balances = {}
             for row in results:
-                currency = row['currency']
-                if currency not in currency_balances:
-                    currency_balances[currency] = 0.0
-                
-                if row['transaction_type'] == 'income':
-                    currency_balances[currency] += float(row['total'])
-                elif row['transaction_type'] == 'expense':
-                    currency_balances[currency] -= float(row['total'])
+                currency_balances[row['currency']] = float(row['income_total']) - float(row['expense_total'])
             
             return currency_balances
     except Exception as e:
-        print(f"❌ Valyuta balanslarini olishda xatolik: {e}")
+        logger.error("❌ Valyuta balanslarini olishda xatolik: %s", e)
+        mark_degraded_read()
         return {}
     finally:
         connection.close()
@@ -456,157 +1554,75 @@ def get_balance_and_statistics(user_id, days=30):
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            # Barcha tranzaksiyalar uchun balans
-            cursor.execute("""
-                SELECT 
-                    transaction_type,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s 
-                GROUP BY transaction_type, currency
-            """, (user_id,))
-            all_results = cursor.fetchall()
+            # Barcha tranzaksiyalar uchun balans (ledger'dan)
+            all_results = _fetch_currency_totals(cursor, user_id)
             
             # Balansni hisoblash va valyuta balanslarini olish
             balance_uzs = 0.0
             currency_balances = {}
-            for row in all_results:
-                currency = row['currency']
-                if currency not in currency_balances:
-                    currency_balances[currency] = 0.0
-                
-                amount = float(row['total'])
-                if row['transaction_type'] == 'income':
-                    balance_uzs += convert_to_uzs(amount, currency)
-                    currency_balances[currency] += amount
-                elif row['transaction_type'] == 'expense':
-                    balance_uzs -= convert_to_uzs(amount, currency)
-                    currency_balances[currency] -= amount
-            
-            # Oxirgi N kun uchun statistika
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    transaction_type,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY transaction_type, currency
-            """, (user_id, date_from))
-            stats_results = cursor.fetchall()
-            
-            income = 0.0
-            expense = 0.0
-            
-            for row in stats_results:
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                if row['transaction_type'] == 'income':
-                    income += amount_uzs
-                elif row['transaction_type'] == 'expense':
-                    expense += amount_uzs
-            
-            return {
-                'balance': balance_uzs,
-                'income': income,
-                'expense': expense,
-                'balance_period': income - expense,
-                'days': days,
-                'currency_balances': currency_balances
-            }
-    except Exception as e:
-        print(f"❌ Balans va statistika olishda xatolik: {e}")
-        return {
-            'balance': 0.0,
-            'income': 0.0,
-            'expense': 0.0,
-            'balance_period': 0.0,
-            'days': days,
-            'currency_balances': {}
-        }
-    finally:
-        connection.close()
-
-def get_balance(user_id):
-    """Foydalanuvchining umumiy balansini hisoblash (barcha tranzaksiyalar bo'yicha)"""
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    transaction_type,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s 
-                GROUP BY transaction_type, currency
-            """, (user_id,))
-            results = cursor.fetchall()
-            
-            # Balansni hisoblash
-            balance_uzs = 0.0
-            for row in results:
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                if row['transaction_type'] == 'income':
-                    balance_uzs += amount_uzs
-                elif row['transaction_type'] == 'expense':
-                    balance_uzs -= amount_uzs
-            
-            return balance_uzs
-    except Exception as e:
-        print(f"❌ Balansni hisoblashda xatolik: {e}")
-        return 0.0  # Xatolik bo'lsa 0 qaytarish
-    finally:
-        connection.close()
-
-def get_statistics(user_id, days=30):
-    """Statistika olish (oxirgi N kun uchun)"""
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            # Sana hisoblashni to'g'rilash - timedelta ishlatish
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            
-            cursor.execute("""
-                SELECT 
-                    transaction_type,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY transaction_type, currency
-            """, (user_id, date_from))
-            results = cursor.fetchall()
+            for row in all_results:
+                currency = row['currency']
+                income_total = float(row['income_total'])
+                expense_total = float(row['expense_total'])
+                balance_uzs += convert_to_uzs(income_total, currency) - convert_to_uzs(expense_total, currency)
+                currency_balances[currency] = income_total - expense_total
+            
+            # Oxirgi N kun uchun statistika
+            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+            stats_results = _fetch_daily_totals(cursor, user_id, date_from)
             
             income = 0.0
             expense = 0.0
             
-            for row in results:
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
+            for row, amount_uzs in zip(stats_results, _rows_to_uzs(stats_results)):
                 if row['transaction_type'] == 'income':
                     income += amount_uzs
                 elif row['transaction_type'] == 'expense':
                     expense += amount_uzs
             
             return {
+                'balance': balance_uzs,
                 'income': income,
                 'expense': expense,
-                'balance': income - expense,
-                'days': days
+                'balance_period': income - expense,
+                'days': days,
+                'currency_balances': currency_balances
             }
     except Exception as e:
-        print(f"❌ Statistika olishda xatolik: {e}")
-        # Xatolik bo'lsa ham default qiymatlar qaytarish
+        logger.error("❌ Balans va statistika olishda xatolik: %s", e)
+        mark_degraded_read()
         return {
+            'balance': 0.0,
             'income': 0.0,
             'expense': 0.0,
-            'balance': 0.0,
-            'days': days
+            'balance_period': 0.0,
+            'days': days,
+            'currency_balances': {}
         }
     finally:
         connection.close()
 
+def get_balance(user_id):
+    """Foydalanuvchining umumiy balansini hisoblash (barcha tranzaksiyalar bo'yicha)"""
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            results = _fetch_currency_totals(cursor, user_id)
+            
+            # Balansni hisoblash
+            balance_uzs = 0.0
+            for row in results:
+                balance_uzs += convert_to_uzs(row['income_total'], row['currency'])
+                balance_uzs -= convert_to_uzs(row['expense_total'], row['currency'])
+            
+            return balance_uzs
+    except Exception as e:
+        logger.error("❌ Balansni hisoblashda xatolik: %s", e)
+        mark_degraded_read()
+        return 0.0  # Xatolik bo'lsa 0 qaytarish
+    finally:
+        connection.close()
+
 def get_contacts(user_id):
     """Kontaktlar ro'yxatini olish"""
     connection = get_db_connection()
@@ -653,7 +1669,8 @@ def get_contacts(user_id):
             
             return contacts
     except Exception as e:
-        print(f"❌ Kontaktlarni olishda xatolik: {e}")
+        logger.error("❌ Kontaktlarni olishda xatolik: %s", e)
+        mark_degraded_read()
         return []
     finally:
         connection.close()
@@ -669,7 +1686,8 @@ def get_contact_by_id(user_id, contact_id):
             """, (contact_id, user_id))
             return cursor.fetchone()
     except Exception as e:
-        print(f"❌ Kontaktni olishda xatolik: {e}")
+        logger.error("❌ Kontaktni olishda xatolik: %s", e)
+        mark_degraded_read()
         return None
     finally:
         connection.close()
@@ -696,14 +1714,17 @@ def add_contact(user_id, name, phone=None, notes=None, contact_type='person', ca
                                VALUES (%s, %s, %s, %s, %s)"""
                     cursor.execute(query, (user_id, name, phone, notes, datetime.now()))
                 
+                bump_user_data_version(connection, user_id)
                 connection.commit()
                 return cursor.lastrowid
             except Exception as e:
                 # Agar contacts jadvali yo'q bo'lsa yoki xatolik bo'lsa
-                print(f"[DEBUG] Contacts jadvali topilmadi yoki xatolik: {e}")
+                logger.debug("Contacts jadvali topilmadi yoki xatolik: %s", e)
+                connection.rollback()
                 return None
     except Exception as e:
-        print(f"❌ Kontakt qo'shishda xatolik: {e}")
+        logger.error("❌ Kontakt qo'shishda xatolik: %s", e)
+        connection.rollback()
         return None
     finally:
         connection.close()
@@ -732,10 +1753,12 @@ def update_contact(user_id, contact_id, name=None, phone=None, notes=None):
             params.extend([contact_id, user_id])
             query = f"UPDATE contacts SET {', '.join(updates)} WHERE id = %s AND user_id = %s"
             cursor.execute(query, params)
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return cursor.rowcount > 0
     except Exception as e:
-        print(f"❌ Kontaktni yangilashda xatolik: {e}")
+        logger.error("❌ Kontaktni yangilashda xatolik: %s", e)
+        connection.rollback()
         return False
     finally:
         connection.close()
@@ -749,10 +1772,12 @@ def delete_contact(user_id, contact_id):
                 DELETE FROM contacts 
                 WHERE id = %s AND user_id = %s
             """, (contact_id, user_id))
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return cursor.rowcount > 0
     except Exception as e:
-        print(f"❌ Kontaktni o'chirishda xatolik: {e}")
+        logger.error("❌ Kontaktni o'chirishda xatolik: %s", e)
+        connection.rollback()
         return False
     finally:
         connection.close()
@@ -801,7 +1826,8 @@ def get_debts(user_id, contact_id=None):
                 """, (user_id,))
             return cursor.fetchall()
         except Exception as e2:
-            print(f"❌ Qarzlarni olishda xatolik: {e2}")
+            logger.error("❌ Qarzlarni olishda xatolik: %s", e2)
+            mark_degraded_read()
             return []
     finally:
         connection.close()
@@ -828,7 +1854,8 @@ def get_debt_by_id(user_id, debt_id):
             """, (debt_id, user_id))
             return cursor.fetchone()
         except Exception as e:
-            print(f"❌ Qarzni olishda xatolik: {e}")
+            logger.error("❌ Qarzni olishda xatolik: %s", e)
+            mark_degraded_read()
             return None
     finally:
         connection.close()
@@ -858,10 +1885,12 @@ def add_debt(user_id, debt_type, amount, contact_id=None, person_name=None, curr
                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
                 cursor.execute(query, (user_id, debt_type, amount, 0, contact_name, currency, description, due_date, 'active', datetime.now(), datetime.now()))
             
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return cursor.lastrowid
     except Exception as e:
-        print(f"❌ Qarz qo'shishda xatolik: {e}")
+        logger.error("❌ Qarz qo'shishda xatolik: %s", e)
+        connection.rollback()
         return None
     finally:
         connection.close()
@@ -899,10 +1928,12 @@ def update_debt(user_id, debt_id, amount=None, paid_amount=None, description=Non
             
             query = f"UPDATE debts SET {', '.join(updates)} WHERE id = %s AND user_id = %s"
             cursor.execute(query, params)
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return cursor.rowcount > 0
     except Exception as e:
-        print(f"❌ Qarzni yangilashda xatolik: {e}")
+        logger.error("❌ Qarzni yangilashda xatolik: %s", e)
+        connection.rollback()
         return False
     finally:
         connection.close()
@@ -918,10 +1949,12 @@ def delete_debt(user_id, debt_id):
                 SET status = 'deleted', updated_at = %s
                 WHERE id = %s AND user_id = %s
             """, (datetime.now(), debt_id, user_id))
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return cursor.rowcount > 0
     except Exception as e:
-        print(f"❌ Qarzni o'chirishda xatolik: {e}")
+        logger.error("❌ Qarzni o'chirishda xatolik: %s", e)
+        connection.rollback()
         return False
     finally:
         connection.close()
@@ -959,10 +1992,12 @@ def add_debt_reminder(user_id, debt_id, reminder_date, reminder_time=None, notes
                        (user_id, debt_id, reminder_date, reminder_time, notes, is_completed, created_at)
                        VALUES (%s, %s, %s, %s, %s, FALSE, %s)"""
             cursor.execute(query, (user_id, debt_id, reminder_date, reminder_time, notes, datetime.now()))
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return cursor.lastrowid
     except Exception as e:
-        print(f"❌ Qarz eslatmasi qo'shishda xatolik: {e}")
+        logger.error("❌ Qarz eslatmasi qo'shishda xatolik: %s", e)
+        connection.rollback()
         return None
     finally:
         connection.close()
@@ -976,10 +2011,12 @@ def delete_debt_reminder(user_id, reminder_id):
                 DELETE FROM debt_reminders 
                 WHERE id = %s AND user_id = %s
             """, (reminder_id, user_id))
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return cursor.rowcount > 0
     except Exception as e:
-        print(f"❌ Qarz eslatmasini o'chirishda xatolik: {e}")
+        logger.error("❌ Qarz eslatmasini o'chirishda xatolik: %s", e)
+        connection.rollback()
         return False
     finally:
         connection.close()
@@ -997,7 +2034,8 @@ def get_reminders(user_id, limit=20):
             """, (user_id, limit))
             return cursor.fetchall()
     except Exception as e:
-        print(f"❌ Eslatmalarni olishda xatolik: {e}")
+        logger.error("❌ Eslatmalarni olishda xatolik: %s", e)
+        mark_degraded_read()
         return []
     finally:
         connection.close()
@@ -1012,10 +2050,11 @@ def add_reminder(user_id, title, amount, currency, reminder_date, repeat_interva
                 (user_id, title, amount, currency, reminder_date, repeat_interval, is_completed)
                 VALUES (%s, %s, %s, %s, %s, %s, FALSE)
             """, (user_id, title, amount, currency, reminder_date, repeat_interval))
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return True
     except Exception as e:
-        print(f"❌ Eslatma qo'shishda xatolik: {e}")
+        logger.error("❌ Eslatma qo'shishda xatolik: %s", e)
         connection.rollback()
         return False
     finally:
@@ -1031,10 +2070,11 @@ def update_reminder_status(user_id, reminder_id, is_completed):
                 SET is_completed = %s
                 WHERE id = %s AND user_id = %s
             """, (is_completed, reminder_id, user_id))
+            bump_user_data_version(connection, user_id)
             connection.commit()
             return True
     except Exception as e:
-        print(f"❌ Eslatma yangilashda xatolik: {e}")
+        logger.error("❌ Eslatma yangilashda xatolik: %s", e)
         connection.rollback()
         return False
     finally:
@@ -1048,25 +2088,16 @@ def get_income_trend(user_id, period='auto'):
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            # Avval birinchi tranzaksiya sanasini topamiz
-            cursor.execute("""
-                SELECT MIN(DATE(created_at)) as first_date, MAX(DATE(created_at)) as last_date
-                FROM transactions 
-                WHERE user_id = %s AND transaction_type = 'income'
-            """, (user_id,))
-            date_range = cursor.fetchone()
+            # Kunlik daromad agregatlari (birinchi/oxirgi sana ham shulardan aniqlanadi)
+            results = _fetch_daily_totals(cursor, user_id, transaction_type='income')
             
-            if not date_range or not date_range['first_date']:
+            if not results:
                 return {'period': 'day', 'labels': [], 'data': []}
             
-            first_date = date_range['first_date']
-            last_date = date_range['last_date']
-            # Date obyektlarini tekshirish
-            if isinstance(first_date, datetime):
-                first_date = first_date.date()
-            if isinstance(last_date, datetime):
-                last_date = last_date.date()
-            days_diff = (last_date - first_date).days if first_date and last_date else 0
+            days_list = [row['date'].date() if isinstance(row['date'], datetime) else row['date'] for row in results]
+            first_date = min(days_list)
+            last_date = max(days_list)
+            days_diff = (last_date - first_date).days
             
             # Avtomatik period aniqlash
             if period == 'auto':
@@ -1077,53 +2108,17 @@ def get_income_trend(user_id, period='auto'):
                 else:
                     period = 'year'
             
-            # Period bo'yicha GROUP BY
-            if period == 'day':
-                date_format = '%Y-%m-%d'
-                cursor.execute("""
-                    SELECT 
-                        DATE(created_at) as period_date,
-                        SUM(amount) as total,
-                        currency
-                    FROM transactions 
-                    WHERE user_id = %s AND transaction_type = 'income'
-                    GROUP BY DATE(created_at), currency
-                    ORDER BY period_date ASC
-                """, (user_id,))
-            elif period == 'month':
-                date_format = '%Y-%m'
-                cursor.execute("""
-                    SELECT 
-                        DATE_FORMAT(created_at, '%%Y-%%m') as period_date,
-                        SUM(amount) as total,
-                        currency
-                    FROM transactions 
-                    WHERE user_id = %s AND transaction_type = 'income'
-                    GROUP BY DATE_FORMAT(created_at, '%%Y-%%m'), currency
-                    ORDER BY period_date ASC
-                """, (user_id,))
-            else:  # year
-                date_format = '%Y'
-                cursor.execute("""
-                    SELECT 
-                        YEAR(created_at) as period_date,
-                        SUM(amount) as total,
-                        currency
-                    FROM transactions 
-                    WHERE user_id = %s AND transaction_type = 'income'
-                    GROUP BY YEAR(created_at), currency
-                    ORDER BY period_date ASC
-                """, (user_id,))
-            
-            results = cursor.fetchall()
-            
-            # Ma'lumotlarni guruhlash
+            # Ma'lumotlarni period bo'yicha guruhlash
             period_data = {}
-            for row in results:
-                period_key = str(row['period_date'])
+            for day, row, amount_uzs in zip(days_list, results, _rows_to_uzs(results)):
+                if period == 'day':
+                    period_key = str(day)
+                elif period == 'month':
+                    period_key = str(day)[:7]
+                else:  # year
+                    period_key = str(day.year)
                 if period_key not in period_data:
                     period_data[period_key] = 0.0
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
                 period_data[period_key] += amount_uzs
             
             # Label va data array'larni yaratish
@@ -1136,7 +2131,8 @@ def get_income_trend(user_id, period='auto'):
                 'data': data
             }
     except Exception as e:
-        print(f"❌ Daromad dinamikasini olishda xatolik: {e}")
+        logger.error("❌ Daromad dinamikasini olishda xatolik: %s", e)
+        mark_degraded_read()
         return {'period': 'day', 'labels': [], 'data': []}
     finally:
         connection.close()
@@ -1164,8 +2160,7 @@ def get_top_expense_categories(user_id, limit=5, days=30):
             results = cursor.fetchall()
             
             categories = []
-            for row in results:
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
+            for row, amount_uzs in zip(results, _rows_to_uzs(results)):
                 categories.append({
                     'category': row['category'],
                     'amount': amount_uzs,
@@ -1175,7 +2170,8 @@ def get_top_expense_categories(user_id, limit=5, days=30):
             
             return categories
     except Exception as e:
-        print(f"❌ Top kategoriyalarni olishda xatolik: {e}")
+        logger.error("❌ Top kategoriyalarni olishda xatolik: %s", e)
+        mark_degraded_read()
         return []
     finally:
         connection.close()
@@ -1186,30 +2182,19 @@ def get_expense_by_category(user_id, days=30):
     try:
         with connection.cursor() as cursor:
             date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    COALESCE(category, 'Boshqa') as category,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND transaction_type = 'expense' 
-                    AND created_at >= %s
-                GROUP BY category, currency
-                ORDER BY total DESC
-            """, (user_id, date_from))
-            results = cursor.fetchall()
+            results = _fetch_daily_totals(cursor, user_id, date_from, 'expense')
             
             categories = {}
-            for row in results:
-                category = row['category'] or 'Boshqa'
+            for row, amount_uzs in zip(results, _rows_to_uzs(results)):
+                category = category_label(row['category'])
                 if category not in categories:
                     categories[category] = 0.0
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
                 categories[category] += amount_uzs
             
             return categories
     except Exception as e:
-        print(f"❌ Kategoriya bo'yicha xarajatlarni olishda xatolik: {e}")
+        logger.error("❌ Kategoriya bo'yicha xarajatlarni olishda xatolik: %s", e)
+        mark_degraded_read()
         return {}
     finally:
         connection.close()
@@ -1236,7 +2221,7 @@ def get_subscription_payments(user_id, limit=50, offset=0):
                     return results
             except Exception as e:
                 # Agar subscription_payments jadvali yo'q bo'lsa, transactions'dan olamiz
-                print(f"[DEBUG] subscription_payments jadvali topilmadi, transactions'dan olinmoqda: {e}")
+                logger.debug("subscription_payments jadvali topilmadi, transactions'dan olinmoqda: %s", e)
                 pass
             
             # Transactions jadvalidan tarif to'lovlarini olish
@@ -1270,312 +2255,537 @@ def get_subscription_payments(user_id, limit=50, offset=0):
             
             return cursor.fetchall()
     except Exception as e:
-        print(f"❌ Tarif to'lovlarini olishda xatolik: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Tarif to'lovlarini olishda xatolik: %s", e)
+        mark_degraded_read()
         return []
     finally:
         connection.close()
 
-def get_balance_trend(user_id, days=30):
-    """Balans trendini olish (kunlik)"""
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    DATE(created_at) as date,
-                    transaction_type,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY DATE(created_at), transaction_type, currency
-                ORDER BY date ASC
-            """, (user_id, date_from))
-            results = cursor.fetchall()
-            
-            # Balansni kunlik hisoblash
-            balance_by_date = {}
-            for row in results:
-                date_str = str(row['date'])
-                if date_str not in balance_by_date:
-                    balance_by_date[date_str] = 0.0
-                
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                if row['transaction_type'] == 'income':
-                    balance_by_date[date_str] += amount_uzs
-                elif row['transaction_type'] == 'expense':
-                    balance_by_date[date_str] -= amount_uzs
-            
-            # Cumulative balance
-            cumulative_balance = 0.0
-            trend = []
-            for date_str in sorted(balance_by_date.keys()):
-                cumulative_balance += balance_by_date[date_str]
-                trend.append({
-                    'date': date_str,
-                    'balance': round(cumulative_balance, 2)
-                })
-            
-            return trend
-    except Exception as e:
-        print(f"❌ Balance trend olishda xatolik: {e}")
-        return []
-    finally:
-        connection.close()
+def _empty_statistics_bundle(days):
+    """Statistika paneli uchun bo'sh javob"""
+    return {
+        'income': 0.0,
+        'expense': 0.0,
+        'balance_trend': [],
+        'monthly_comparison': [],
+        'category_breakdown': [],
+        'daily_spending': [],
+        'transaction_count': 0,
+        'average_transaction': 0.0,
+        'currency_distribution': [],
+        'weekly_comparison': [],
+        'days': days
+    }
 
-def get_monthly_comparison(user_id, days=365):
-    """Oylik taqqoslash"""
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    DATE_FORMAT(created_at, '%%Y-%%m') as month,
-                    transaction_type,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY DATE_FORMAT(created_at, '%%Y-%%m'), transaction_type, currency
-                ORDER BY month ASC
-            """, (user_id, date_from))
-            results = cursor.fetchall()
-            
-            monthly_data = {}
-            for row in results:
-                month = row['month']
-                if month not in monthly_data:
-                    monthly_data[month] = {'income': 0.0, 'expense': 0.0}
-                
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                if row['transaction_type'] == 'income':
-                    monthly_data[month]['income'] += amount_uzs
-                elif row['transaction_type'] == 'expense':
-                    monthly_data[month]['expense'] += amount_uzs
-            
-            comparison = []
-            for month in sorted(monthly_data.keys()):
-                comparison.append({
-                    'month': month,
-                    'income': round(monthly_data[month]['income'], 2),
-                    'expense': round(monthly_data[month]['expense'], 2)
-                })
-            
-            return comparison
-    except Exception as e:
-        print(f"❌ Monthly comparison olishda xatolik: {e}")
-        return []
-    finally:
-        connection.close()
+def _build_statistics_bundle(rows, days):
+    """
+    Guruhlangan qatorlardan (kun × tur × valyuta × kategoriya) barcha panellarni hisoblash.
+    Har bir qator: date, transaction_type, currency, category, count, total
+    """
+    income = 0.0
+    expense = 0.0
+    balance_by_date = {}
+    monthly_data = {}
+    categories = {}
+    daily_data = {}
+    currency_totals = {}
+    weekly_data = {}
+    total_count = 0
+    total_amount_uzs = 0.0
+    
+    for row, amount_uzs in zip(rows, _rows_to_uzs(rows)):
+        day = row['date']
+        if isinstance(day, datetime):
+            day = day.date()
+        date_str = str(day)
+        transaction_type = row['transaction_type']
+        currency = row['currency']
+        
+        # Tranzaksiyalar soni va valyuta taqsimoti (barcha turlar)
+        total_count += row['count']
+        total_amount_uzs += amount_uzs
+        currency_totals[currency] = currency_totals.get(currency, 0.0) + amount_uzs
+        
+        # Trend, oylik va haftalik kalitlar barcha turlar uchun yaratiladi
+        month = date_str[:7]
+        iso_year, iso_week, _ = day.isocalendar()
+        week = iso_year * 100 + iso_week  # YEARWEEK(created_at, 1) bilan bir xil
+        
+        if date_str not in balance_by_date:
+            balance_by_date[date_str] = 0.0
+        if month not in monthly_data:
+            monthly_data[month] = {'income': 0.0, 'expense': 0.0}
+        if week not in weekly_data:
+            weekly_data[week] = {'income': 0.0, 'expense': 0.0}
+        
+        if transaction_type == 'income':
+            income += amount_uzs
+            balance_by_date[date_str] += amount_uzs
+            monthly_data[month]['income'] += amount_uzs
+            weekly_data[week]['income'] += amount_uzs
+        elif transaction_type == 'expense':
+            expense += amount_uzs
+            balance_by_date[date_str] -= amount_uzs
+            monthly_data[month]['expense'] += amount_uzs
+            weekly_data[week]['expense'] += amount_uzs
+            daily_data[date_str] = daily_data.get(date_str, 0.0) + amount_uzs
+            category = category_label(row['category'])
+            categories[category] = categories.get(category, 0.0) + amount_uzs
+    
+    # Cumulative balance
+    cumulative_balance = 0.0
+    balance_trend = []
+    for date_str in sorted(balance_by_date.keys()):
+        cumulative_balance += balance_by_date[date_str]
+        balance_trend.append({
+            'date': date_str,
+            'balance': round(cumulative_balance, 2)
+        })
+    
+    monthly_comparison = [
+        {
+            'month': month,
+            'income': round(monthly_data[month]['income'], 2),
+            'expense': round(monthly_data[month]['expense'], 2)
+        }
+        for month in sorted(monthly_data.keys())
+    ]
+    
+    category_breakdown = [
+        {'category': category, 'amount': round(amount, 2)}
+        for category, amount in sorted(categories.items(), key=lambda x: x[1], reverse=True)
+    ]
+    
+    daily_spending = [
+        {'date': date_str, 'amount': round(daily_data[date_str], 2)}
+        for date_str in sorted(daily_data.keys())
+    ]
+    
+    currency_distribution = [
+        {'currency': currency, 'amount': round(amount, 2)}
+        for currency, amount in currency_totals.items()
+    ]
+    
+    # Joriy va o'tgan hafta
+    weeks = sorted(weekly_data.keys())
+    if len(weeks) >= 2:
+        weekly_comparison = [{
+            'week': f'Hafta {weeks[-1]}',
+            'current': round(weekly_data[weeks[-1]]['expense'], 2),
+            'previous': round(weekly_data[weeks[-2]]['expense'], 2)
+        }]
+    elif len(weeks) == 1:
+        weekly_comparison = [{
+            'week': f'Hafta {weeks[0]}',
+            'current': round(weekly_data[weeks[0]]['expense'], 2),
+            'previous': 0.0
+        }]
+    else:
+        weekly_comparison = []
+    
+    average = (total_amount_uzs / total_count) if total_count > 0 else 0.0
+    
+    return {
+        'income': income,
+        'expense': expense,
+        'balance_trend': balance_trend,
+        'monthly_comparison': monthly_comparison,
+        'category_breakdown': category_breakdown,
+        'daily_spending': daily_spending,
+        'transaction_count': total_count,
+        'average_transaction': round(average, 2),
+        'currency_distribution': currency_distribution,
+        'weekly_comparison': weekly_comparison,
+        'days': days
+    }
 
-def get_category_breakdown(user_id, days=30):
-    """Kategoriya bo'yicha taqsimot"""
+def get_statistics_bundle(user_id, days=30):
+    """
+    Statistika sahifasi uchun barcha panellarni bitta so'rov bilan olish
+    (bitta connection, kunlik agregatlar bo'yicha bitta range scan)
+    """
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
             date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    COALESCE(category, 'Boshqa') as category,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND transaction_type = 'expense' 
-                    AND created_at >= %s
-                GROUP BY category, currency
-                ORDER BY total DESC
-            """, (user_id, date_from))
-            results = cursor.fetchall()
-            
-            categories = {}
-            for row in results:
-                category = row['category'] or 'Boshqa'
-                if category not in categories:
-                    categories[category] = 0.0
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                categories[category] += amount_uzs
-            
-            breakdown = []
-            for category, amount in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-                breakdown.append({
-                    'category': category,
-                    'amount': round(amount, 2)
-                })
+            results = _fetch_daily_totals(cursor, user_id, date_from)
             
-            return breakdown
+            return _build_statistics_bundle(results, days)
     except Exception as e:
-        print(f"❌ Category breakdown olishda xatolik: {e}")
-        return []
+        logger.error("❌ Statistika to'plamini olishda xatolik: %s", e)
+        mark_degraded_read()
+        return _empty_statistics_bundle(days)
     finally:
         connection.close()
 
-def get_daily_spending(user_id, days=30):
-    """Kunlik xarajatlar"""
+def get_insight_inputs(user_id, date_from):
+    """
+    Insight'lar uchun ma'lumotlar bitta connection'da: date_from dan kunlik agregatlar,
+    valyuta bo'yicha umumiy summalar (ledger) va faol qarzlar soni
+    """
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+            rows = _fetch_daily_totals(cursor, user_id, date_from)
+            currency_totals = _fetch_currency_totals(cursor, user_id)
             cursor.execute("""
-                SELECT 
-                    DATE(created_at) as date,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND transaction_type = 'expense' 
-                    AND created_at >= %s
-                GROUP BY DATE(created_at), currency
-                ORDER BY date ASC
-            """, (user_id, date_from))
-            results = cursor.fetchall()
-            
-            daily_data = {}
-            for row in results:
-                date_str = str(row['date'])
-                if date_str not in daily_data:
-                    daily_data[date_str] = 0.0
-                
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                daily_data[date_str] += amount_uzs
-            
-            spending = []
-            for date_str in sorted(daily_data.keys()):
-                spending.append({
-                    'date': date_str,
-                    'amount': round(daily_data[date_str], 2)
-                })
+                SELECT COUNT(*) as count FROM debts 
+                WHERE user_id = %s AND status = 'active'
+            """, (user_id,))
+            unpaid_debts = cursor.fetchone()['count']
             
-            return spending
+            return {'rows': rows, 'currency_totals': currency_totals, 'unpaid_debts': int(unpaid_debts)}
     except Exception as e:
-        print(f"❌ Daily spending olishda xatolik: {e}")
-        return []
+        logger.error("❌ Insight ma'lumotlarini olishda xatolik: %s", e)
+        raise
     finally:
         connection.close()
 
-def get_transaction_stats(user_id, days=30):
-    """Tranzaksiyalar soni va o'rtacha summa"""
-    connection = get_db_connection()
+# ============================================
+# DAVRIY HISOBOTLAR (report_snapshots)
+# ============================================
+
+REPORT_SNAPSHOTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS report_snapshots (
+        user_id BIGINT NOT NULL,
+        period_type VARCHAR(10) NOT NULL,
+        period_start DATE NOT NULL,
+        payload MEDIUMTEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, period_type, period_start)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+REPORT_PERIODS = ('week', 'month', 'year')
+# Oy tugagandan keyin shuncha vaqt o'tib yopilgan hisoblanadi (server va DB vaqt zonasi farqi uchun)
+_REPORT_CLOSE_GRACE = timedelta(days=1)
+_REPORT_TRANSACTIONS_LIMIT = 100
+_REPORT_TOP_CATEGORIES = 5
+
+def _report_snapshots_available(cursor):
+    """
+    Hisobot snapshot'larini ishlatish mumkinmi: jadval va uni tozalaydigan trigger'lar o'rnatilgan,
+    snapshot'lar yig'iladigan kunlik agregatlar tayyor
+    """
+    return (
+        _table_exists(cursor, 'report_snapshots') and _aggregate_ready(cursor, 'report_snapshots')
+        and _rollups_available(cursor)
+    )
+
+def enable_report_snapshots(cursor):
+    """
+    report_snapshots jadvali va trigger'larini o'rnatish (har qanday yozuvchining o'zgarishi oy/yil snapshot'ini
+    o'chiradi). Trigger'largacha yozilgan snapshot'lar eskirgan bo'lishi mumkin, ular tozalanadi.
+    """
+    cursor.execute(REPORT_SNAPSHOTS_TABLE_SQL)
+    cursor.execute(AGGREGATE_STATE_TABLE_SQL)
+    _table_exists_cache['report_snapshots'] = (True, 0)
+    _table_exists_cache['aggregate_state'] = (True, 0)
+    if _aggregate_ready(cursor, 'report_snapshots'):
+        return
+    install_transaction_triggers(cursor, 'report_snapshots')
+    cursor.execute("DELETE FROM report_snapshots")
+    _mark_aggregate_ready(cursor, 'report_snapshots')
+
+def _add_months(month_start, months):
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def report_period_range(period, at=None):
+    """
+    Davr chegaralari [start, end) va series granularity.
+    week: at bilan tugaydigan oxirgi 7 kun, month/year: at tushgan kalendar oy/yil.
+    """
+    at = at or date.today()
+    if period == 'week':
+        return at - timedelta(days=6), at + timedelta(days=1), 'day'
+    if period == 'month':
+        start = at.replace(day=1)
+        return start, _add_months(start, 1), 'day'
+    if period == 'year':
+        return date(at.year, 1, 1), date(at.year + 1, 1, 1), 'month'
+    raise ValueError(f"period: {', '.join(REPORT_PERIODS)}")
+
+class _ReportTotals:
+    """Davr agregatlari: (tur, valyuta, kategoriya) -> [soni, summa] va (bucket, tur, valyuta) -> summa"""
+    
+    def __init__(self, granularity):
+        self.granularity = granularity
+        self.totals = {}
+        self.series = {}
+    
+    def _add(self, transaction_type, currency, category, count, total, bucket):
+        key = (transaction_type, currency, category or '')
+        entry = self.totals.get(key)
+        if entry is None:
+            self.totals[key] = [count, total]
+        else:
+            entry[0] += count
+            entry[1] += total
+        # bucket: 'YYYY-MM-DD' yoki 'YYYY-MM'
+        series_key = (bucket[:7] if self.granularity == 'month' else bucket, transaction_type, currency)
+        self.series[series_key] = self.series.get(series_key, 0.0) + total
+    
+    def add_rows(self, rows):
+        """_fetch_daily_totals qatorlarini qo'shish"""
+        for row in rows:
+            day = row['date']
+            if isinstance(day, datetime):
+                day = day.date()
+            self._add(row['transaction_type'], row['currency'], row['category'],
+                      int(row['count']), float(row['total']), day.isoformat())
+    
+    def merge(self, payload):
+        """Snapshot payload'ini qo'shish (totals va series alohida saqlangan)"""
+        for transaction_type, currency, category, count, total in payload['totals']:
+            key = (transaction_type, currency, category)
+            entry = self.totals.setdefault(key, [0, 0.0])
+            entry[0] += count
+            entry[1] += total
+        for bucket, transaction_type, currency, total in payload['series']:
+            series_key = (bucket[:7] if self.granularity == 'month' else bucket, transaction_type, currency)
+            self.series[series_key] = self.series.get(series_key, 0.0) + total
+    
+    def to_payload(self):
+        """Snapshot sifatida saqlanadigan ko'rinish (valyutalar o'zgarmagan, kurs o'qishda qo'llanadi)"""
+        return {
+            'granularity': self.granularity,
+            'totals': [[*key, count, total] for key, (count, total) in sorted(self.totals.items())],
+            'series': [[*key, total] for key, total in sorted(self.series.items())],
+        }
+    
+    def to_report(self):
+        """UZS dagi hisobot maydonlari (reports.js formatida)"""
+        keys = list(self.totals)
+        amounts = convert_totals_to_uzs([self.totals[key][1] for key in keys], [key[1] for key in keys])
+        income = 0.0
+        expense = 0.0
+        transaction_count = 0
+        categories = {}
+        for key, amount_uzs in zip(keys, amounts):
+            transaction_type, _, category = key
+            transaction_count += self.totals[key][0]
+            if transaction_type == 'income':
+                income += amount_uzs
+            elif transaction_type == 'expense':
+                expense += amount_uzs
+                name = category_label(category)
+                categories[name] = categories.get(name, 0.0) + amount_uzs
+        
+        category_list = [
+            {'name': name, 'amount': round(amount, 2)}
+            for name, amount in sorted(categories.items(), key=lambda item: item[1], reverse=True)
+        ]
+        
+        series_keys = list(self.series)
+        series_amounts = convert_totals_to_uzs([self.series[key] for key in series_keys], [key[2] for key in series_keys])
+        buckets = {}
+        for (bucket, transaction_type, _), amount_uzs in zip(series_keys, series_amounts):
+            if transaction_type not in ('income', 'expense'):
+                continue
+            entry = buckets.setdefault(bucket, {'date': bucket, 'income': 0.0, 'expense': 0.0})
+            entry[transaction_type] += amount_uzs
+        series = []
+        for bucket in sorted(buckets):
+            entry = buckets[bucket]
+            series.append({
+                'date': bucket,
+                'income': round(entry['income'], 2),
+                'expense': round(entry['expense'], 2),
+            })
+        
+        return {
+            'totalIncome': round(income, 2),
+            'totalExpense': round(expense, 2),
+            'balance': round(income - expense, 2),
+            'transactionCount': transaction_count,
+            'categories': category_list,
+            'topCategories': category_list[:_REPORT_TOP_CATEGORIES],
+            'granularity': self.granularity,
+            'series': series,
+        }
+
+def _load_report_snapshots(cursor, user_id, period_type, period_starts):
+    """Saqlangan snapshot'lar: {period_start: payload}"""
+    if not period_starts:
+        return {}
+    placeholders = ', '.join(['%s'] * len(period_starts))
+    cursor.execute(f"""
+        SELECT period_start, payload
+        FROM report_snapshots 
+        WHERE user_id = %s AND period_type = %s AND period_start IN ({placeholders})
+    """, [user_id, period_type, *period_starts])
+    return {row['period_start']: json.loads(row['payload']) for row in cursor.fetchall()}
+
+def _save_report_snapshot(cursor, user_id, period_type, period_start, payload):
+    cursor.execute("""
+        INSERT INTO report_snapshots (user_id, period_type, period_start, payload)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE payload = VALUES(payload), created_at = CURRENT_TIMESTAMP
+    """, (user_id, period_type, period_start, json.dumps(payload, separators=(',', ':'), ensure_ascii=False)))
+
+def _month_report_payloads(cursor, user_id, month_starts, store):
+    """
+    Yopilgan oylar payload'lari. Saqlanmaganlari kunlik agregatlardan bitta range so'rov bilan
+    hisoblanadi va (store bo'lsa) snapshot sifatida yoziladi.
+    """
+    payloads = _load_report_snapshots(cursor, user_id, 'month', month_starts) if store else {}
+    missing = [month for month in month_starts if month not in payloads]
+    if not missing:
+        return payloads
+    
+    built = {month: _ReportTotals('day') for month in missing}
+    # Qulflangan o'qish: snapshot commit bo'lguncha shu oylarga yozuv kutadi, keyin trigger snapshot'ni o'chiradi
+    rows = _fetch_daily_totals(cursor, user_id, missing[0], date_to=_add_months(missing[-1], 1), lock=store)
+    for row in rows:
+        day = row['date']
+        totals = built.get(date(day.year, day.month, 1))
+        if totals is not None:
+            totals.add_rows((row,))
+    for month, totals in built.items():
+        payloads[month] = totals.to_payload()
+        if store:
+            _save_report_snapshot(cursor, user_id, 'month', month, payloads[month])
+    return payloads
+
+def _closed_report_payloads(cursor, user_id, start, end, store):
+    """
+    [start, end) oralig'idagi yopilgan oylar (start va end oy boshi) payload'lari.
+    To'liq yillar year snapshot'idan, u yo'q bo'lsa oy snapshot'laridan yig'ilib yoziladi (store bo'lsa).
+    """
+    months = []
+    month = start
+    while month < end:
+        months.append(month)
+        month = _add_months(month, 1)
+    
+    year_starts = [month for month in months if month.month == 1 and _add_months(month, 12) <= end]
+    year_payloads = _load_report_snapshots(cursor, user_id, 'year', year_starts) if store else {}
+    month_payloads = _month_report_payloads(
+        cursor, user_id, [month for month in months if date(month.year, 1, 1) not in year_payloads], store
+    )
+    
+    payloads = list(year_payloads.values())
+    for year_start in year_starts:
+        if year_start in year_payloads:
+            continue
+        totals = _ReportTotals('month')
+        for offset in range(12):
+            totals.merge(month_payloads.pop(_add_months(year_start, offset)))
+        payload = totals.to_payload()
+        payloads.append(payload)
+        if store:
+            _save_report_snapshot(cursor, user_id, 'year', year_start, payload)
+    payloads.extend(month_payloads.values())
+    return payloads
+
+def _report_closed_until(today=None):
+    """Shu sanadan oldingi oylar yopilgan (o'zgarmaydi) hisoblanadi"""
+    return ((today or date.today()) - _REPORT_CLOSE_GRACE).replace(day=1)
+
+def _store_closed_report_payloads(user_id, start, end):
+    """
+    Snapshot'larni o'qish/yozish alohida connection'da (so'rovning umumiy connection'i va uning
+    tranzaksiyasi commit qilinmaydi)
+    """
+    connection = _checkout_connection()
     try:
         with connection.cursor() as cursor:
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as count,
-                    currency,
-                    AVG(amount) as avg_amount
-                FROM transactions 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY currency
-            """, (user_id, date_from))
-            results = cursor.fetchall()
-            
-            total_count = 0
-            total_amount_uzs = 0.0
-            for row in results:
-                total_count += row['count']
-                avg_amount_uzs = convert_to_uzs(row['avg_amount'], row['currency'])
-                total_amount_uzs += avg_amount_uzs * row['count']
-            
-            average = (total_amount_uzs / total_count) if total_count > 0 else 0.0
-            
-            return total_count, round(average, 2)
-    except Exception as e:
-        print(f"❌ Transaction stats olishda xatolik: {e}")
-        return 0, 0.0
+            payloads = _closed_report_payloads(cursor, user_id, start, end, True)
+        connection.commit()
+        return payloads
+    except Exception:
+        connection.rollback()
+        raise
     finally:
         connection.close()
 
-def get_currency_distribution(user_id, days=30):
-    """Valyuta taqsimoti"""
+def get_period_report(user_id, period, at=None):
+    """
+    Davr hisoboti: jami kirim/chiqim, kategoriyalar, top kategoriyalar, series va oxirgi tranzaksiyalar.
+    Yopilgan oy/yillar report_snapshots'dan olinadi, faqat ochiq qism kunlik agregatlardan o'qiladi.
+    """
+    start, end, granularity = report_period_range(period, at)
+    totals = _ReportTotals(granularity)
+    
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY currency
-            """, (user_id, date_from))
-            results = cursor.fetchall()
-            
-            distribution = []
-            for row in results:
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                distribution.append({
-                    'currency': row['currency'],
-                    'amount': round(amount_uzs, 2)
-                })
-            
-            return distribution
+            live_from = start
+            closed_until = _report_closed_until()
+            # Hafta oy chegarasiga to'g'ri kelmaydi: 7 kunlik agregat har doim to'g'ridan-to'g'ri o'qiladi
+            if period != 'week' and start < closed_until:
+                live_from = min(end, closed_until)
+                if _report_snapshots_available(cursor):
+                    payloads = _store_closed_report_payloads(user_id, start, live_from)
+                else:
+                    payloads = _closed_report_payloads(cursor, user_id, start, live_from, False)
+                for payload in payloads:
+                    totals.merge(payload)
+            if live_from < end:
+                totals.add_rows(_fetch_daily_totals(cursor, user_id, live_from, date_to=end))
+        
+        with connection.cursor(TransactionCursor) as cursor:
+            cursor.execute(f"""
+                SELECT {TRANSACTION_COLUMNS} FROM transactions 
+                WHERE user_id = %s AND created_at >= %s AND created_at < %s
+                ORDER BY created_at DESC, id DESC LIMIT %s
+            """, (user_id, start, end, _REPORT_TRANSACTIONS_LIMIT))
+            transactions = cursor.fetchall()
     except Exception as e:
-        print(f"❌ Currency distribution olishda xatolik: {e}")
-        return []
+        logger.error("❌ Davr hisobotini olishda xatolik: %s", e)
+        connection.rollback()
+        raise
     finally:
         connection.close()
+    
+    report = {
+        'period': period,
+        'dateFrom': start.isoformat(),
+        'dateTo': (end - timedelta(days=1)).isoformat(),
+    }
+    report.update(totals.to_report())
+    report['transactions'] = [dict(row.to_dict(), type=row.transaction_type) for row in transactions]
+    return report
 
-def get_weekly_comparison(user_id, days=14):
-    """Haftalik taqqoslash"""
+def build_report_snapshots(user_id=None):
+    """
+    Yopilgan oylar va yillar snapshot'larini oldindan yaratish (backfill yoki oy boshidagi cron).
+    Mavjud snapshot'lar qayta hisoblanmaydi.
+    """
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            date_from = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-            cursor.execute("""
-                SELECT 
-                    YEARWEEK(created_at, 1) as week,
-                    transaction_type,
-                    currency,
-                    SUM(amount) as total
-                FROM transactions 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY YEARWEEK(created_at, 1), transaction_type, currency
-                ORDER BY week ASC
-            """, (user_id, date_from))
-            results = cursor.fetchall()
+            enable_report_snapshots(cursor)
+            connection.commit()
+            # Kunlik agregatlar tayyor bo'lmasa snapshot'lar transactions'dan yig'ilmaydi
+            if not _rollups_available(cursor):
+                raise RuntimeError("Kunlik agregatlar tayyor emas (avval rebuild-rollups)")
             
-            weekly_data = {}
-            for row in results:
-                week = row['week']
-                if week not in weekly_data:
-                    weekly_data[week] = {'income': 0.0, 'expense': 0.0}
-                
-                amount_uzs = convert_to_uzs(row['total'], row['currency'])
-                if row['transaction_type'] == 'income':
-                    weekly_data[week]['income'] += amount_uzs
-                elif row['transaction_type'] == 'expense':
-                    weekly_data[week]['expense'] += amount_uzs
-            
-            # Joriy va o'tgan hafta
-            weeks = sorted(weekly_data.keys())
-            if len(weeks) >= 2:
-                current_week = weeks[-1]
-                previous_week = weeks[-2]
-                comparison = [
-                    {
-                        'week': f'Hafta {current_week}',
-                        'current': round(weekly_data[current_week]['expense'], 2),
-                        'previous': round(weekly_data[previous_week]['expense'], 2)
-                    }
-                ]
-            elif len(weeks) == 1:
-                comparison = [
-                    {
-                        'week': f'Hafta {weeks[0]}',
-                        'current': round(weekly_data[weeks[0]]['expense'], 2),
-                        'previous': 0.0
-                    }
-                ]
+            if user_id is not None:
+                cursor.execute("""
+                    SELECT user_id, MIN(created_at) as first_at FROM transactions 
+                    WHERE user_id = %s GROUP BY user_id
+                """, (user_id,))
             else:
-                comparison = []
-            
-            return comparison
+                cursor.execute("SELECT user_id, MIN(created_at) as first_at FROM transactions GROUP BY user_id")
+            users = cursor.fetchall()
+            
+            closed_until = _report_closed_until()
+            periods = 0
+            for row in users:
+                first_month = row['first_at'].date().replace(day=1)
+                if first_month >= closed_until:
+                    continue
+                # Yil boshidan: to'liq yillar year snapshot'iga yig'iladi
+                periods += len(_closed_report_payloads(
+                    cursor, row['user_id'], date(first_month.year, 1, 1), closed_until, True
+                ))
+                connection.commit()
+            return {'users': len(users), 'periods': periods}
     except Exception as e:
-        print(f"❌ Weekly comparison olishda xatolik: {e}")
-        return []
+        logger.error("❌ Hisobot snapshot'larini yaratishda xatolik: %s", e)
+        connection.rollback()
+        raise
     finally:
         connection.close()
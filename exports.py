@@ -0,0 +1,217 @@
+# Tranzaksiyalarni fayl sifatida eksport qilish (CSV, JSON, NDJSON, XLSX) - bufersiz cursor'dan qatorma-qator
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, date
+
+from database import iter_export_transactions, convert_to_uzs
+from json_provider import json_default
+
+try:
+    import orjson
+except ImportError:  # orjson ixtiyoriy
+    orjson = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl ixtiyoriy, faqat format=xlsx uchun kerak
+    Workbook = None
+
+# format -> (mimetype, fayl kengaytmasi)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'json': ('application/json', 'json'),
+    'ndjson': ('application/x-ndjson', 'jsonl'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+# CSV/XLSX sarlavhalari (JSON/NDJSON'da ustun nomlari o'zi ishlatiladi)
+EXPORT_HEADERS = ['Sana', 'Turi', 'Kategoriya', 'Summa', 'Valyuta', 'Summa (UZS)', 'Tavsif', 'ID']
+TRANSACTION_TYPE_LABELS = {'income': 'Kirim', 'expense': 'Chiqim', 'debt': 'Qarz'}
+
+# Shuncha qator yig'ilganda CSV/JSON/NDJSON bo'lagi yuboriladi
+_CHUNK_ROWS = 500
+_FILE_CHUNK_BYTES = 64 * 1024
+
+
+class ExportError(ValueError):
+    """Eksport parametrlari noto'g'ri yoki format qo'llab-quvvatlanmaydi"""
+
+
+def parse_export_filters(args):
+    """So'rov parametrlaridan filtrlar: date_from, date_to (YYYY-MM-DD), category, type"""
+    filters = {}
+    for key in ('date_from', 'date_to'):
+        value = args.get(key)
+        if value:
+            try:
+                filters[key] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ExportError(f"{key} formati YYYY-MM-DD bo'lishi kerak")
+    if filters.get('date_from') and filters.get('date_to') and filters['date_from'] > filters['date_to']:
+        raise ExportError("date_from date_to dan keyin bo'lmasligi kerak")
+    if args.get('category'):
+        filters['category'] = args.get('category')
+    transaction_type = args.get('type')
+    if transaction_type:
+        if transaction_type not in TRANSACTION_TYPE_LABELS:
+            raise ExportError("type: income, expense yoki debt")
+        filters['transaction_type'] = transaction_type
+    return filters
+
+
+def check_export_format(export_format):
+    """Formatni tekshirish (mimetype, kengaytma)"""
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"format: {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'xlsx' and Workbook is None:
+        raise ExportError("xlsx uchun openpyxl o'rnatilmagan")
+    return EXPORT_FORMATS[export_format]
+
+
+def export_filename(export_format):
+    return f"balans_ai_export_{date.today().isoformat()}.{EXPORT_FORMATS[export_format][1]}"
+
+
+def _table_row(row):
+    return [
+        row.created_at,
+        TRANSACTION_TYPE_LABELS.get(row.transaction_type, row.transaction_type),
+        row.category or '',
+        float(row.amount),
+        row.currency or 'UZS',
+        round(convert_to_uzs(row.amount, row.currency or 'UZS'), 2),
+        row.description or '',
+        row.id,
+    ]
+
+
+def iter_csv(rows):
+    """CSV bo'laklari (Excel UTF-8 ni tanishi uchun BOM bilan)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_HEADERS)
+    pending = 0
+    for row in rows:
+        values = _table_row(row)
+        values[0] = values[0].isoformat(sep=' ') if values[0] else ''
+        writer.writerow(values)
+        pending += 1
+        if pending >= _CHUNK_ROWS:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _json_record(row):
+    """Tranzaksiya JSON obyekti (amount_uzs qo'shilgan)"""
+    record = row.to_dict()
+    record['amount_uzs'] = round(convert_to_uzs(row.amount, row.currency or 'UZS'), 2)
+    if orjson is not None:
+        return orjson.dumps(record, default=json_default)
+    return json.dumps(record, default=json_default, ensure_ascii=False).encode('utf-8')
+
+
+def iter_ndjson(rows):
+    """Har bir qatorda bitta JSON obyekt"""
+    chunk = []
+    for row in rows:
+        chunk.append(_json_record(row) + b'\n')
+        if len(chunk) >= _CHUNK_ROWS:
+            yield b''.join(chunk)
+            chunk = []
+    if chunk:
+        yield b''.join(chunk)
+
+
+def iter_json(rows):
+    """Bitta JSON massiv (elementlari NDJSON qatorlari bilan bir xil), bo'laklab"""
+    chunk = [b'[']
+    separator = b'\n'
+    for row in rows:
+        chunk.append(separator + _json_record(row))
+        separator = b',\n'
+        if len(chunk) >= _CHUNK_ROWS:
+            yield b''.join(chunk)
+            chunk = []
+    chunk.append(b'\n]\n')
+    yield b''.join(chunk)
+
+
+# format -> bo'laklab yoziladigan formatlar generatori (xlsx alohida)
+_CHUNK_WRITERS = {'csv': iter_csv, 'json': iter_json, 'ndjson': iter_ndjson}
+
+
+def write_xlsx(rows, path):
+    """XLSX'ni write-only rejimda faylga yozish (qatorlar xotirada to'planmaydi)"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Tranzaksiyalar')
+    sheet.append(EXPORT_HEADERS)
+    for row in rows:
+        sheet.append(_table_row(row))
+    workbook.save(path)
+
+
+def _iter_file(path):
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(_FILE_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def iter_xlsx(rows):
+    """XLSX (zip) oxirida yoziladi: avval vaqtinchalik faylga, keyin bo'laklab"""
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_xlsx(rows, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return _iter_file(path)
+
+
+def iter_export(user_id, export_format, filters):
+    """Eksport faylining bayt bo'laklari (DB'dan bufersiz o'qiladi)"""
+    check_export_format(export_format)
+    rows = iter_export_transactions(user_id, **filters)
+    if export_format == 'xlsx':
+        return iter_xlsx(rows)
+    return _CHUNK_WRITERS[export_format](rows)
+
+
+class _CountingRows:
+    """Iterator ustidan o'tgan qatorlarni sanash"""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            self.count += 1
+            yield row
+
+
+def write_export(user_id, export_format, filters, path):
+    """Eksportni faylga yozish (Telegram'ga yuborish uchun), qatorlar soni qaytadi"""
+    check_export_format(export_format)
+    counted = _CountingRows(iter_export_transactions(user_id, **filters))
+    if export_format == 'xlsx':
+        write_xlsx(counted, path)
+    else:
+        chunks = _CHUNK_WRITERS[export_format](counted)
+        with open(path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+    return counted.count
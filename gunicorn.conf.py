@@ -0,0 +1,44 @@
+# Gunicorn konfiguratsiyasi: gunicorn -c gunicorn.conf.py app:app
+#
+# GUNICORN_WORKER_CLASS:
+#   gthread (default) - har bir worker'da GUNICORN_THREADS ta thread, DB kutilayotganda boshqa so'rovlar ishlaydi
+#   gevent            - greenlet'lar (pip install gevent); PyMySQL sof Python, monkey-patch qilingan socket'lar bilan ishlaydi
+#   sync              - eski rejim (bitta worker = bitta so'rov)
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread').lower()
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# gevent'da lock'lar monkey-patch'dan oldin yaratilib qolmasligi uchun preload o'chiq
+preload_app = os.getenv('GUNICORN_PRELOAD', 'False').lower() == 'true' and worker_class != 'gevent'
+
+# So'rovlar log_request orqali yoziladi
+accesslog = None
+
+
+def when_ready(server):
+    server.log.info(
+        "worker_class=%s workers=%s threads=%s worker_connections=%s",
+        worker_class, workers, threads, worker_connections
+    )
+
+
+def post_fork(server, worker):
+    """preload_app bo'lsa ota process'dan qolgan DB pool'ini tashlab yuborish"""
+    if preload_app:
+        from database import reset_pool_after_fork
+        reset_pool_after_fork()
+
+
+def post_worker_init(worker):
+    """Eksport navbati worker thread'lari (app yuklangandan va gevent patch'dan keyin, faqat web worker'larda)"""
+    from jobs import start_job_workers
+    start_job_workers()
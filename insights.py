@@ -0,0 +1,219 @@
+# Moliyaviy insight'lar: xarajat o'sishi, kategoriya o'sishi, anomaliyalar, takroriy to'lovlar va burn rate
+#
+# Hammasi kunlik agregatlardan (transaction_daily_rollups) bir o'tishda hisoblanadi: qatorlar soni
+# tranzaksiyalar soniga emas, kunlar × kategoriyalarga bog'liq. Javob data_version bo'yicha cache qilinadi.
+import statistics
+from datetime import date, datetime, timedelta
+
+from database import get_insight_inputs, convert_totals_to_uzs, category_label
+
+# Joriy oydan oldingi shuncha to'liq oy bazaviy davr sifatida olinadi
+INSIGHT_BASELINE_MONTHS = 3
+# Burn rate oynasi (kun)
+BURN_RATE_DAYS = 30
+# Kunlik anomaliya: oxirgi shuncha kun bazaviy kunlar bilan solishtiriladi
+ANOMALY_RECENT_DAYS = 7
+ANOMALY_MIN_BASELINE_DAYS = 28
+ANOMALY_SIGMA = 3.0
+# Kategoriya oy boshidan beri o'rtacha oylik xarajatidan shuncha marta ko'p bo'lsa anomaliya
+CATEGORY_SPIKE_RATIO = 2.0
+CATEGORY_GROWTH_LIMIT = 5
+# Takroriy to'lov: bir xil kategoriya, valyuta va summa shu oraliqlarda (kun) kamida 3 marta
+RECURRING_INTERVALS = {'weekly': (6, 8), 'monthly': (26, 35)}
+RECURRING_MIN_OCCURRENCES = 3
+
+
+def _month_start(day, months_back=0):
+    index = day.year * 12 + day.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def insight_window_start(today):
+    """Kunlik agregatlar shu sanadan o'qiladi (bazaviy oylar va burn rate oynasini qamraydi)"""
+    return min(_month_start(today, INSIGHT_BASELINE_MONTHS), today - timedelta(days=BURN_RATE_DAYS - 1))
+
+
+def _growth(current, previous):
+    """Foizdagi o'sish (oldingi davr bo'sh bo'lsa None)"""
+    if previous <= 0:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def _daily_anomalies(daily_expense, window_start, today):
+    """Oxirgi kunlar xarajati bazaviy kunlar o'rtachasidan ANOMALY_SIGMA σ dan yuqori bo'lsa"""
+    recent_from = today - timedelta(days=ANOMALY_RECENT_DAYS - 1)
+    baseline_days = (recent_from - window_start).days
+    if baseline_days < ANOMALY_MIN_BASELINE_DAYS:
+        return []
+    # Xarajatsiz kunlar ham bazaga kiradi (0 bilan)
+    baseline = [daily_expense.get(window_start + timedelta(days=offset), 0.0) for offset in range(baseline_days)]
+    mean = statistics.fmean(baseline)
+    threshold = mean + ANOMALY_SIGMA * statistics.pstdev(baseline, mean)
+    anomalies = []
+    for offset in range(ANOMALY_RECENT_DAYS):
+        day = recent_from + timedelta(days=offset)
+        amount = daily_expense.get(day, 0.0)
+        if amount > 0 and amount > threshold:
+            anomalies.append({
+                'type': 'daily_spike',
+                'date': day.isoformat(),
+                'amount': round(amount, 2),
+                'baseline': round(mean, 2),
+            })
+    return anomalies
+
+
+def _detect_recurring(candidates, amounts_uzs, today):
+    """
+    Bir xil summali to'lovlar muntazam oraliqda takrorlansa (haftalik yoki oylik).
+    Cheklov: nomzodlar faqat kunlik agregatda yagona (count=1) bo'lgan qatorlardan olinadi. To'lov kuni shu
+    kategoriya va valyutada boshqa xarajat ham bo'lsa summa aralashadi va o'sha kun hisobga olinmaydi
+    (bunday kunlar ko'p bo'lsa takroriy to'lov topilmaydi).
+    """
+    recurring = []
+    for key, days in candidates.items():
+        if len(days) < RECURRING_MIN_OCCURRENCES:
+            continue
+        days.sort()
+        intervals = [(later - earlier).days for earlier, later in zip(days, days[1:])]
+        for name, (low, high) in RECURRING_INTERVALS.items():
+            if all(low <= interval <= high for interval in intervals):
+                break
+        else:
+            continue
+        # Oxirgi to'lovdan keyin bir oraliqdan ko'p vaqt o'tgan bo'lsa to'lov to'xtagan
+        if (today - days[-1]).days > high:
+            continue
+        interval = round(statistics.median(intervals))
+        category, currency, amount = key
+        recurring.append({
+            'category': category_label(category),
+            'amount': amount,
+            'currency': currency,
+            'amountUzs': round(amounts_uzs[key], 2),
+            'interval': name,
+            'occurrences': len(days),
+            'lastDate': days[-1].isoformat(),
+            'nextDate': (days[-1] + timedelta(days=interval)).isoformat(),
+        })
+    recurring.sort(key=lambda item: item['amountUzs'], reverse=True)
+    return recurring
+
+
+def compute_insights(rows, currency_totals, unpaid_debts, today=None):
+    """
+    Kunlik agregat qatorlaridan (date, transaction_type, currency, category, count, total) insight'lar.
+    Qatorlar insight_window_start(today) dan boshlanishi kerak; currency_totals - butun tarix (ledger).
+    """
+    today = today or date.today()
+    window_start = insight_window_start(today)
+    current_month = _month_start(today)
+    previous_month = _month_start(today, 1)
+    baseline_from = _month_start(today, INSIGHT_BASELINE_MONTHS)
+    burn_from = today - timedelta(days=BURN_RATE_DAYS - 1)
+
+    amounts = convert_totals_to_uzs([row['total'] for row in rows], [row['currency'] for row in rows])
+
+    income = expense = previous_expense = burn_expense = 0.0
+    daily_expense = {}
+    category_current = {}
+    category_previous = {}
+    category_baseline = {}
+    candidates = {}
+    for row, amount_uzs in zip(rows, amounts):
+        day = row['date']
+        if isinstance(day, datetime):
+            day = day.date()
+        if day > today:
+            continue
+        transaction_type = row['transaction_type']
+        if transaction_type == 'income':
+            if day >= current_month:
+                income += amount_uzs
+            continue
+        if transaction_type != 'expense':
+            continue
+
+        category = category_label(row['category'])
+        daily_expense[day] = daily_expense.get(day, 0.0) + amount_uzs
+        if day >= burn_from:
+            burn_expense += amount_uzs
+        if day >= current_month:
+            expense += amount_uzs
+            category_current[category] = category_current.get(category, 0.0) + amount_uzs
+        else:
+            if day >= baseline_from:
+                category_baseline[category] = category_baseline.get(category, 0.0) + amount_uzs
+            # O'tgan oy bilan oy boshidan bir xil kunlar soni solishtiriladi
+            if day >= previous_month and day.day <= today.day:
+                previous_expense += amount_uzs
+                category_previous[category] = category_previous.get(category, 0.0) + amount_uzs
+        # Kunda bitta to'lov bo'lsa (count=1) summasi aniq ma'lum: takroriy to'lov nomzodi
+        if int(row['count']) == 1:
+            candidates.setdefault((row['category'] or '', row['currency'], round(float(row['total']), 2)), []).append(day)
+
+    category_growth = []
+    for category in set(category_current) | set(category_previous):
+        current = category_current.get(category, 0.0)
+        previous = category_previous.get(category, 0.0)
+        category_growth.append({
+            'name': category,
+            'current': round(current, 2),
+            'previous': round(previous, 2),
+            'growth': _growth(current, previous),
+        })
+    category_growth.sort(key=lambda item: (item['previous'] - item['current'], item['name']))
+
+    anomalies = _daily_anomalies(daily_expense, window_start, today)
+    for category, current in sorted(category_current.items(), key=lambda item: item[1], reverse=True):
+        baseline = category_baseline.get(category, 0.0) / INSIGHT_BASELINE_MONTHS
+        if baseline > 0 and current > baseline * CATEGORY_SPIKE_RATIO:
+            anomalies.append({
+                'type': 'category_spike',
+                'category': category,
+                'amount': round(current, 2),
+                'baseline': round(baseline, 2),
+            })
+
+    recurring_keys = list(candidates)
+    recurring_amounts = dict(zip(recurring_keys, convert_totals_to_uzs(
+        [key[2] for key in recurring_keys], [key[1] for key in recurring_keys]
+    )))
+    recurring = _detect_recurring(candidates, recurring_amounts, today)
+    recurring_monthly = sum(
+        (item['amountUzs'] * (52 / 12 if item['interval'] == 'weekly' else 1) for item in recurring), 0.0
+    )
+
+    total_balance = sum(convert_totals_to_uzs(
+        [float(row['income_total']) - float(row['expense_total']) for row in currency_totals],
+        [row['currency'] for row in currency_totals]
+    ), 0.0)
+    daily_burn = burn_expense / BURN_RATE_DAYS
+    top_category = max(category_current.items(), key=lambda item: item[1], default=None)
+
+    return {
+        'expenseGrowth': _growth(expense, previous_expense),
+        'topCategory': {'name': top_category[0], 'amount': round(top_category[1], 2)} if top_category else None,
+        'income': round(income, 2),
+        'expense': round(expense, 2),
+        'balance': round(income - expense, 2),
+        'unpaidDebts': unpaid_debts,
+        'categoryGrowth': category_growth[:CATEGORY_GROWTH_LIMIT],
+        'anomalies': anomalies,
+        'recurring': recurring,
+        'recurringMonthlyTotal': round(recurring_monthly, 2),
+        'burnRate': {
+            'daily': round(daily_burn, 2),
+            'monthly': round(daily_burn * 30, 2),
+            'totalBalance': round(total_balance, 2),
+            'runwayDays': int(total_balance / daily_burn) if daily_burn > 0 and total_balance > 0 else None,
+        },
+    }
+
+
+def get_analytics_insights(user_id, today=None):
+    """Foydalanuvchi insight'lari (bitta connection: kunlik agregatlar, ledger va faol qarzlar)"""
+    today = today or date.today()
+    inputs = get_insight_inputs(user_id, insight_window_start(today))
+    return compute_insights(inputs['rows'], inputs['currency_totals'], inputs['unpaid_debts'], today)
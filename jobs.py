@@ -0,0 +1,348 @@
+# Telegram'ga eksport fayllarini fonda yuborish navbati (fayllar diskda, har bir process'da worker thread'lar)
+#
+# Har bir job alohida papkada: payload (yuklangan fayl) va job.json (holat).
+# Bir nechta gunicorn worker bitta papkadan foydalanadi, job'ni "claim" fayli (O_EXCL) bilan egallaydi.
+# Worker thread'lar gunicorn post_worker_init'da yoki birinchi enqueue'da ishga tushadi (CLI process'larda emas).
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import requests
+
+from config import Config
+from exports import check_export_format, export_filename, parse_export_filters, write_export
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_SENDING = 'sending'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+_FINISHED_STATUSES = (JOB_DONE, JOB_FAILED)
+# Job id faqat hex (papka nomi sifatida xavfsiz)
+_JOB_ID_CHARS = frozenset('0123456789abcdef')
+
+
+class PermanentDeliveryError(Exception):
+    """Qayta urinish foyda bermaydigan xatolik (masalan, 400 - chat topilmadi)"""
+
+
+class RetryableDeliveryError(Exception):
+    """Keyinroq qayta urinish kerak bo'lgan xatolik (tarmoq, 5xx, 429)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _jobs_dir():
+    path = Config.EXPORT_JOBS_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _job_path(job_id, *parts):
+    return os.path.join(_jobs_dir(), job_id, *parts)
+
+
+def _valid_job_id(job_id):
+    return isinstance(job_id, str) and len(job_id) == 32 and set(job_id) <= _JOB_ID_CHARS
+
+
+def _write_job(job):
+    """job.json ni atomik yozish"""
+    job['updated_at'] = time.time()
+    path = _job_path(job['job_id'], 'job.json')
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_job(job_id):
+    try:
+        with open(_job_path(job_id, 'job.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _enqueue(job_id, user_id, kind, filename, content_type, caption, **extra):
+    now = time.time()
+    _write_job(dict(
+        extra,
+        job_id=job_id,
+        kind=kind,
+        user_id=user_id,
+        filename=filename,
+        content_type=content_type,
+        caption=caption,
+        status=JOB_QUEUED,
+        attempts=0,
+        next_attempt_at=now,
+        last_error=None,
+        created_at=now,
+    ))
+    start_job_workers()
+    _wakeup.set()
+    logger.info("📤 Eksport navbatga qo'yildi: job=%s user_id=%s", job_id, user_id)
+    return job_id
+
+
+def enqueue_telegram_document(user_id, file_storage, caption):
+    """Yuklangan faylni diskka yozib, yuborish job'ini navbatga qo'yish (job_id qaytadi)"""
+    job_id = uuid.uuid4().hex
+    os.makedirs(_job_path(job_id))
+    file_storage.save(_job_path(job_id, 'payload'))
+    return _enqueue(
+        job_id, user_id, 'telegram_document', file_storage.filename or 'export',
+        file_storage.content_type or 'application/octet-stream', caption
+    )
+
+
+def enqueue_telegram_export(user_id, export_format, export_args, caption):
+    """Tranzaksiyalar eksportini server tomonda yaratib yuborish (fayl worker'da yoziladi)"""
+    mimetype, _ = check_export_format(export_format)
+    parse_export_filters(export_args)
+    job_id = uuid.uuid4().hex
+    os.makedirs(_job_path(job_id))
+    return _enqueue(
+        job_id, user_id, 'telegram_export', export_filename(export_format), mimetype, caption,
+        export={'format': export_format, 'args': export_args}
+    )
+
+
+def _prepare_payload(job):
+    """telegram_export job'i uchun faylni yaratish (qayta urinishlarda qayta yozilmaydi)"""
+    payload_path = _job_path(job['job_id'], 'payload')
+    if job['kind'] != 'telegram_export' or os.path.exists(payload_path):
+        return
+    export = job['export']
+    tmp_path = payload_path + '.tmp'
+    job['rows'] = write_export(job['user_id'], export['format'], parse_export_filters(export['args']), tmp_path)
+    os.replace(tmp_path, payload_path)
+
+
+def get_job_status(job_id, user_id):
+    """Job holati (faqat shu foydalanuvchi uchun, aks holda None)"""
+    if not _valid_job_id(job_id):
+        return None
+    job = _read_job(job_id)
+    if job is None or job.get('user_id') != user_id:
+        return None
+    return {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'last_error': job['last_error'],
+        'next_attempt_at': job['next_attempt_at'] if job['status'] == JOB_QUEUED else None,
+        'rows': job.get('rows'),
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+    }
+
+
+def send_telegram_document(job):
+    """Telegram Bot API sendDocument (TELEGRAM_API_URL test stub'iga yo'naltirilishi mumkin)"""
+    url = f"{Config.TELEGRAM_API_URL.rstrip('/')}/bot{Config.TELEGRAM_BOT_TOKEN}/sendDocument"
+    data = {'chat_id': job['user_id'], 'caption': job['caption'], 'parse_mode': 'HTML'}
+    try:
+        with open(_job_path(job['job_id'], 'payload'), 'rb') as payload:
+            files = {'document': (job['filename'], payload, job['content_type'])}
+            response = requests.post(url, files=files, data=data, timeout=Config.EXPORT_JOB_TIMEOUT)
+    except requests.RequestException as e:
+        raise RetryableDeliveryError(f"Tarmoq xatosi: {e}")
+
+    try:
+        result = response.json()
+    except ValueError:
+        result = {}
+    if response.status_code == 200 and result.get('ok'):
+        return
+    description = result.get('description') or response.text[:200]
+    if response.status_code == 429 or response.status_code >= 500:
+        retry_after = (result.get('parameters') or {}).get('retry_after')
+        raise RetryableDeliveryError(f"{response.status_code}: {description}", retry_after)
+    raise PermanentDeliveryError(f"{response.status_code}: {description}")
+
+
+def _backoff_seconds(attempts):
+    return min(Config.EXPORT_JOB_BACKOFF * (2 ** (attempts - 1)), Config.EXPORT_JOB_BACKOFF_MAX)
+
+
+# Job ishlayotganda claim shu oraliqda yangilanadi; yangilanmay qolgan claim eskirgan hisoblanadi
+_CLAIM_HEARTBEAT_INTERVAL = 5
+
+
+def _claim_stale_after():
+    return Config.EXPORT_JOB_TIMEOUT * 2 + 30
+
+
+def _claim(job_id):
+    """Job'ni shu process uchun egallash: claim token'i (boshqa worker egallagan bo'lsa None)"""
+    claim_path = _job_path(job_id, 'claim')
+    token = f"{os.getpid()}:{uuid.uuid4().hex}"
+    try:
+        fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # Process o'lib qolgan bo'lsa claim eskiradi (tirik egasi uni heartbeat bilan yangilab turadi)
+        try:
+            if time.time() - os.stat(claim_path).st_mtime < _claim_stale_after():
+                return None
+            os.remove(claim_path)
+        except OSError:
+            return None
+        return _claim(job_id)
+    except OSError:
+        return None
+    os.write(fd, token.encode())
+    os.close(fd)
+    return token
+
+
+def _owns_claim(job_id, token):
+    """Claim hali shu token'gakmi (eskirgan deb boshqa worker olib qo'ymaganmi)"""
+    try:
+        with open(_job_path(job_id, 'claim'), encoding='utf-8') as f:
+            return f.read() == token
+    except OSError:
+        return False
+
+
+def _heartbeat(job_id, token, stop):
+    """Job ishlayotganda claim mtime'ini yangilab turish (uzoq eksport yoki sekin Telegram so'rovi paytida)"""
+    while not stop.wait(_CLAIM_HEARTBEAT_INTERVAL):
+        if not _owns_claim(job_id, token):
+            return
+        try:
+            os.utime(_job_path(job_id, 'claim'))
+        except OSError:
+            return
+
+
+def _release(job_id, token):
+    if not _owns_claim(job_id, token):
+        return
+    try:
+        os.remove(_job_path(job_id, 'claim'))
+    except OSError:
+        pass
+
+
+def process_job(job_id):
+    """Bitta job'ni yuborishga urinish (egallangan bo'lsa yoki vaqti kelmagan bo'lsa hech narsa qilmaydi)"""
+    token = _claim(job_id)
+    if token is None:
+        return False
+    stop_heartbeat = threading.Event()
+    threading.Thread(
+        target=_heartbeat, args=(job_id, token, stop_heartbeat), name=f'export-claim-{job_id[:8]}', daemon=True
+    ).start()
+    try:
+        job = _read_job(job_id)
+        if job is None or job['status'] in _FINISHED_STATUSES or job['next_attempt_at'] > time.time():
+            return False
+
+        job['status'] = JOB_SENDING
+        job['attempts'] += 1
+        _write_job(job)
+        try:
+            _prepare_payload(job)
+            # Process uzoq to'xtab qolib claim boshqa worker'ga o'tgan bo'lsa, fayl ikki marta yuborilmaydi
+            if not _owns_claim(job_id, token):
+                logger.warning("⚠️ Job claim'i boshqa worker'ga o'tgan, yuborilmaydi: job=%s", job_id)
+                return False
+            send_telegram_document(job)
+        except RetryableDeliveryError as e:
+            job['last_error'] = str(e)
+            if job['attempts'] >= Config.EXPORT_JOB_MAX_ATTEMPTS:
+                job['status'] = JOB_FAILED
+                logger.error("❌ Eksport yuborilmadi (urinishlar tugadi): job=%s %s", job_id, e)
+            else:
+                delay = e.retry_after or _backoff_seconds(job['attempts'])
+                job['status'] = JOB_QUEUED
+                job['next_attempt_at'] = time.time() + delay
+                logger.warning("⚠️ Eksport qayta yuboriladi (%s s dan keyin): job=%s %s", delay, job_id, e)
+        except PermanentDeliveryError as e:
+            job['status'] = JOB_FAILED
+            job['last_error'] = str(e)
+            logger.error("❌ Telegram API xatosi: job=%s %s", job_id, e)
+        except Exception as e:
+            # Kutilmagan xatolik ham qayta urinish sifatida hisoblanadi
+            job['status'] = JOB_QUEUED if job['attempts'] < Config.EXPORT_JOB_MAX_ATTEMPTS else JOB_FAILED
+            job['next_attempt_at'] = time.time() + _backoff_seconds(job['attempts'])
+            job['last_error'] = str(e)
+            logger.exception("❌ Eksport job xatosi: job=%s %s", job_id, e)
+        else:
+            job['status'] = JOB_DONE
+            job['last_error'] = None
+            logger.info("✅ Eksport yuborildi: job=%s user_id=%s, file=%s", job_id, job['user_id'], job['filename'])
+
+        if job['status'] in _FINISHED_STATUSES:
+            try:
+                os.remove(_job_path(job_id, 'payload'))
+            except OSError:
+                pass
+        _write_job(job)
+        return True
+    finally:
+        stop_heartbeat.set()
+        _release(job_id, token)
+
+
+def _due_jobs():
+    """Yuborish vaqti kelgan job'lar va eskirgan tugagan job'larni tozalash"""
+    now = time.time()
+    due = []
+    try:
+        names = os.listdir(_jobs_dir())
+    except OSError:
+        return due
+    for job_id in names:
+        if not _valid_job_id(job_id):
+            continue
+        job = _read_job(job_id)
+        if job is None:
+            continue
+        if job['status'] in _FINISHED_STATUSES:
+            if now - job['updated_at'] > Config.EXPORT_JOB_RETENTION:
+                shutil.rmtree(_job_path(job_id), ignore_errors=True)
+            continue
+        if job['next_attempt_at'] <= now:
+            due.append((job['next_attempt_at'], job_id))
+    return [job_id for _, job_id in sorted(due)]
+
+
+_wakeup = threading.Event()
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+def _worker_loop():
+    while True:
+        _wakeup.wait(Config.EXPORT_JOB_POLL_INTERVAL)
+        _wakeup.clear()
+        try:
+            for job_id in _due_jobs():
+                process_job(job_id)
+        except Exception as e:
+            logger.exception("❌ Eksport navbati worker xatosi: %s", e)
+
+
+def start_job_workers():
+    """Worker thread'larni ishga tushirish (har bir process'da bir marta, fork'dan keyin qayta)"""
+    global _workers_pid
+    pid = os.getpid()
+    if _workers_pid == pid:
+        return
+    with _workers_lock:
+        if _workers_pid == pid:
+            return
+        _workers_pid = pid
+        for index in range(Config.EXPORT_JOB_WORKERS):
+            threading.Thread(target=_worker_loop, name=f'export-jobs-{index}', daemon=True).start()
@@ -0,0 +1,86 @@
+# Flask uchun JSON provider (orjson o'rnatilgan bo'lsa C tezligida, bo'lmasa standart json)
+import json
+import dataclasses
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson ixtiyoriy, bo'lmasa standart json ishlatiladi
+    orjson = None
+
+
+def json_default(value):
+    """JSON'da to'g'ridan-to'g'ri bo'lmagan turlarni moslashtirish (Decimal, datetime, timedelta...)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, float):
+        return float(value)  # NumPy float64 va boshqa float subclass'lar
+    if isinstance(value, int):
+        return int(value)
+    to_json = getattr(value, '__json__', None)
+    if to_json is not None:
+        return to_json()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', 'replace')
+    # Boshqa turdagi ma'lumotlarni string ga konvertatsiya qilish
+    return str(value)
+
+
+class FastJSONProvider(JSONProvider):
+    """Decimal/datetime/timedelta'ni bir o'tishda kodlaydigan JSON provider"""
+
+    sort_keys = True
+    mimetype = 'application/json'
+
+    if orjson is not None:
+        _orjson_options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def _indent(self):
+        return self._app.debug
+
+    def dumps_bytes(self, obj):
+        """JSON ni bytes ko'rinishida qaytarish (response uchun qo'shimcha encode'siz)"""
+        if orjson is not None:
+            options = self._orjson_options
+            if self._indent():
+                options |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=json_default, option=options)
+            except orjson.JSONEncodeError:
+                # 64-bitdan katta int va shunga o'xshash holatlar standart json orqali
+                pass
+        return self._dumps_stdlib(obj).encode('utf-8')
+
+    def _dumps_stdlib(self, obj, **kwargs):
+        kwargs.setdefault('default', json_default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if self._indent():
+            kwargs.setdefault('indent', 2)
+        else:
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return self._dumps_stdlib(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,109 @@
+# Logging konfiguratsiyasi (darajalar, navbat orqali yozish, so'rov konteksti)
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from config import Config
+
+_ROOT_LOGGER_NAME = 'balansai'
+_listener = None
+_listener_pid = None
+_setup_lock = threading.Lock()
+
+class RequestContextFilter(logging.Filter):
+    """Log yozuviga so'rov kontekstini qo'shish (user_id, route)"""
+    
+    def filter(self, record):
+        record.user_id = '-'
+        record.route = '-'
+        try:
+            from flask import has_request_context, request, g
+            if has_request_context():
+                record.route = f"{request.method} {request.path}"
+                record.user_id = g.get('user_id') or '-'
+        except Exception:
+            pass
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Bir qatorli JSON log formati (log yig'uvchilar uchun)"""
+    
+    _EXTRA_FIELDS = ('status', 'latency_ms')
+    
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'user_id': getattr(record, 'user_id', '-'),
+            'route': getattr(record, 'route', '-')
+        }
+        for field in self._EXTRA_FIELDS:
+            if hasattr(record, field):
+                payload[field] = getattr(record, field)
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+def _build_formatter():
+    """LOG_FORMAT bo'yicha formatter tanlash (text yoki json)"""
+    if Config.LOG_FORMAT == 'json':
+        return JsonFormatter()
+    return logging.Formatter(
+        '%(asctime)s %(levelname)s %(name)s [user=%(user_id)s %(route)s] %(message)s'
+    )
+
+def setup_logging():
+    """
+    Logging'ni sozlash (har bir process'da bir marta).
+    Yozuvlar navbatga qo'yiladi, stdout'ga yozish alohida thread'da bajariladi.
+    """
+    global _listener, _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _setup_lock:
+        if _listener_pid == pid:
+            return
+        
+        root = logging.getLogger(_ROOT_LOGGER_NAME)
+        root.setLevel(Config.LOG_LEVEL)
+        root.propagate = False
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(_build_formatter())
+        
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        # Kontekst so'rov thread'ida qo'shiladi, navbatga qo'yishdan oldin
+        queue_handler.addFilter(RequestContextFilter())
+        root.addHandler(queue_handler)
+        
+        # Fork'dan keyin eski listener thread bu process'da mavjud emas
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        if _listener_pid is None:
+            atexit.register(stop_logging)
+        _listener_pid = pid
+
+def stop_logging():
+    """Navbatdagi yozuvlarni chiqarib, listener'ni to'xtatish"""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+    _listener_pid = None
+
+def get_logger(name):
+    """Modul uchun logger (balansai.* ierarxiyasida)"""
+    setup_logging()
+    if name == '__main__':
+        name = 'app'
+    return logging.getLogger(f"{_ROOT_LOGGER_NAME}.{name}")
@@ -0,0 +1,386 @@
+# Versiyalangan sxema migratsiyalari va hot so'rovlar uchun EXPLAIN tekshiruvi
+import random
+from datetime import datetime, timedelta
+import pymysql
+import pymysql.cursors
+from logger import get_logger
+import database
+from database import (
+    get_db_connection, open_connection_scope, close_connection_scope,
+    reset_schema_cache, assume_tables_missing, encode_page_cursor,
+    DAILY_ROLLUPS_TABLE_SQL, USER_BALANCES_TABLE_SQL, USER_BALANCES_COUNT_COLUMNS_SQL,
+    USER_DATA_VERSIONS_TABLE_SQL
+)
+
+logger = get_logger(__name__)
+
+SCHEMA_MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT UNSIGNED NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (version)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# transactions hot so'rovlari uchun composite index'lar: (nom, ustunlar, kerakli ustun)
+TRANSACTION_INDEXES = [
+    # Ro'yxat va keyset pagination: WHERE user_id ORDER BY created_at DESC, id DESC
+    ('idx_tx_user_created', '(user_id, created_at, id)', None),
+    # Tur bo'yicha ro'yxat va COUNT(*) GROUP BY transaction_type
+    ('idx_tx_user_type_created', '(user_id, transaction_type, created_at)', None),
+    # Kategoriya sahifasi (eski usul, category nomi bo'yicha)
+    ('idx_tx_user_category', '(user_id, category, created_at)', None),
+    # Kategoriya sahifasi (category_contact_id bo'yicha)
+    ('idx_tx_user_category_contact', '(user_id, category_contact_id, created_at)', 'category_contact_id'),
+    # Valyuta bo'yicha summalar (ledger fallback) - covering
+    ('idx_tx_user_currency', '(user_id, currency, transaction_type, amount)', None),
+]
+
+
+def _index_names(cursor, table_name):
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME as name
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table_name,))
+    return {row['name'] for row in cursor.fetchall()}
+
+
+def _column_names(cursor, table_name):
+    cursor.execute("""
+        SELECT COLUMN_NAME as name
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table_name,))
+    return {row['name'] for row in cursor.fetchall()}
+
+
+def _add_index(cursor, table_name, index_name, columns):
+    """Index qo'shish (imkon bo'lsa online, jadvalni qulflamasdan)"""
+    try:
+        cursor.execute(f"ALTER TABLE {table_name} ADD INDEX {index_name} {columns}, ALGORITHM=INPLACE, LOCK=NONE")
+    except pymysql.MySQLError as e:
+        logger.warning("⚠️ %s online qo'shilmadi (%s), oddiy ALTER bilan qo'shilmoqda", index_name, e)
+        cursor.execute(f"ALTER TABLE {table_name} ADD INDEX {index_name} {columns}")
+
+
+# ============================================
+# MIGRATSIYALAR
+# ============================================
+
+def _create_daily_rollups(cursor):
+    cursor.execute(DAILY_ROLLUPS_TABLE_SQL)
+    # Trigger'lar va to'liq backfill shu qadamda: o'qishlar agregatga faqat shundan keyin o'tadi
+    database.rebuild_daily_rollups()
+
+
+def _create_user_balances(cursor):
+    cursor.execute(USER_BALANCES_TABLE_SQL)
+    if 'income_count' not in _column_names(cursor, 'user_balances'):
+        cursor.execute(USER_BALANCES_COUNT_COLUMNS_SQL)
+    # Trigger'lar va to'liq backfill shu qadamda: o'qishlar ledgerga faqat shundan keyin o'tadi
+    database.check_user_balances(repair=True)
+
+
+def _create_transaction_indexes(cursor):
+    existing = _index_names(cursor, 'transactions')
+    columns = _column_names(cursor, 'transactions')
+    for index_name, index_columns, required_column in TRANSACTION_INDEXES:
+        if index_name in existing:
+            continue
+        if required_column and required_column not in columns:
+            logger.info("ℹ️ %s o'tkazib yuborildi (%s ustuni yo'q)", index_name, required_column)
+            continue
+        logger.info("🔧 transactions.%s %s yaratilmoqda", index_name, index_columns)
+        _add_index(cursor, 'transactions', index_name, index_columns)
+
+
+# Kunlik summalarni stream rejimida hisoblash uchun covering index (created_at tartibida)
+TREND_COVERING_INDEX = ('idx_tx_user_created_cover', '(user_id, created_at, transaction_type, currency, category, amount)')
+
+
+def _create_trend_covering_index(cursor):
+    index_name, index_columns = TREND_COVERING_INDEX
+    if index_name not in _index_names(cursor, 'transactions'):
+        logger.info("🔧 transactions.%s %s yaratilmoqda", index_name, index_columns)
+        _add_index(cursor, 'transactions', index_name, index_columns)
+
+
+def _create_user_data_versions(cursor):
+    cursor.execute(USER_DATA_VERSIONS_TABLE_SQL)
+    # Bot to'g'ridan-to'g'ri yozganda ham versiya oshadi (cache va ETag'lar eskiradi)
+    database.install_data_version_triggers(cursor)
+
+
+def _create_report_snapshots(cursor):
+    # Jadval bilan birga uni tozalaydigan transactions trigger'lari (snapshot'lar shundan keyin ishlatiladi)
+    database.enable_report_snapshots(cursor)
+
+
+# (versiya, nom, funksiya) - faqat oxiriga qo'shiladi, mavjudlari o'zgartirilmaydi
+MIGRATIONS = [
+    (1, 'create_transaction_daily_rollups', _create_daily_rollups),
+    (2, 'create_user_balances', _create_user_balances),
+    (3, 'transactions_composite_indexes', _create_transaction_indexes),
+    (4, 'transactions_trend_covering_index', _create_trend_covering_index),
+    (5, 'create_user_data_versions', _create_user_data_versions),
+    (6, 'create_report_snapshots', _create_report_snapshots),
+]
+
+
+def _applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cursor.fetchall()}
+
+
+def migrate(target=None):
+    """Qo'llanmagan migratsiyalarni tartib bilan qo'llash, qo'llangan versiyalar ro'yxatini qaytaradi"""
+    applied_now = []
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(SCHEMA_MIGRATIONS_TABLE_SQL)
+            applied = _applied_versions(cursor)
+            for version, name, step in MIGRATIONS:
+                if version in applied or (target is not None and version > target):
+                    continue
+                logger.info("🔧 Migratsiya %s: %s", version, name)
+                step(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                connection.commit()
+                applied_now.append(version)
+        return applied_now
+    except Exception as e:
+        logger.error("❌ Migratsiyada xatolik: %s", e)
+        connection.rollback()
+        raise
+    finally:
+        # Yangi jadval/ustunlar darhol ishlatilishi uchun
+        reset_schema_cache()
+        connection.close()
+
+
+def migration_status():
+    """Har bir migratsiya holati: version, name, applied_at (qo'llanmagan bo'lsa None)"""
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(SCHEMA_MIGRATIONS_TABLE_SQL)
+            cursor.execute("SELECT version, applied_at FROM schema_migrations")
+            applied = {row['version']: row['applied_at'] for row in cursor.fetchall()}
+            return [
+                {'version': version, 'name': name, 'applied_at': applied.get(version)}
+                for version, name, _ in MIGRATIONS
+            ]
+    finally:
+        connection.close()
+
+
+# ============================================
+# EXPLAIN TEKSHIRUVI
+# ============================================
+
+# Katta bo'lishi mumkin bo'lgan jadvallar (to'liq skan faqat shularda muammo)
+_HOT_TABLES = {'transactions', 'transaction_daily_rollups', 'user_balances'}
+
+# Seed qilinadigan test foydalanuvchisi (haqiqiy Telegram ID bilan to'qnashmaydi)
+EXPLAIN_SEED_USER_ID = 900000000001
+
+
+def _plan_issues(plan):
+    """EXPLAIN natijasidagi muammolar: to'liq skan, filesort, vaqtinchalik jadval"""
+    issues = []
+    for row in plan:
+        table = row.get('table') or ''
+        access = row.get('type')
+        extra = row.get('Extra') or ''
+        if table in _HOT_TABLES:
+            if access == 'ALL':
+                issues.append(f"{table}: to'liq skan (type=ALL)")
+            elif access == 'index':
+                issues.append(f"{table}: butun index skan (type=index)")
+        if 'Using filesort' in extra:
+            issues.append(f"{table}: filesort")
+        if 'Using temporary' in extra:
+            issues.append(f"{table}: vaqtinchalik jadval")
+    return issues
+
+
+class QueryPlanRecorder:
+    """Helper'lar bajargan SELECT so'rovlarini EXPLAIN qilib yig'adi"""
+
+    def __init__(self):
+        self.current = None
+        self.results = []
+        self._seen = set()
+
+    def explain(self, connection, query, args):
+        statement = ' '.join(query.split())
+        if statement[:6].upper() != 'SELECT' or 'information_schema' in statement:
+            return
+        key = (self.current, statement)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        result = {'helper': self.current, 'query': statement, 'plan': [], 'issues': []}
+        try:
+            with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute("EXPLAIN " + query, args)
+                result['plan'] = cursor.fetchall()
+            result['issues'] = _plan_issues(result['plan'])
+        except Exception as e:
+            result['issues'] = [f"EXPLAIN xatosi: {e}"]
+        self.results.append(result)
+
+
+class _ExplainCursor:
+    """Har bir execute() dan oldin EXPLAIN yozib oladigan cursor proxy"""
+
+    def __init__(self, cursor, connection, recorder):
+        self._cursor = cursor
+        self._connection = connection
+        self._recorder = recorder
+
+    def execute(self, query, args=None):
+        self._recorder.explain(self._connection, query, args)
+        return self._cursor.execute(query, args)
+
+    @property
+    def connection(self):
+        # Stream rejimidagi so'rovlar ham (cursor.connection.cursor(...)) kuzatilsin
+        return _ExplainConnection(self._cursor.connection, self._recorder)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _ExplainConnection:
+    """Cursor'larni _ExplainCursor bilan o'raydigan connection proxy"""
+
+    def __init__(self, connection, recorder):
+        self._connection = connection
+        self._recorder = recorder
+
+    def cursor(self, *args, **kwargs):
+        return _ExplainCursor(self._connection.cursor(*args, **kwargs), self._connection, self._recorder)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def _explain_targets(user_id):
+    """Tekshiriladigan helper chaqiruvlari (nom, funksiya)"""
+    far_cursor = encode_page_cursor(datetime.now(), 2 ** 62)
+    return [
+        ('get_transactions', lambda: database.get_transactions(user_id, limit=50)),
+        ('get_transactions(type)', lambda: database.get_transactions(user_id, limit=50, transaction_type='expense')),
+        ('get_transactions(cursor)', lambda: database.get_transactions(user_id, limit=50, page_cursor=far_cursor)),
+        ('get_category_transactions', lambda: database.get_category_transactions(user_id, 'Oziq-ovqat', limit=50)),
+        ('get_category_details', lambda: database.get_category_details(user_id, 'Oziq-ovqat')),
+        ('get_transaction_counts', lambda: database.get_transaction_counts(user_id)),
+        ('get_balance', lambda: database.get_balance(user_id)),
+        ('get_currency_balances', lambda: database.get_currency_balances(user_id)),
+        ('get_balance_and_statistics', lambda: database.get_balance_and_statistics(user_id, days=30)),
+        ('get_statistics_bundle', lambda: database.get_statistics_bundle(user_id, days=30)),
+        ('get_income_trend', lambda: database.get_income_trend(user_id)),
+        ('get_expense_by_category', lambda: database.get_expense_by_category(user_id, days=30)),
+        ('get_top_expense_categories', lambda: database.get_top_expense_categories(user_id, limit=5, days=30)),
+        ('get_debts', lambda: database.get_debts(user_id)),
+        ('get_reminders', lambda: database.get_reminders(user_id)),
+    ]
+
+
+def explain_queries(user_id=EXPLAIN_SEED_USER_ID, raw=False):
+    """
+    database.py helper'larini bajarib, ularning SELECT so'rovlarini EXPLAIN qilish.
+    raw=True bo'lsa agregat jadvallarisiz (fallback) so'rovlar tekshiriladi.
+    Natija: [{'helper', 'query', 'plan', 'issues'}]
+    """
+    recorder = QueryPlanRecorder()
+    connection = get_db_connection()
+    reset_schema_cache()
+    if raw:
+        assume_tables_missing('transaction_daily_rollups', 'user_balances')
+    # Barcha helper'lar shu bitta (kuzatiladigan) connection'dan foydalanadi
+    token = open_connection_scope(_ExplainConnection(connection, recorder))
+    try:
+        for name, call in _explain_targets(user_id):
+            recorder.current = name
+            try:
+                call()
+            except Exception as e:
+                recorder.results.append({'helper': name, 'query': None, 'plan': [], 'issues': [f"xatolik: {e}"]})
+        return recorder.results
+    finally:
+        close_connection_scope(token)
+        reset_schema_cache()
+
+
+def seed_explain_data(user_id=EXPLAIN_SEED_USER_ID, rows=20000):
+    """EXPLAIN uchun test foydalanuvchisiga sintetik tranzaksiyalar yozish (faqat local baza uchun)"""
+    categories = ['Oziq-ovqat', 'Transport', "Uy-joy", 'Kafe', "Sog'liq", "Ko'ngilochar", 'Kiyim', 'Aloqa', 'Maosh', 'Boshqa']
+    currencies = ['UZS', 'UZS', 'UZS', 'USD', 'EUR']
+    types = ['expense'] * 7 + ['income'] * 2 + ['debt']
+    rng = random.Random(user_id)
+    now = datetime.now()
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            batch = []
+            for _ in range(rows):
+                created_at = now - timedelta(seconds=rng.randint(0, 730 * 86400))
+                batch.append((
+                    user_id, rng.choice(types), round(rng.uniform(1000, 2000000), 2),
+                    rng.choice(currencies), rng.choice(categories), 'seed', created_at
+                ))
+                if len(batch) == 1000:
+                    cursor.executemany("""
+                        INSERT INTO transactions (user_id, transaction_type, amount, currency, category, description, created_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, batch)
+                    connection.commit()
+                    batch = []
+            if batch:
+                cursor.executemany("""
+                    INSERT INTO transactions (user_id, transaction_type, amount, currency, category, description, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, batch)
+                connection.commit()
+            cursor.execute("ANALYZE TABLE transactions")
+            cursor.fetchall()
+    finally:
+        connection.close()
+    # Agregatlar ham to'ldiriladi (jadvallar mavjud bo'lsa)
+    reset_schema_cache()
+    database.rebuild_daily_rollups(user_id)
+    database.check_user_balances(user_id, repair=True)
+    return rows
+
+
+def cleanup_explain_data(user_id=EXPLAIN_SEED_USER_ID):
+    """Seed qilingan test foydalanuvchisi ma'lumotlarini o'chirish"""
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM transactions WHERE user_id = %s", (user_id,))
+            for table_name in ('transaction_daily_rollups', 'user_balances', 'report_snapshots'):
+                try:
+                    cursor.execute(f"DELETE FROM {table_name} WHERE user_id = %s", (user_id,))
+                except pymysql.err.ProgrammingError:
+                    pass  # Jadval hali yaratilmagan
+            connection.commit()
+    finally:
+        connection.close()
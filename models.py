@@ -0,0 +1,99 @@
+# Natija qatorlari uchun ixcham obyektlar va ularni to'g'ridan-to'g'ri quradigan cursor'lar
+import pymysql
+import pymysql.cursors
+
+
+class Transaction:
+    """Tranzaksiya qatori (__slots__ bilan, dict'ga nisbatan kam xotira)"""
+
+    __slots__ = (
+        'id', 'user_id', 'transaction_type', 'amount', 'currency',
+        'category', 'description', 'created_at', 'due_date', 'debt_direction'
+    )
+
+    def __init__(self, id, user_id, transaction_type, amount, currency,
+                 category, description, created_at, due_date, debt_direction):
+        self.id = id
+        self.user_id = user_id
+        self.transaction_type = transaction_type
+        self.amount = amount
+        self.currency = currency
+        self.category = category
+        self.description = description
+        self.created_at = created_at
+        self.due_date = due_date
+        self.debt_direction = debt_direction
+
+    # Eski dict qatorlari bilan moslik: row['amount'], row.get('category')
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def keys(self):
+        return self.__slots__
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+    def to_dict(self):
+        """Oddiy dict ko'rinishi"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    # json_provider shu orqali kodlaydi
+    __json__ = to_dict
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Transaction(id={self.id!r}, type={self.transaction_type!r}, amount={self.amount!r}, currency={self.currency!r})"
+
+
+# SELECT ro'yxati record ustunlari tartibida bo'lishi kerak
+TRANSACTION_COLUMNS = ", ".join(Transaction.__slots__)
+
+
+class RecordCursorMixin:
+    """Protokol qatorlaridan (tuple) to'g'ridan-to'g'ri record obyektlarini quradi"""
+
+    record_type = None
+
+    def _check_fields(self):
+        names = tuple(field.name for field in self._result.fields)
+        if names != self.record_type.__slots__:
+            raise pymysql.err.ProgrammingError(
+                f"{self.record_type.__name__} ustunlari mos emas: {', '.join(names)}"
+            )
+
+    def _do_get_result(self):
+        super()._do_get_result()
+        if self.description:
+            self._check_fields()
+        if self._rows:
+            record_type = self.record_type
+            self._rows = [record_type(*row) for row in self._rows]
+
+    def _conv_row(self, row):
+        if row is None:
+            return None
+        return self.record_type(*row)
+
+
+class TransactionCursor(RecordCursorMixin, pymysql.cursors.Cursor):
+    """Natijani Transaction obyektlari ro'yxati sifatida qaytaradi"""
+
+    record_type = Transaction
+
+
+class SSTransactionCursor(RecordCursorMixin, pymysql.cursors.SSCursor):
+    """Katta natijalar uchun bufersiz (streaming) Transaction cursor"""
+
+    record_type = Transaction
@@ -249,7 +249,36 @@ function getInitData() {
     return params.get('test_user_id') ? '' : '';
 }
 
+// Ilk ochilishda /api/bootstrap bitta so'rovda qaytaradigan bo'limlar (bo'lim -> endpoint URL)
+// transactions: server days parametrini hisobga olmaydi, loadTransactions bilan bir xil URL
+const BOOTSTRAP_SECTION_URLS = {
+    user: '/api/user',
+    transactions: '/api/transactions?limit=50&days=2',
+    income_trend: '/api/statistics/income-trend?period=auto'
+};
+let bootstrapPrefetch = {};
+
+async function loadBootstrap() {
+    try {
+        const sections = Object.keys(BOOTSTRAP_SECTION_URLS).join(',');
+        const data = await apiRequest(`/api/bootstrap?sections=${sections}`);
+        Object.entries(data.sections || {}).forEach(([name, value]) => {
+            bootstrapPrefetch[BOOTSTRAP_SECTION_URLS[name]] = value;
+        });
+        // Xatolik bo'lgan bo'limlar (masalan USER_NOT_FOUND) odatdagidek alohida so'raladi
+    } catch (error) {
+        console.warn('[API] Bootstrap yuklanmadi, endpoint\'lar alohida so\'raladi:', error);
+    }
+}
+
 async function apiRequest(endpoint, options = {}) {
+    // Bootstrap orqali olingan javob faqat bir marta ishlatiladi
+    if ((!options.method || options.method === 'GET') && endpoint in bootstrapPrefetch) {
+        const data = bootstrapPrefetch[endpoint];
+        delete bootstrapPrefetch[endpoint];
+        return data;
+    }
+    
     const initData = getInitData();
     const params = new URLSearchParams(window.location.search);
     const testUserId = params.get('test_user_id');
@@ -316,6 +345,24 @@ async function apiRequest(endpoint, options = {}) {
     }
 }
 
+// Bir nechta GET so'rovini bitta /api/batch so'rovida yuborish.
+// Natija so'rovlar tartibida; xatolik bo'lgan element uchun Error obyekti qaytadi.
+async function apiBatch(requests) {
+    const data = await apiRequest('/api/batch', {
+        method: 'POST',
+        body: JSON.stringify({ requests })
+    });
+    return (data.results || []).map(result => {
+        if (result.status === 200) {
+            return result.body;
+        }
+        const error = new Error(result.error || 'Xatolik yuz berdi');
+        error.status = result.status;
+        error.code = result.code;
+        return error;
+    });
+}
+
 // ============================================
 // USER DATA
 // ============================================
@@ -1942,11 +1989,17 @@ async function showDebtDetail(debtId) {
     try {
         const debt = debtsData.find(d => d.id === debtId);
         if (!debt) {
-            // API dan olish
-            const allDebts = await apiRequest('/api/debts');
+            // Qarzlar va eslatmalar bitta so'rovda
+            const [allDebts, reminders] = await apiBatch([
+                { path: '/api/debts' },
+                { path: `/api/debts/${debtId}/reminders` }
+            ]);
+            if (allDebts instanceof Error) {
+                throw allDebts;
+            }
             const foundDebt = allDebts.find(d => d.id === debtId);
             if (foundDebt) {
-                await renderDebtDetail(foundDebt, content);
+                await renderDebtDetail(foundDebt, content, reminders instanceof Error ? [] : reminders);
                 modal.classList.add('active');
             }
             return;
@@ -1961,7 +2014,7 @@ async function showDebtDetail(debtId) {
 }
 
 // Qarz ma'lumotlarini render qilish
-async function renderDebtDetail(debt, container) {
+async function renderDebtDetail(debt, container, prefetchedReminders = null) {
     const isGiven = debt.debt_type === 'given';
     const remaining = (debt.amount || 0) - (debt.paid_amount || 0);
     const date = new Date(debt.created_at);
@@ -1971,12 +2024,14 @@ async function renderDebtDetail(debt, container) {
         day: 'numeric'
     });
     
-    // Eslatmalarni olish
-    let reminders = [];
-    try {
-        reminders = await apiRequest(`/api/debts/${debt.id}/reminders`);
-    } catch (e) {
-        console.log('Eslatmalar olinmadi');
+    // Eslatmalarni olish (batch orqali olingan bo'lsa qayta so'ralmaydi)
+    let reminders = prefetchedReminders || [];
+    if (!prefetchedReminders) {
+        try {
+            reminders = await apiRequest(`/api/debts/${debt.id}/reminders`);
+        } catch (e) {
+            console.log('Eslatmalar olinmadi');
+        }
     }
     
     container.innerHTML = `
@@ -2542,6 +2597,9 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Background'da data yuklash (non-blocking)
     (async () => {
         try {
+            // user, tranzaksiyalar va daromad dinamikasi bitta so'rovda
+            await loadBootstrap();
+            
             console.log('User data yuklanmoqda...');
             const userLoaded = await loadUserData();
             console.log('User data yuklandi:', userLoaded);
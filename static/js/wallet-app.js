@@ -1609,63 +1609,62 @@ function hideExportLoading() {
 async function exportData(format) {
     hapticFeedback('medium');
 
-    try {
-        const response = await apiRequest('/api/transactions?limit=10000');
-        const transactions = response.transactions || response || [];
-
-        if (!transactions.length) {
-            alert('Eksport qilish uchun ma\'lumot yo\'q');
-            return;
-        }
+    // Fayl server tomonda yaratiladi va botga yuboriladi: tranzaksiyalar WebView'ga yuklanmaydi
+    await sendExportToTelegram(format);
+}
 
-        let content, filename, mimeType;
-
-        if (format === 'csv') {
-            // Create CSV
-            const headers = ['Sana', 'Turi', 'Kategoriya', 'Summa', 'Valyuta', 'Tavsif'];
-            const rows = transactions.map(t => [
-                t.created_at || '',
-                t.transaction_type === 'income' ? 'Kirim' : 'Chiqim',
-                t.category || '',
-                t.amount || 0,
-                t.currency || 'UZS',
-                (t.description || '').replace(/,/g, ';')
-            ]);
-            content = [headers.join(','), ...rows.map(r => r.join(','))].join('\n');
-            filename = `balans_ai_export_${new Date().toISOString().split('T')[0]}.csv`;
-            mimeType = 'text/csv;charset=utf-8;';
-        } else {
-            // Create JSON
-            content = JSON.stringify(transactions, null, 2);
-            filename = `balans_ai_export_${new Date().toISOString().split('T')[0]}.json`;
-            mimeType = 'application/json;charset=utf-8;';
+// Eksport job holatini kutish (done, failed yoki vaqt tugasa oxirgi holat)
+async function waitForExportJob(statusUrl, initData, testUserId, timeoutMs = 20000) {
+    let url = statusUrl;
+    if (testUserId && !initData) {
+        url += `?test_user_id=${testUserId}`;
+    }
+    const deadline = Date.now() + timeoutMs;
+    let job = { status: 'queued' };
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        try {
+            const response = await fetch(url, { headers: { 'X-Telegram-Init-Data': initData || '' } });
+            if (!response.ok) break;
+            job = await response.json();
+        } catch (error) {
+            break;
         }
-
-        // Send file to Telegram bot
-        await sendFileToTelegram(content, filename, mimeType, transactions.length);
-
-    } catch (error) {
-        hapticFeedback('error');
-        alert('Eksport xatosi: ' + error.message);
+        if (job.status === 'done' || job.status === 'failed') break;
     }
+    return job;
 }
 
-async function sendFileToTelegram(content, filename, mimeType, count) {
+// Server eksportini (/api/export) to'g'ridan-to'g'ri yuklab olish
+async function downloadServerExport(format, initData, testUserId) {
+    let url = `/api/export?format=${format}`;
+    if (testUserId && !initData) {
+        url += `&test_user_id=${testUserId}`;
+    }
+    const response = await fetch(url, { headers: { 'X-Telegram-Init-Data': initData || '' } });
+    if (!response.ok) {
+        throw new Error('Eksport yuklab olinmadi');
+    }
+    const disposition = response.headers.get('Content-Disposition') || '';
+    const match = disposition.match(/filename="([^"]+)"/);
+    const blob = await response.blob();
+    const blobUrl = URL.createObjectURL(blob);
+    const link = document.createElement('a');
+    link.href = blobUrl;
+    link.download = match ? match[1] : `balans_ai_export.${format}`;
+    link.click();
+    URL.revokeObjectURL(blobUrl);
+}
+
+async function sendExportToTelegram(format) {
     // Show loading animation
     showExportLoading();
-    
-    try {
-        // Create blob and FormData
-        const blob = new Blob([content], { type: mimeType });
-        const formData = new FormData();
-        formData.append('file', blob, filename);
-        formData.append('caption', `📊 Balans AI Eksport\n\n📁 Fayl: ${filename}\n📝 Tranzaksiyalar: ${count} ta\n📅 Sana: ${new Date().toLocaleDateString('uz-UZ')}`);
 
-        // Send to API endpoint that forwards to Telegram
-        const initData = getInitData();
-        const params = new URLSearchParams(window.location.search);
-        const testUserId = params.get('test_user_id');
+    const initData = getInitData();
+    const params = new URLSearchParams(window.location.search);
+    const testUserId = params.get('test_user_id');
 
+    try {
         let url = '/api/export/telegram';
         if (testUserId && !initData) {
             url += `?test_user_id=${testUserId}`;
@@ -1674,49 +1673,59 @@ async function sendFileToTelegram(content, filename, mimeType, count) {
         const response = await fetch(url, {
             method: 'POST',
             headers: {
+                'Content-Type': 'application/json',
                 'X-Telegram-Init-Data': initData || ''
             },
-            body: formData
+            body: JSON.stringify({
+                format,
+                caption: `📊 Balans AI Eksport\n\n📅 Sana: ${new Date().toLocaleDateString('uz-UZ')}`
+            })
         });
 
+        if (!response.ok) {
+            throw new Error('Telegram ga yuborishda xatolik');
+        }
+
+        // Server eksportni navbatga qo'yadi (202), yuborish holatini kutamiz
+        const job = await waitForExportJob((await response.json()).status_url, initData, testUserId);
+        if (job.status === 'failed') {
+            throw new Error(job.last_error || 'Telegram ga yuborishda xatolik');
+        }
+
         // Hide loading animation
         hideExportLoading();
+        hapticFeedback('success');
+        closeExportModal();
 
-        if (response.ok) {
-            hapticFeedback('success');
-            closeExportModal();
-
-            // Show success with Telegram native popup
-            if (tg?.showPopup) {
-                tg.showPopup({
-                    title: 'Muvaffaqiyatli!',
-                    message: `${count} ta tranzaksiya Telegram botga yuborildi. Botni tekshiring!`,
-                    buttons: [{ type: 'ok', text: 'OK' }]
-                });
-            } else {
-                alert(`${count} ta tranzaksiya Telegram botga yuborildi!`);
-            }
+        const message = job.status === 'done'
+            ? `${job.rows ?? 0} ta tranzaksiya Telegram botga yuborildi. Botni tekshiring!`
+            : 'Eksport tayyorlanmoqda, fayl tez orada botga keladi.';
+        // Show success with Telegram native popup
+        if (tg?.showPopup) {
+            tg.showPopup({
+                title: 'Muvaffaqiyatli!',
+                message,
+                buttons: [{ type: 'ok', text: 'OK' }]
+            });
         } else {
-            throw new Error('Telegram ga yuborishda xatolik');
+            alert(message);
         }
 
     } catch (error) {
-        // Hide loading animation on error
-        hideExportLoading();
         console.error('Telegram export error:', error);
 
         // Fallback: download locally
-        const blob = new Blob([content], { type: mimeType });
-        const url = URL.createObjectURL(blob);
-        const link = document.createElement('a');
-        link.href = url;
-        link.download = filename;
-        link.click();
-        URL.revokeObjectURL(url);
-
-        hapticFeedback('success');
-        closeExportModal();
-        alert(`Fayl yuklab olindi. Telegram yuborishda xatolik.`);
+        try {
+            await downloadServerExport(format, initData, testUserId);
+            hideExportLoading();
+            hapticFeedback('success');
+            closeExportModal();
+            alert(`Fayl yuklab olindi. Telegram yuborishda xatolik.`);
+        } catch (downloadError) {
+            hideExportLoading();
+            hapticFeedback('error');
+            alert('Eksport xatosi: ' + downloadError.message);
+        }
     }
 }
 
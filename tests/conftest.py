@@ -0,0 +1,55 @@
+# Testlar repo ildizidagi modullarni import qiladi (DB va tarmoqsiz)
+import os
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+TEST_RATES = {'UZS': 1.0, 'USD': 12500.0, 'EUR': 13500.0}
+
+
+@pytest.fixture
+def fixed_rates(monkeypatch):
+    """Valyuta kurslari DB siz (fon yangilovchi ishga tushmaydi)"""
+    monkeypatch.setattr(database, '_rates_snapshot', database.CurrencyRateSnapshot(dict(TEST_RATES), time.time()))
+    monkeypatch.setattr(database, '_rates_refresher_pid', os.getpid())
+    return TEST_RATES
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch):
+    """database.py helper'lari pool o'rniga SQLite connection'dan foydalanadi (sqlite_db.py)"""
+    from sqlite_db import SQLiteConnection
+    connection = SQLiteConnection()
+    monkeypatch.setattr(database, '_checkout_connection', lambda: connection)
+    database.reset_schema_cache()
+    yield connection
+    database.reset_schema_cache()
+    connection.dispose()
+
+
+@pytest.fixture
+def client(monkeypatch, fixed_rates):
+    """Flask test client: DEBUG rejimi (test_user_id) va har bir test uchun bo'sh javob cache'i"""
+    import app as app_module
+    import cache
+    monkeypatch.setattr(app_module.Config, 'DEBUG', True)
+    monkeypatch.setattr(cache, '_cache', cache.LocalLRUCache(1 << 20, 60))
+    monkeypatch.setattr(cache, '_cache_pid', os.getpid())
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def balance_calls(monkeypatch):
+    """/api/balance uchun: get_balance chaqiruvlari soni, data_version testda boshqariladi"""
+    import app as app_module
+    calls = []
+    version = {'token': '1:10', 'updated_at': datetime(2025, 6, 18, 12, 0)}
+    monkeypatch.setattr(app_module, 'get_user_data_version', lambda user_id: dict(version))
+    monkeypatch.setattr(app_module, 'get_balance', lambda user_id: calls.append(user_id) or 1000.0)
+    return calls, version
@@ -0,0 +1,181 @@
+# database.py helper'larini DB serversiz tekshirish: MySQL so'rovlari SQLite'ga o'giriladi
+#
+# Faqat testlarda ishlatiladigan sxema va database.py dagi so'rov/trigger shakllari qo'llab-quvvatlanadi.
+# Trigger tanalari (database._TRANSACTION_TRIGGERS) o'zgartirilmasdan shu yerda yaratiladi va bajariladi.
+import re
+import sqlite3
+from datetime import date, datetime
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' '))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+
+SCHEMA = """
+    CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        transaction_type TEXT NOT NULL,
+        amount REAL NOT NULL,
+        currency TEXT NOT NULL DEFAULT 'UZS',
+        category TEXT,
+        description TEXT,
+        due_date DATE,
+        debt_direction TEXT,
+        category_contact_id INTEGER,
+        created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE debts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        status TEXT NOT NULL DEFAULT 'active'
+    );
+    CREATE TABLE transaction_daily_rollups (
+        user_id INTEGER NOT NULL,
+        day DATE NOT NULL,
+        transaction_type TEXT NOT NULL,
+        currency TEXT NOT NULL,
+        category TEXT NOT NULL DEFAULT '',
+        tx_count INTEGER NOT NULL DEFAULT 0,
+        total_amount REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, transaction_type, currency, category)
+    );
+    CREATE TABLE user_balances (
+        user_id INTEGER NOT NULL,
+        currency TEXT NOT NULL,
+        income_total REAL NOT NULL DEFAULT 0,
+        expense_total REAL NOT NULL DEFAULT 0,
+        debt_total REAL NOT NULL DEFAULT 0,
+        tx_count INTEGER NOT NULL DEFAULT 0,
+        income_count INTEGER NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        debt_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, currency)
+    );
+    CREATE TABLE report_snapshots (
+        user_id INTEGER NOT NULL,
+        period_type TEXT NOT NULL,
+        period_start DATE NOT NULL,
+        payload TEXT NOT NULL,
+        created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, period_type, period_start)
+    );
+    CREATE TABLE aggregate_state (
+        table_name TEXT PRIMARY KEY,
+        ready_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# (MySQL shakli, SQLite shakli) - tartib muhim
+_REWRITES = [
+    (r"SHOW TABLES LIKE %s", "SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s"),
+    (r"SHOW COLUMNS FROM (\w+) LIKE %s", r"SELECT name FROM pragma_table_info('\1') WHERE name = %s"),
+    (r"TRIGGER_NAME as name FROM information_schema\.TRIGGERS\s+WHERE TRIGGER_SCHEMA = DATABASE\(\)",
+     "name FROM sqlite_master WHERE type = 'trigger'"),
+    (r"INSERT IGNORE", "INSERT OR IGNORE"),
+    (r"ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET"),
+    (r"\bVALUES\((\w+)\)", r"excluded.\1"),
+    (r"\bIF\(", "IIF("),
+    (r"\bLEAST\(", "MIN("),
+    (r"DATE\((\w+\.created_at)\) - INTERVAL \(DAYOFMONTH\(\1\) - 1\) DAY", r"DATE(\1, 'start of month')"),
+    (r"MAKEDATE\(YEAR\((\w+\.created_at)\), 1\)", r"DATE(\1, 'start of year')"),
+    (r"LOCK IN SHARE MODE", ""),
+    (r"%s", "?"),
+]
+_REWRITES = [(re.compile(pattern), replacement) for pattern, replacement in _REWRITES]
+# SQLite'da ma'nosi yo'q buyruqlar
+_IGNORED = ('START TRANSACTION', 'CREATE TABLE IF NOT EXISTS', 'ALTER TABLE')
+
+
+def to_sqlite(sql):
+    sql = ' '.join(sql.split())
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _convert_row(row):
+    """MIN(created_at) kabi ifodalarda SQLite ustun turini yo'qotadi: *_at matnlari datetime'ga"""
+    for key, value in row.items():
+        if key.endswith('_at') and isinstance(value, str):
+            row[key] = datetime.fromisoformat(value)
+    return row
+
+
+class SQLiteCursor:
+    """PyMySQL DictCursor o'rnida: qatorlar dict (record_type berilsa record obyektlari), lastrowid va rowcount"""
+
+    def __init__(self, connection, record_type=None):
+        self.connection = connection
+        self.record_type = record_type
+        self._cursor = connection.raw.cursor()
+        self._rows = []
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(' '.join(sql.split()))
+        if sql.strip().upper().startswith(_IGNORED):
+            self._rows = []
+            return 0
+        self._cursor.execute(to_sqlite(sql), tuple(params or ()))
+        columns = [column[0] for column in self._cursor.description or ()]
+        if self.record_type is not None:
+            self._rows = [self.record_type(*row) for row in self._cursor.fetchall()]
+        else:
+            self._rows = [_convert_row(dict(zip(columns, row))) for row in self._cursor.fetchall()]
+        self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount if self._cursor.rowcount >= 0 else len(self._rows)
+        return self.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        for params in seq_of_params:
+            self.execute(sql, params)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Pool connection'i o'rnida (close() connection'ni yopmaydi, test oxirida dispose())"""
+
+    def __init__(self):
+        self.raw = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None)
+        self.raw.executescript(SCHEMA)
+        self.statements = []
+
+    def cursor(self, cursor_class=None):
+        # TransactionCursor va shunga o'xshashlar: qatorlar record_type obyektlari
+        return SQLiteCursor(self, getattr(cursor_class, 'record_type', None))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def dispose(self):
+        self.raw.close()
+
+    def execute(self, sql, params=()):
+        """Test ma'lumotlarini to'g'ridan-to'g'ri yozish (bot kabi, helper'larsiz)"""
+        with self.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.lastrowid
@@ -0,0 +1,82 @@
+import pytest
+from flask import Response
+
+import app as app_module
+
+
+@pytest.fixture
+def batch(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'get_user_data_version', lambda user_id: None)
+    monkeypatch.setattr(app_module, 'get_debts', lambda user_id, contact_id=None: [{'id': 1, 'contact_id': contact_id}])
+    monkeypatch.setattr(app_module, 'get_contacts', lambda user_id: [{'id': 3}])
+
+    def post(requests):
+        return client.post('/api/batch?test_user_id=7', json={'requests': requests})
+    return post
+
+
+def test_results_follow_request_order(batch):
+    response = batch([
+        {'path': '/api/contacts'},
+        {'path': '/api/nope'},
+        {'path': '/api/debts', 'params': {'contact_id': 3}},
+        {'path': 'debts'},
+        {'path': '/api/config'},
+    ])
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [200, 404, 200, 400, 200]
+    assert results[0]['body'] == [{'id': 3}]
+    assert results[2]['body'] == [{'id': 1, 'contact_id': 3}]
+    # Server-Timing faqat bajarilgan elementlar uchun (indeks bo'yicha)
+    assert [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')] == [
+        'item0', 'item1', 'item2', 'item4',
+    ]
+
+
+@pytest.mark.parametrize('path', [
+    '/api/batch',
+    '/api/bootstrap?sections=debts',
+    '/api/admin/cache-stats',
+    '/api/export?format=csv',
+    '/api/export/jobs/abc',
+])
+def test_forbidden_paths(batch, path):
+    result = batch([{'path': path}]).get_json()['results'][0]
+    assert result['status'] == 400
+    assert 'batch orqali chaqirilmaydi' in result['error']
+
+
+@pytest.mark.parametrize('item', [
+    'not-an-object',
+    {'path': 'http://example.com/api/debts'},
+    {'path': '/api/debts', 'params': ['contact_id']},
+])
+def test_invalid_items(batch, item):
+    assert batch([item]).get_json()['results'][0]['status'] == 400
+
+
+def test_request_list_limits(batch, monkeypatch):
+    assert batch([]).status_code == 400
+    monkeypatch.setattr(app_module.Config, 'BATCH_MAX_ITEMS', 2)
+    assert batch([{'path': '/api/config'}] * 3).status_code == 400
+    assert batch([{'path': '/api/config'}] * 2).status_code == 200
+
+
+def test_streamed_response_is_not_read(batch, monkeypatch):
+    consumed = []
+
+    def chunks():
+        consumed.append(True)
+        yield b'{}'
+
+    monkeypatch.setitem(app_module.app.view_functions, 'get_config',
+                        lambda: Response(chunks(), mimetype='application/json'))
+    result = batch([{'path': '/api/config'}]).get_json()['results'][0]
+    assert result['status'] == 406
+    assert consumed == []
+
+
+def test_non_json_response_is_rejected(batch, monkeypatch):
+    monkeypatch.setitem(app_module.app.view_functions, 'get_config', lambda: Response('<html>', mimetype='text/html'))
+    assert batch([{'path': '/api/config'}]).get_json()['results'][0]['status'] == 406
@@ -0,0 +1,61 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def sections(client, monkeypatch):
+    """Bo'limlar DB o'rniga shu funksiyalardan o'qiydi; data_version chaqiruvlari sanaladi"""
+    version_calls = []
+    monkeypatch.setattr(app_module, 'get_user_data_version', lambda user_id: version_calls.append(user_id))
+    monkeypatch.setattr(app_module, 'get_user', lambda user_id: None)
+    monkeypatch.setattr(app_module, 'get_debts', lambda user_id, contact_id=None: [{'id': 1, 'user_id': user_id}])
+    monkeypatch.setattr(app_module, 'get_contacts', lambda user_id: [{'id': 3, 'name': 'Ali'}])
+    return version_calls
+
+
+def _bootstrap(client, query=''):
+    return client.get(f'/api/bootstrap?test_user_id=7{query}')
+
+
+def test_selected_sections_in_canonical_order(client, sections, fixed_rates):
+    response = _bootstrap(client, '&sections=debts,config,currency_rates')
+    assert response.status_code == 200
+    body = response.get_json()
+    # Bo'limlar so'ralgan tartibda emas, BOOTSTRAP_SECTIONS tartibida
+    assert list(body['sections']) == ['config', 'currency_rates', 'debts']
+    assert body['sections']['currency_rates'] == fixed_rates
+    assert body['sections']['debts'] == [{'id': 1, 'user_id': 7}]
+    assert body['errors'] == {}
+    assert response.headers['Cache-Control'] == 'private, no-store'
+    assert [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')] == [
+        'config', 'currency_rates', 'debts',
+    ]
+
+
+def test_unknown_section_is_rejected(client, sections):
+    response = _bootstrap(client, '&sections=debts,nope')
+    assert response.status_code == 400
+    assert response.get_json()['available'] == list(app_module.BOOTSTRAP_SECTIONS)
+
+
+def test_section_errors_are_isolated(client, sections, monkeypatch):
+    def broken_contacts(user_id):
+        raise RuntimeError('contacts down')
+
+    monkeypatch.setattr(app_module, 'get_contacts', broken_contacts)
+    body = _bootstrap(client, '&sections=user,contacts,debts').get_json()
+    assert body['sections'] == {'debts': [{'id': 1, 'user_id': 7}]}
+    assert body['errors']['contacts'] == {'status': 500, 'error': 'contacts down'}
+    assert body['errors']['user']['status'] == 404
+    assert body['errors']['user']['code'] == 'USER_NOT_FOUND'
+
+
+def test_data_version_is_read_once(client, sections):
+    _bootstrap(client, '&sections=user,contacts,debts')
+    assert sections == [7]
+
+
+def test_bootstrap_requires_auth(client, sections, monkeypatch):
+    monkeypatch.setattr(app_module.Config, 'DEBUG', False)
+    assert client.get('/api/bootstrap').status_code == 401
@@ -0,0 +1,101 @@
+import gzip
+import os
+
+import pytest
+from flask import Flask, Response, jsonify
+
+import compression
+from compression import choose_encoding, init_compression, parse_accept_encoding, precompressed_variant
+
+BIG = {'items': ['qiymat'] * 400}
+
+
+@pytest.fixture
+def compress_client(monkeypatch):
+    """Faqat gzip (brotli o'rnatilgan-o'rnatilmaganidan qat'i nazar) va 1 KB chegara"""
+    monkeypatch.setattr(compression, 'brotli', None)
+    monkeypatch.setattr(compression.Config, 'COMPRESS_ENABLED', True)
+    monkeypatch.setattr(compression.Config, 'COMPRESS_MIN_SIZE', 1024)
+    app = Flask(__name__)
+
+    @app.route('/big')
+    def big():
+        response = jsonify(BIG)
+        response.set_etag('abc')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        return Response((b'{}' for _ in range(1000)), mimetype='application/json')
+
+    init_compression(app)
+    return app.test_client()
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip, br;q=0.5, identity;q=0, x;q=bad') == {
+        'gzip': 1.0, 'br': 0.5, 'identity': 0.0, 'x': 0.0,
+    }
+    assert parse_accept_encoding(None) == {}
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, br', 'br'),
+    ('gzip', 'gzip'),
+    ('br;q=0.2, gzip;q=0.8', 'gzip'),
+    ('*', 'br'),
+    ('br;q=0, *;q=0.5', 'gzip'),
+    ('identity', None),
+    ('', None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header, available=('br', 'gzip')) == expected
+
+
+def test_large_json_is_gzipped(compress_client):
+    response = compress_client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.get_data()) == compress_client.get('/big').get_data()
+    # Siqilgan javobda ETag weak bo'ladi
+    assert response.headers['ETag'] == 'W/"abc"'
+
+
+def test_without_accept_encoding_body_is_plain(compress_client):
+    response = compress_client.get('/big')
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == '"abc"'
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_small_and_streamed_responses_are_not_compressed(compress_client):
+    for path in ('/small', '/stream'):
+        response = compress_client.get(path, headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers, path
+
+
+def test_threshold_is_configurable(compress_client, monkeypatch):
+    monkeypatch.setattr(compression.Config, 'COMPRESS_MIN_SIZE', 1)
+    response = compress_client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    # Juda kichik body siqilganda kattalashadi, shuning uchun o'zgarmaydi
+    assert 'Content-Encoding' not in response.headers
+    monkeypatch.setattr(compression.Config, 'COMPRESS_MIN_SIZE', 10 ** 6)
+    assert 'Content-Encoding' not in compress_client.get('/big', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_precompressed_variant(tmp_path):
+    source = tmp_path / 'app.js'
+    source.write_text('x' * 2000)
+    (tmp_path / 'app.js.gz').write_bytes(gzip.compress(source.read_bytes()))
+
+    assert precompressed_variant(str(tmp_path), 'app.js', 'gzip, br') == ('gzip', 'app.js.gz')
+    assert precompressed_variant(str(tmp_path), 'app.js', 'br') is None
+    assert precompressed_variant(str(tmp_path), '../app.js', 'gzip') is None
+    # Manba variantdan yangi bo'lsa eski variant ishlatilmaydi
+    stat = os.stat(source)
+    os.utime(tmp_path / 'app.js.gz', (stat.st_atime, stat.st_mtime - 10))
+    assert precompressed_variant(str(tmp_path), 'app.js', 'gzip') is None
@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+import pytest
+
+import database
+from database import convert_totals_to_uzs
+
+
+def test_known_currencies(fixed_rates):
+    assert convert_totals_to_uzs([1000, 2, 3], ['UZS', 'USD', 'EUR']) == [1000.0, 25000.0, 40500.0]
+
+
+def test_unknown_currency_uses_rate_one(fixed_rates):
+    assert convert_totals_to_uzs([7, 2, 5], ['GBP', 'USD', '']) == [7.0, 25000.0, 5.0]
+
+
+def test_none_currency_is_unknown(fixed_rates):
+    assert convert_totals_to_uzs([3], [None]) == [3.0]
+
+
+def test_empty_input(fixed_rates):
+    assert convert_totals_to_uzs([], []) == []
+
+
+def test_decimal_and_string_totals(fixed_rates):
+    assert convert_totals_to_uzs([Decimal('1.50'), '2'], ['USD', 'XYZ']) == [18750.0, 2.0]
+
+
+@pytest.mark.skipif(database.np is None, reason="NumPy o'rnatilmagan")
+def test_vectorized_path_matches_python_path(fixed_rates):
+    count = database._NUMPY_MIN_ROWS * 2
+    currencies = [('UZS', 'USD', 'EUR', 'KZT', None)[i % 5] for i in range(count)]
+    totals = [float(i) for i in range(count)]
+    expected = [total * fixed_rates.get(code, 1.0) for total, code in zip(totals, currencies)]
+    assert convert_totals_to_uzs(totals, currencies) == pytest.approx(expected)
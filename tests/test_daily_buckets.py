@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+from database import _bucket_daily_rows
+
+
+def _by_key(results):
+    return {(row['date'], row['transaction_type'], row['currency'], row['category']): (row['count'], row['total'])
+            for row in results}
+
+
+def test_empty_input():
+    assert _bucket_daily_rows(iter([])) == []
+
+
+def test_same_day_rows_are_summed():
+    rows = [
+        (datetime(2025, 3, 10, 8, 0), 'expense', 'UZS', 'Kafe', 10000.0),
+        (datetime(2025, 3, 10, 13, 30), 'expense', 'UZS', 'Kafe', 25000.0),
+        (datetime(2025, 3, 10, 18, 0), 'income', 'USD', 'Ish', 100.0),
+    ]
+    assert _by_key(_bucket_daily_rows(rows)) == {
+        (date(2025, 3, 10), 'expense', 'UZS', 'Kafe'): (2, 35000.0),
+        (date(2025, 3, 10), 'income', 'USD', 'Ish'): (1, 100.0),
+    }
+
+
+def test_days_without_rows_are_not_emitted():
+    rows = [
+        (datetime(2025, 3, 1, 12, 0), 'expense', 'UZS', 'Kafe', 1.0),
+        (datetime(2025, 3, 5, 12, 0), 'expense', 'UZS', 'Kafe', 2.0),
+    ]
+    assert [row['date'] for row in _bucket_daily_rows(rows)] == [date(2025, 3, 1), date(2025, 3, 5)]
+
+
+def test_month_boundary_splits_at_midnight():
+    rows = [
+        (datetime(2025, 1, 31, 23, 59, 59), 'expense', 'UZS', 'Kafe', 5.0),
+        (datetime(2025, 2, 1, 0, 0, 0), 'expense', 'UZS', 'Kafe', 7.0),
+        (datetime(2025, 2, 28, 23, 0), 'expense', 'UZS', 'Kafe', 1.0),
+        (datetime(2025, 3, 1, 0, 30), 'expense', 'UZS', 'Kafe', 2.0),
+    ]
+    assert _by_key(_bucket_daily_rows(rows)) == {
+        (date(2025, 1, 31), 'expense', 'UZS', 'Kafe'): (1, 5.0),
+        (date(2025, 2, 1), 'expense', 'UZS', 'Kafe'): (1, 7.0),
+        (date(2025, 2, 28), 'expense', 'UZS', 'Kafe'): (1, 1.0),
+        (date(2025, 3, 1), 'expense', 'UZS', 'Kafe'): (1, 2.0),
+    }
+
+
+def test_year_boundary_splits_at_midnight():
+    rows = [
+        (datetime(2024, 12, 31, 22, 0), 'income', 'UZS', None, 100.0),
+        (datetime(2024, 12, 31, 23, 59, 59, 999999), 'income', 'UZS', None, 50.0),
+        (datetime(2025, 1, 1, 0, 0), 'income', 'UZS', None, 20.0),
+    ]
+    assert _by_key(_bucket_daily_rows(rows)) == {
+        (date(2024, 12, 31), 'income', 'UZS', None): (2, 150.0),
+        (date(2025, 1, 1), 'income', 'UZS', None): (1, 20.0),
+    }
+
+
+def test_leap_day():
+    rows = [
+        (datetime(2024, 2, 28, 23, 0), 'expense', 'EUR', 'Kiyim', 3.0),
+        (datetime(2024, 2, 29, 1, 0), 'expense', 'EUR', 'Kiyim', 4.0),
+        (datetime(2024, 3, 1, 1, 0), 'expense', 'EUR', 'Kiyim', 5.0),
+    ]
+    assert [row['date'] for row in _bucket_daily_rows(rows)] == [date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1)]
@@ -0,0 +1,55 @@
+import app as app_module
+
+
+def test_version_etag_and_validators(client, balance_calls):
+    response = client.get('/api/balance?test_user_id=7')
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('"v')
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert response.headers['Last-Modified'] == 'Wed, 18 Jun 2025 12:00:00 GMT'
+
+
+def test_if_none_match_skips_the_view(client, balance_calls):
+    calls, _ = balance_calls
+    etag = client.get('/api/balance?test_user_id=7').headers['ETag']
+    # Javob cache'i tozalansa ham 304 view'siz qaytadi
+    app_module.get_response_cache()._entries.clear()
+
+    response = client.get('/api/balance?test_user_id=7', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert calls == [7]
+
+
+def test_weak_etag_matches(client, balance_calls):
+    etag = client.get('/api/balance?test_user_id=7').headers['ETag']
+    response = client.get('/api/balance?test_user_id=7', headers={'If-None-Match': f'W/{etag}'})
+    assert response.status_code == 304
+
+
+def test_version_change_returns_new_body(client, balance_calls):
+    _, version = balance_calls
+    etag = client.get('/api/balance?test_user_id=7').headers['ETag']
+    version['token'] = '2:11'
+    response = client.get('/api/balance?test_user_id=7', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_etag_depends_on_user_and_params(client, balance_calls):
+    etag = client.get('/api/balance?test_user_id=7').headers['ETag']
+    assert client.get('/api/balance?test_user_id=8', headers={'If-None-Match': etag}).status_code == 200
+    assert client.get('/api/balance?test_user_id=7&x=1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_content_etag(client, monkeypatch):
+    debts = [{'id': 1, 'amount': 500}]
+    monkeypatch.setattr(app_module, 'get_debts', lambda user_id, contact_id=None: list(debts))
+    etag = client.get('/api/debts?test_user_id=7').headers['ETag']
+
+    assert client.get('/api/debts?test_user_id=7', headers={'If-None-Match': etag}).status_code == 304
+    debts.append({'id': 2, 'amount': 100})
+    response = client.get('/api/debts?test_user_id=7', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+import exports
+from models import Transaction
+
+
+def _transactions(count):
+    return [
+        Transaction(index + 1, 7, 'expense' if index % 2 else 'income', Decimal('10.50'), 'USD' if index % 3 else 'UZS',
+                    'Kafe', f"to'lov, {index}", datetime(2025, 6, 1, 9, 30), None, None)
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def export_rows(monkeypatch):
+    """write_export DB o'rniga shu ro'yxatni o'qiydi"""
+    rows = _transactions(3)
+    monkeypatch.setattr(exports, 'iter_export_transactions', lambda user_id, **filters: iter(rows))
+    return rows
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(exports, '_CHUNK_ROWS', 2)
+
+
+def test_csv_framing(fixed_rates, small_chunks):
+    chunks = list(exports.iter_csv(iter(_transactions(5))))
+    assert len(chunks) == 3
+    text = b''.join(chunks).decode('utf-8')
+    assert text.startswith('\ufeff')
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0] == exports.EXPORT_HEADERS
+    assert rows[1] == ['2025-06-01 09:30:00', 'Kirim', 'Kafe', '10.5', 'UZS', '10.5', "to'lov, 0", '1']
+    assert rows[2][4:6] == ['USD', str(10.5 * fixed_rates['USD'])]
+    assert len(rows) == 6
+
+
+def test_ndjson_framing(fixed_rates, small_chunks):
+    chunks = list(exports.iter_ndjson(iter(_transactions(5))))
+    assert len(chunks) == 3
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+    records = [json.loads(line) for line in b''.join(chunks).splitlines()]
+    assert [record['id'] for record in records] == [1, 2, 3, 4, 5]
+    assert records[1]['amount_uzs'] == 10.5 * fixed_rates['USD']
+    assert records[0]['created_at'].startswith('2025-06-01T09:30:00')
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 5])
+def test_json_is_a_single_array(fixed_rates, small_chunks, count):
+    body = b''.join(exports.iter_json(iter(_transactions(count))))
+    records = json.loads(body)
+    assert [record['id'] for record in records] == list(range(1, count + 1))
+    if count:
+        assert records[0]['amount_uzs'] == 10.5
+        assert records[0]['description'] == "to'lov, 0"
+
+
+def test_json_and_ndjson_records_match(fixed_rates):
+    rows = _transactions(4)
+    ndjson = [json.loads(line) for line in b''.join(exports.iter_ndjson(iter(rows))).splitlines()]
+    assert json.loads(b''.join(exports.iter_json(iter(rows)))) == ndjson
+
+
+def test_formats_have_own_content_types():
+    assert exports.check_export_format('json') == ('application/json', 'json')
+    assert exports.check_export_format('ndjson') == ('application/x-ndjson', 'jsonl')
+    with pytest.raises(exports.ExportError):
+        exports.check_export_format('pdf')
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'json', 'ndjson'])
+def test_write_export_counts_rows(fixed_rates, export_rows, tmp_path, export_format):
+    path = tmp_path / f"export.{export_format}"
+    assert exports.write_export(7, export_format, {}, str(path)) == len(export_rows)
+    assert path.read_bytes() == b''.join(exports.iter_export(7, export_format, {}))
+
+
+def test_write_export_xlsx(fixed_rates, export_rows, tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    path = tmp_path / 'export.xlsx'
+    assert exports.write_export(7, 'xlsx', {}, str(path)) == 3
+    sheet = openpyxl.load_workbook(path).active
+    values = list(sheet.values)
+    assert list(values[0]) == exports.EXPORT_HEADERS
+    assert len(values) == 4
+    assert values[1][1:5] == ('Kirim', 'Kafe', 10.5, 'UZS')
+
+
+@pytest.mark.parametrize('export_format, mimetype, extension', [
+    ('json', 'application/json', 'json'),
+    ('ndjson', 'application/x-ndjson', 'jsonl'),
+])
+def test_export_endpoint_serves_json_and_ndjson(client, export_rows, export_format, mimetype, extension):
+    response = client.get(f'/api/export?test_user_id=7&format={export_format}')
+    assert response.status_code == 200
+    assert response.mimetype == mimetype
+    assert response.headers['Content-Disposition'].endswith(f'.{extension}"')
+    body = response.get_data()
+    records = json.loads(body) if export_format == 'json' else [json.loads(line) for line in body.splitlines()]
+    assert [record['id'] for record in records] == [1, 2, 3]
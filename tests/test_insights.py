@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+
+import pytest
+
+from insights import compute_insights
+
+TODAY = date(2025, 6, 18)
+# insight_window_start(TODAY): 3 ta to'liq bazaviy oy (mart-may) va iyun
+WINDOW_START = date(2025, 3, 1)
+
+
+def _row(day, category, total, count=1, currency='UZS', transaction_type='expense'):
+    return {'date': day, 'transaction_type': transaction_type, 'currency': currency, 'category': category,
+            'count': count, 'total': total}
+
+
+@pytest.fixture
+def planted_rows():
+    """Kunlik agregat qatorlari: fon xarajati, takroriy to'lovlar va ataylab qo'yilgan sakrashlar"""
+    rows = []
+    day = WINDOW_START
+    while day <= TODAY:
+        # Har kuni bir xil fon xarajati (count=2: takroriy to'lov nomzodi emas)
+        rows.append(_row(day, 'Oziq-ovqat', 50000.0, count=2))
+        if day.day == 5:
+            rows.append(_row(day, 'Aloqa', 99000.0))
+        if day.weekday() == 0:
+            rows.append(_row(day, 'Sport', 15.0, currency='USD'))
+        day += timedelta(days=1)
+    # To'xtagan oylik to'lov: oxirgisidan beri oylik oraliqdan ko'p vaqt o'tgan
+    rows += [_row(date(2025, month, 10), 'Obuna', 30000.0) for month in (3, 4, 5)]
+    # Kategoriya sakrashi: bazaviy oylarda oyiga 100k, iyunda 400k
+    rows += [_row(date(2025, month, 20), 'Kafe', 100000.0, count=2) for month in (3, 4, 5)]
+    rows += [_row(date(2025, 6, day), 'Kafe', 100000.0, count=2) for day in (2, 3, 4, 6)]
+    # Kunlik sakrash: oxirgi 7 kun ichida bitta katta xarajat
+    rows.append(_row(date(2025, 6, 17), 'Texnika', 3000000.0))
+    rows.append(_row(date(2025, 6, 1), 'Ish haqi', 8000000.0, transaction_type='income'))
+    return rows
+
+
+def test_empty_input(fixed_rates):
+    result = compute_insights([], [], 0, TODAY)
+    assert result == {
+        'expenseGrowth': None,
+        'topCategory': None,
+        'income': 0.0,
+        'expense': 0.0,
+        'balance': 0.0,
+        'unpaidDebts': 0,
+        'categoryGrowth': [],
+        'anomalies': [],
+        'recurring': [],
+        'recurringMonthlyTotal': 0.0,
+        'burnRate': {'daily': 0.0, 'monthly': 0.0, 'totalBalance': 0.0, 'runwayDays': None},
+    }
+    assert isinstance(result['burnRate']['totalBalance'], float)
+    assert isinstance(result['recurringMonthlyTotal'], float)
+
+
+def test_planted_recurring_payments_are_detected(fixed_rates, planted_rows):
+    recurring = {item['category']: item for item in compute_insights(planted_rows, [], 0, TODAY)['recurring']}
+
+    # Obuna to'xtagan, Texnika bir marta, Oziq-ovqat va Kafe kunlik agregatda yagona emas
+    assert set(recurring) == {'Aloqa', 'Sport'}
+    monthly = recurring['Aloqa']
+    assert (monthly['interval'], monthly['currency'], monthly['amount']) == ('monthly', 'UZS', 99000.0)
+    assert (monthly['occurrences'], monthly['lastDate']) == (4, '2025-06-05')
+    weekly = recurring['Sport']
+    assert (weekly['interval'], weekly['currency'], weekly['amount']) == ('weekly', 'USD', 15.0)
+    assert weekly['amountUzs'] == 15.0 * fixed_rates['USD']
+    assert (weekly['occurrences'], weekly['lastDate'], weekly['nextDate']) == (16, '2025-06-16', '2025-06-23')
+
+
+def test_recurring_monthly_total(fixed_rates, planted_rows):
+    result = compute_insights(planted_rows, [], 0, TODAY)
+    expected = 99000.0 + 15.0 * fixed_rates['USD'] * 52 / 12
+    assert result['recurringMonthlyTotal'] == pytest.approx(expected, abs=0.01)
+
+
+def test_planted_spikes_are_anomalies(fixed_rates, planted_rows):
+    anomalies = compute_insights(planted_rows, [], 0, TODAY)['anomalies']
+
+    daily = [item for item in anomalies if item['type'] == 'daily_spike']
+    assert [(item['date'], item['amount']) for item in daily] == [('2025-06-17', 3050000.0)]
+    assert daily[0]['baseline'] < 100000
+    category = [item for item in anomalies if item['type'] == 'category_spike']
+    # Texnika'ning bazaviy davri yo'q, shuning uchun faqat Kafe
+    assert category == [{'type': 'category_spike', 'category': 'Kafe', 'amount': 400000.0, 'baseline': 100000.0}]
+
+
+def test_no_anomalies_without_spikes(fixed_rates, planted_rows):
+    rows = [row for row in planted_rows if row['category'] not in ('Kafe', 'Texnika')]
+    assert compute_insights(rows, [], 0, TODAY)['anomalies'] == []
+
+
+def test_planted_burn_rate_runway(fixed_rates, planted_rows):
+    currency_totals = [
+        {'currency': 'UZS', 'income_total': 20000000, 'expense_total': 5000000},
+        {'currency': 'USD', 'income_total': 100, 'expense_total': 20},
+    ]
+    burn_rate = compute_insights(planted_rows, currency_totals, 0, TODAY)['burnRate']
+    # 30 kun (20.05-18.06): fon 30x50k, Aloqa 99k, 4 ta Sport, 5 ta Kafe (20.05 bilan) va Texnika 3M
+    burn = 30 * 50000.0 + 99000.0 + 4 * 15.0 * fixed_rates['USD'] + 5 * 100000.0 + 3000000.0
+    assert burn_rate['daily'] == round(burn / 30, 2)
+    assert burn_rate['totalBalance'] == 15000000.0 + 80 * fixed_rates['USD']
+    assert burn_rate['runwayDays'] == int(burn_rate['totalBalance'] / (burn / 30)) == 82
+
+
+def test_runway_is_none_without_positive_balance(fixed_rates, planted_rows):
+    currency_totals = [{'currency': 'UZS', 'income_total': 1000000, 'expense_total': 3000000}]
+    burn_rate = compute_insights(planted_rows, currency_totals, 0, TODAY)['burnRate']
+    assert burn_rate['totalBalance'] == -2000000.0
+    assert burn_rate['runwayDays'] is None
+
+
+def test_stopped_payment_is_not_recurring(fixed_rates):
+    # Oxirgi oylik to'lovdan keyin bir oraliqdan ko'p vaqt o'tgan
+    days = [date(2025, 1, 5), date(2025, 2, 5), date(2025, 3, 5), date(2025, 4, 5)]
+    rows = [{'date': day, 'transaction_type': 'expense', 'currency': 'UZS', 'category': 'Aloqa',
+             'count': 1, 'total': 99000.0} for day in days]
+    assert compute_insights(rows, [], 0, TODAY)['recurring'] == []
+
+
+def test_burn_rate_runway(fixed_rates):
+    rows = [{'date': TODAY - timedelta(days=offset), 'transaction_type': 'expense', 'currency': 'UZS',
+             'category': 'Kafe', 'count': 2, 'total': 10000.0} for offset in range(30)]
+    currency_totals = [{'currency': 'USD', 'income_total': 100, 'expense_total': 20}]
+    burn_rate = compute_insights(rows, currency_totals, 1, TODAY)['burnRate']
+    assert burn_rate['daily'] == 10000.0
+    assert burn_rate['totalBalance'] == 80 * fixed_rates['USD']
+    assert burn_rate['runwayDays'] == 100
@@ -0,0 +1,174 @@
+import io
+import os
+import threading
+import time
+from datetime import date
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import jobs
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    """Job'lar vaqtinchalik papkada, fon worker'lari ishga tushmaydi"""
+    monkeypatch.setattr(jobs.Config, 'EXPORT_JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(jobs, '_workers_pid', os.getpid())
+    return tmp_path
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Telegram'ga yuborilgan payload'lar"""
+    deliveries = []
+
+    def send(job):
+        with open(jobs._job_path(job['job_id'], 'payload'), 'rb') as f:
+            deliveries.append((job['job_id'], f.read()))
+    monkeypatch.setattr(jobs, 'send_telegram_document', send)
+    return deliveries
+
+
+def _enqueue(user_id=7, data=b'a,b\n'):
+    return jobs.enqueue_telegram_document(user_id, FileStorage(io.BytesIO(data), 'export.csv', content_type='text/csv'), 'Eksport')
+
+
+def _age_claim(job_id, seconds):
+    path = jobs._job_path(job_id, 'claim')
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_claim_is_exclusive(job_dir):
+    job_id = _enqueue()
+    token = jobs._claim(job_id)
+    assert token is not None
+    assert jobs._claim(job_id) is None
+    assert jobs._owns_claim(job_id, token)
+    jobs._release(job_id, token)
+    assert not os.path.exists(jobs._job_path(job_id, 'claim'))
+
+
+def test_stale_claim_is_taken_over(job_dir):
+    job_id = _enqueue()
+    old_token = jobs._claim(job_id)
+    _age_claim(job_id, jobs._claim_stale_after() + 1)
+
+    new_token = jobs._claim(job_id)
+    assert new_token not in (None, old_token)
+    assert not jobs._owns_claim(job_id, old_token)
+    # Eski egasi yangi claim'ni o'chirmaydi
+    jobs._release(job_id, old_token)
+    assert jobs._owns_claim(job_id, new_token)
+
+
+def test_heartbeat_keeps_claim_fresh_until_lost(job_dir, monkeypatch):
+    monkeypatch.setattr(jobs, '_CLAIM_HEARTBEAT_INTERVAL', 0.01)
+    job_id = _enqueue()
+    token = jobs._claim(job_id)
+    _age_claim(job_id, 1000)
+    stop = threading.Event()
+    thread = threading.Thread(target=jobs._heartbeat, args=(job_id, token, stop))
+    thread.start()
+    try:
+        deadline = time.time() + 2
+        while time.time() - os.stat(jobs._job_path(job_id, 'claim')).st_mtime > 100 and time.time() < deadline:
+            time.sleep(0.01)
+        assert time.time() - os.stat(jobs._job_path(job_id, 'claim')).st_mtime < 100
+        # Claim boshqa worker'ga o'tsa heartbeat to'xtaydi
+        with open(jobs._job_path(job_id, 'claim'), 'w') as f:
+            f.write('other')
+        thread.join(2)
+        assert not thread.is_alive()
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_process_job_delivers_once(job_dir, sent):
+    job_id = _enqueue(data=b'payload')
+    assert jobs.process_job(job_id)
+    assert sent == [(job_id, b'payload')]
+    status = jobs.get_job_status(job_id, 7)
+    assert (status['status'], status['attempts'], status['last_error']) == ('done', 1, None)
+    assert not os.path.exists(jobs._job_path(job_id, 'payload'))
+    assert not os.path.exists(jobs._job_path(job_id, 'claim'))
+    # Tugagan job qayta yuborilmaydi
+    assert not jobs.process_job(job_id)
+    assert len(sent) == 1
+
+
+def test_claimed_job_is_skipped(job_dir, sent):
+    job_id = _enqueue()
+    jobs._claim(job_id)
+    assert not jobs.process_job(job_id)
+    assert sent == []
+
+
+def test_claim_lost_before_send_is_not_delivered(job_dir, sent, monkeypatch):
+    job_id = _enqueue()
+
+    def taken_over(job):
+        with open(jobs._job_path(job['job_id'], 'claim'), 'w') as f:
+            f.write('other-worker')
+    monkeypatch.setattr(jobs, '_prepare_payload', taken_over)
+    jobs.process_job(job_id)
+    assert sent == []
+    # Yangi egasining claim'i joyida qoladi
+    assert jobs._owns_claim(job_id, 'other-worker')
+
+
+def test_retryable_error_requeues_with_backoff(job_dir, monkeypatch):
+    def fail(job):
+        raise jobs.RetryableDeliveryError('502: Bad Gateway')
+    monkeypatch.setattr(jobs, 'send_telegram_document', fail)
+    monkeypatch.setattr(jobs.Config, 'EXPORT_JOB_BACKOFF', 60)
+    job_id = _enqueue()
+
+    jobs.process_job(job_id)
+    status = jobs.get_job_status(job_id, 7)
+    assert (status['status'], status['attempts'], status['last_error']) == ('queued', 1, '502: Bad Gateway')
+    assert status['next_attempt_at'] >= time.time() + 55
+    # Vaqti kelmagan job ishlanmaydi
+    assert not jobs.process_job(job_id)
+    assert jobs._due_jobs() == []
+
+
+def test_permanent_error_fails_job(job_dir, monkeypatch):
+    def fail(job):
+        raise jobs.PermanentDeliveryError('400: chat not found')
+    monkeypatch.setattr(jobs, 'send_telegram_document', fail)
+    job_id = _enqueue()
+    jobs.process_job(job_id)
+    assert jobs.get_job_status(job_id, 7)['status'] == 'failed'
+
+
+def test_export_payload_is_written_once(job_dir, monkeypatch):
+    writes = []
+    deliveries = []
+
+    def write_export(user_id, export_format, filters, path):
+        writes.append((user_id, export_format, filters))
+        with open(path, 'wb') as f:
+            f.write(b'[]\n')
+        return 0
+
+    def send(job):
+        deliveries.append(job['job_id'])
+        if len(deliveries) == 1:
+            raise jobs.RetryableDeliveryError('timeout')
+
+    monkeypatch.setattr(jobs, 'write_export', write_export)
+    monkeypatch.setattr(jobs, 'send_telegram_document', send)
+    monkeypatch.setattr(jobs.Config, 'EXPORT_JOB_BACKOFF', 0)
+
+    job_id = jobs.enqueue_telegram_export(7, 'json', {'date_from': '2025-06-01'}, 'Eksport')
+    jobs.process_job(job_id)
+    jobs.process_job(job_id)
+    # Qayta urinishda oldingi urinishda yozilgan fayl yuboriladi
+    assert len(deliveries) == 2
+    assert writes == [(7, 'json', {'date_from': date(2025, 6, 1)})]
+    status = jobs.get_job_status(job_id, 7)
+    assert (status['status'], status['attempts'], status['rows']) == ('done', 2, 0)
+    assert jobs.get_job_status(job_id, 8) is None
@@ -0,0 +1,73 @@
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+import json_provider
+from json_provider import FastJSONProvider, json_default
+from models import Transaction
+
+TRANSACTION = Transaction(5, 7, 'expense', Decimal('12500.75'), 'UZS', 'Kafe', None,
+                          datetime(2025, 6, 1, 9, 30, 15), date(2025, 7, 1), None)
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def json_app(request, monkeypatch):
+    """Provider ikkala yo'lda ham tekshiriladi: orjson bilan va usiz"""
+    if request.param == 'orjson':
+        if json_provider.orjson is None:
+            pytest.skip("orjson o'rnatilmagan")
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+
+def test_decimal_datetime_and_timedelta(json_app):
+    body = json_app.json.dumps_bytes({
+        'amount': Decimal('10.25'),
+        'created_at': datetime(2025, 6, 1, 9, 30),
+        'day': date(2025, 6, 1),
+        'elapsed': timedelta(minutes=2),
+    })
+    assert json.loads(body) == {
+        'amount': 10.25,
+        'created_at': '2025-06-01T09:30:00',
+        'day': '2025-06-01',
+        'elapsed': 120.0,
+    }
+
+
+def test_transaction_record_is_an_object(json_app):
+    decoded = json.loads(json_app.json.dumps_bytes({'transactions': [TRANSACTION]}))
+    assert decoded['transactions'] == [{
+        'id': 5, 'user_id': 7, 'transaction_type': 'expense', 'amount': 12500.75, 'currency': 'UZS',
+        'category': 'Kafe', 'description': None, 'created_at': '2025-06-01T09:30:15',
+        'due_date': '2025-07-01', 'debt_direction': None,
+    }]
+
+
+def test_keys_are_sorted_and_compact(json_app):
+    assert json_app.json.dumps_bytes({'b': 1, 'a': [1, 2]}) == b'{"a":[1,2],"b":1}'
+
+
+def test_response_is_json_with_newline(json_app):
+    with json_app.app_context():
+        response = json_app.json.response({'amount': Decimal('1.5')})
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == b'{"amount":1.5}\n'
+
+
+def test_big_int_falls_back_to_stdlib():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    assert json.loads(app.json.dumps_bytes({'value': 2 ** 70})) == {'value': 2 ** 70}
+
+
+def test_json_default_fallbacks():
+    assert json_default({3, 3}) == [3]
+    assert json_default(b'abc') == 'abc'
+    assert json_default(object).startswith("<class 'object'>")
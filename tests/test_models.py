@@ -0,0 +1,60 @@
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pymysql
+import pytest
+
+from models import TRANSACTION_COLUMNS, Transaction, TransactionCursor
+
+ROW = (5, 7, 'expense', Decimal('100.00'), 'UZS', 'Kafe', 'tushlik', datetime(2025, 6, 1, 12, 0), None, None)
+
+
+def test_record_has_no_instance_dict():
+    transaction = Transaction(*ROW)
+    assert not hasattr(transaction, '__dict__')
+    with pytest.raises(AttributeError):
+        transaction.note = 'x'
+
+
+def test_dict_style_access():
+    transaction = Transaction(*ROW)
+    assert transaction['amount'] == Decimal('100.00')
+    assert transaction.get('category') == 'Kafe'
+    assert transaction.get('missing', 'default') == 'default'
+    with pytest.raises(KeyError):
+        transaction['missing']
+    assert tuple(transaction.keys()) == Transaction.__slots__
+    assert dict(transaction.items()) == transaction.to_dict()
+    assert dict(transaction) == transaction.to_dict()
+
+
+def test_to_dict_and_equality():
+    transaction = Transaction(*ROW)
+    assert transaction.to_dict() == dict(zip(Transaction.__slots__, ROW))
+    assert transaction == Transaction(*ROW)
+    assert transaction != Transaction(6, *ROW[1:])
+    assert transaction.__json__() == transaction.to_dict()
+
+
+def test_select_columns_follow_slots():
+    assert TRANSACTION_COLUMNS.split(', ') == list(Transaction.__slots__)
+
+
+def _cursor(names):
+    """Ulanmagan cursor, natija ustunlari berilgan"""
+    cursor = TransactionCursor.__new__(TransactionCursor)
+    cursor._result = SimpleNamespace(fields=[SimpleNamespace(name=name) for name in names])
+    return cursor
+
+
+def test_cursor_builds_records_from_tuples():
+    cursor = _cursor(Transaction.__slots__)
+    cursor._check_fields()
+    assert cursor._conv_row(ROW) == Transaction(*ROW)
+    assert cursor._conv_row(None) is None
+
+
+def test_cursor_rejects_mismatched_columns():
+    with pytest.raises(pymysql.err.ProgrammingError):
+        _cursor(('id', 'user_id', 'amount'))._check_fields()
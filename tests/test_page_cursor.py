@@ -0,0 +1,43 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from database import decode_page_cursor, encode_page_cursor, next_page_cursor
+
+
+@pytest.mark.parametrize('created_at, row_id', [
+    (datetime(2025, 3, 10, 8, 0), 1),
+    (datetime(2025, 12, 31, 23, 59, 59, 999999), 123456789),
+    (datetime(2024, 2, 29, 0, 0, 0, 1), 42),
+])
+def test_round_trip(created_at, row_id):
+    cursor = encode_page_cursor(created_at, row_id)
+    assert '=' not in cursor
+    assert decode_page_cursor(cursor) == (created_at, row_id)
+
+
+def _encode(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    '!!!',
+    'not-base64*',
+    _encode(b'2025-03-10T08:00:00'),            # id yo'q
+    _encode(b'2025-03-10T08:00:00|abc'),        # id son emas
+    _encode(b'yesterday|5'),                    # sana noto'g'ri
+    _encode(b'\xff\xfe|5'),                     # UTF-8 emas
+    encode_page_cursor(datetime(2025, 3, 10), 5)[:-3],  # kesilgan
+])
+def test_tampered_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_page_cursor(cursor)
+
+
+def test_next_page_cursor_only_for_full_page():
+    rows = [{'created_at': datetime(2025, 3, 10, 9), 'id': 7}, {'created_at': datetime(2025, 3, 10, 8), 'id': 6}]
+    assert next_page_cursor(rows, 3) is None
+    assert next_page_cursor([], 3) is None
+    assert decode_page_cursor(next_page_cursor(rows, 2)) == (datetime(2025, 3, 10, 8), 6)
@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+import pytest
+
+from database import build_report_snapshots, get_period_report, rebuild_daily_rollups
+
+INSERT_SQL = """
+    INSERT INTO transactions (user_id, transaction_type, amount, currency, category, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def _insert(db, transaction_type, amount, created_at, user_id=1):
+    return db.execute(INSERT_SQL, (user_id, transaction_type, amount, 'UZS', 'Kafe', created_at))
+
+
+def _snapshots(db, user_id=1):
+    """Saqlangan (period_type, period_start) juftlari"""
+    rows = db.raw.execute(
+        "SELECT period_type, period_start FROM report_snapshots WHERE user_id = ? ORDER BY period_type, period_start",
+        (user_id,)
+    ).fetchall()
+    return {(period_type, str(period_start)) for period_type, period_start in rows}
+
+
+@pytest.fixture
+def snapshot_db(sqlite_db, fixed_rates):
+    """2024-yil tranzaksiyalari, kunlik agregatlar va yopilgan davrlar snapshot'lari tayyor"""
+    _insert(sqlite_db, 'income', 1000, datetime(2024, 3, 5, 10))
+    _insert(sqlite_db, 'expense', 200, datetime(2024, 3, 20, 18))
+    _insert(sqlite_db, 'expense', 300, datetime(2024, 4, 2, 9))
+    _insert(sqlite_db, 'expense', 50, datetime(2024, 4, 2, 9), user_id=2)
+    rebuild_daily_rollups()
+    build_report_snapshots()
+    return sqlite_db
+
+
+def test_closed_periods_are_snapshotted(snapshot_db):
+    snapshots = _snapshots(snapshot_db)
+    assert {('month', '2024-03-01'), ('month', '2024-04-01'), ('year', '2024-01-01')} <= snapshots
+    report = get_period_report(1, 'month', at=date(2024, 3, 15))
+    assert (report['totalIncome'], report['totalExpense'], report['transactionCount']) == (1000.0, 200.0, 2)
+    assert [row['id'] for row in report['transactions']] == [2, 1]
+
+
+def test_insert_invalidates_its_month_and_year(snapshot_db):
+    _insert(snapshot_db, 'expense', 75, datetime(2024, 3, 25, 12))
+
+    snapshots = _snapshots(snapshot_db)
+    assert ('month', '2024-03-01') not in snapshots
+    assert ('year', '2024-01-01') not in snapshots
+    assert ('month', '2024-04-01') in snapshots
+    # Boshqa foydalanuvchining snapshot'lari tegilmaydi
+    assert ('year', '2024-01-01') in _snapshots(snapshot_db, user_id=2)
+
+    report = get_period_report(1, 'month', at=date(2024, 3, 15))
+    assert report['totalExpense'] == 275.0
+    # Qayta hisoblangan snapshot yana saqlanadi
+    assert ('month', '2024-03-01') in _snapshots(snapshot_db)
+    assert get_period_report(1, 'year', at=date(2024, 6, 1))['totalExpense'] == 575.0
+
+
+def test_update_invalidates_old_and_new_month(snapshot_db):
+    snapshot_db.execute("UPDATE transactions SET created_at = %s, amount = %s WHERE id = %s",
+                        (datetime(2024, 4, 10, 12), 250, 2))
+
+    snapshots = _snapshots(snapshot_db)
+    assert ('month', '2024-03-01') not in snapshots
+    assert ('month', '2024-04-01') not in snapshots
+    assert get_period_report(1, 'month', at=date(2024, 3, 1))['totalExpense'] == 0.0
+    assert get_period_report(1, 'month', at=date(2024, 4, 1))['totalExpense'] == 550.0
+
+
+def test_delete_invalidates_month(snapshot_db):
+    snapshot_db.execute("DELETE FROM transactions WHERE id = %s", (3,))
+
+    assert ('month', '2024-04-01') not in _snapshots(snapshot_db)
+    assert ('month', '2024-03-01') in _snapshots(snapshot_db)
+    report = get_period_report(1, 'month', at=date(2024, 4, 15))
+    assert (report['totalExpense'], report['transactionCount'], report['transactions']) == (0.0, 0, [])
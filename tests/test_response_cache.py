@@ -0,0 +1,59 @@
+import app as app_module
+import database
+
+
+def test_auth_args_are_not_part_of_the_cache_key(client, balance_calls):
+    calls, _ = balance_calls
+    first = client.get('/api/balance?test_user_id=7&_auth=first&initData=a')
+    second = client.get('/api/balance?test_user_id=7&_auth=second&initData=b')
+
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert second.get_json() == {'balance': 1000.0}
+    assert calls == [7]
+
+
+def test_other_params_are_part_of_the_cache_key(client, balance_calls):
+    calls, _ = balance_calls
+    client.get('/api/balance?test_user_id=7&period=week')
+    assert client.get('/api/balance?test_user_id=7&period=month').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/balance?test_user_id=8&period=week').headers['X-Cache'] == 'MISS'
+    assert calls == [7, 7, 8]
+
+
+def test_data_version_change_invalidates_cached_response(client, balance_calls, monkeypatch):
+    calls, version = balance_calls
+    balances = iter([1000.0, 250.0])
+    monkeypatch.setattr(app_module, 'get_balance', lambda user_id: calls.append(user_id) or next(balances))
+
+    assert client.get('/api/balance?test_user_id=7').get_json() == {'balance': 1000.0}
+    assert client.get('/api/balance?test_user_id=7').headers['X-Cache'] == 'HIT'
+    # Yozuv (trigger) versiyani oshiradi
+    version['token'] = '2:11'
+    response = client.get('/api/balance?test_user_id=7')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json() == {'balance': 250.0}
+    assert calls == [7, 7]
+
+
+def test_degraded_read_is_not_cached(client, balance_calls, monkeypatch):
+    calls, _ = balance_calls
+
+    def failing_balance(user_id):
+        calls.append(user_id)
+        database.mark_degraded_read()
+        return 0
+
+    monkeypatch.setattr(app_module, 'get_balance', failing_balance)
+    first = client.get('/api/balance?test_user_id=7')
+    second = client.get('/api/balance?test_user_id=7')
+    assert 'X-Cache' not in first.headers and 'ETag' not in first.headers
+    assert 'X-Cache' not in second.headers
+    assert calls == [7, 7]
+
+
+def test_no_data_version_means_no_cache(client, balance_calls, monkeypatch):
+    calls, _ = balance_calls
+    monkeypatch.setattr(app_module, 'get_user_data_version', lambda user_id: None)
+    client.get('/api/balance?test_user_id=7')
+    assert 'X-Cache' not in client.get('/api/balance?test_user_id=7').headers
+    assert calls == [7, 7]
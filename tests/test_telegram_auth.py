@@ -0,0 +1,45 @@
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import quote
+
+import pytest
+
+import app as app_module
+
+BOT_TOKEN = '123456:TEST'
+
+
+@pytest.fixture(autouse=True)
+def bot_secret(monkeypatch):
+    monkeypatch.setattr(app_module, '_TELEGRAM_SECRET_KEY', app_module._derive_telegram_secret_key(BOT_TOKEN))
+    app_module._init_data_cache.clear()
+    yield
+    app_module._init_data_cache.clear()
+
+
+def _init_data(user_id, auth_date):
+    """Telegram kabi imzolangan init_data"""
+    pairs = {'auth_date': str(auth_date), 'query_id': 'AAH', 'user': json.dumps({'id': user_id})}
+    data_check_string = '\n'.join(f"{key}={pairs[key]}" for key in sorted(pairs))
+    pairs['hash'] = hmac.new(app_module._TELEGRAM_SECRET_KEY, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return '&'.join(f"{key}={quote(value)}" for key, value in pairs.items())
+
+
+def test_fresh_init_data_is_accepted():
+    init_data = _init_data(42, int(time.time()) - 60)
+    assert app_module.validate_telegram_webapp(init_data) == 42
+    assert len(app_module._init_data_cache) == 1
+
+
+def test_stale_init_data_is_rejected():
+    auth_date = int(time.time()) - app_module.Config.TELEGRAM_AUTH_MAX_AGE - 60
+    assert app_module.validate_telegram_webapp(_init_data(42, auth_date)) is None
+    assert len(app_module._init_data_cache) == 0
+
+
+def test_tampered_init_data_is_rejected(monkeypatch):
+    monkeypatch.setattr(app_module.Config, 'DEBUG', False)
+    init_data = _init_data(42, int(time.time())).replace('%22id%22%3A%2042', '%22id%22%3A%2043')
+    assert app_module.validate_telegram_webapp(init_data) is None
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from database import check_user_balances, get_transaction_counts
+
+INSERT_SQL = """
+    INSERT INTO transactions (user_id, transaction_type, amount, currency, category, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def _insert(db, transaction_type, amount, currency='UZS', user_id=1):
+    return db.execute(INSERT_SQL, (user_id, transaction_type, amount, currency, 'Kafe', datetime(2025, 3, 10, 12)))
+
+
+def _ledger_used(db):
+    return any('FROM user_balances' in sql and 'SUM(tx_count)' in sql for sql in db.statements)
+
+
+def test_fallback_counts_before_backfill(sqlite_db):
+    _insert(sqlite_db, 'income', 100)
+    _insert(sqlite_db, 'expense', 20)
+    _insert(sqlite_db, 'expense', 30, 'USD')
+    _insert(sqlite_db, 'debt', 5, user_id=2)
+
+    assert get_transaction_counts(1) == {'total': 3, 'income': 1, 'expense': 2, 'debt': 0}
+    # Ledger jadvali bor, lekin to'ldirilmagan: o'qish transactions'dan
+    assert not _ledger_used(sqlite_db)
+
+
+def test_backfill_switches_reads_to_ledger(sqlite_db):
+    _insert(sqlite_db, 'income', 100)
+    _insert(sqlite_db, 'expense', 20, 'USD')
+    check_user_balances(repair=True)
+    sqlite_db.statements.clear()
+
+    assert get_transaction_counts(1) == {'total': 2, 'income': 1, 'expense': 1, 'debt': 0}
+    assert _ledger_used(sqlite_db)
+
+
+def test_triggers_keep_counts_after_insert_update_delete(sqlite_db):
+    check_user_balances(repair=True)
+    # Bot kabi to'g'ridan-to'g'ri yozuvlar (helper'larsiz)
+    income_id = _insert(sqlite_db, 'income', 100)
+    expense_id = _insert(sqlite_db, 'expense', 20)
+    _insert(sqlite_db, 'debt', 50, 'USD')
+    assert get_transaction_counts(1) == {'total': 3, 'income': 1, 'expense': 1, 'debt': 1}
+
+    # Tur va valyuta o'zgarishi: eski qatordan ayriladi, yangisiga qo'shiladi
+    sqlite_db.execute(
+        "UPDATE transactions SET transaction_type = 'expense', currency = 'USD' WHERE id = %s", (income_id,)
+    )
+    assert get_transaction_counts(1) == {'total': 3, 'income': 0, 'expense': 2, 'debt': 1}
+
+    sqlite_db.execute("DELETE FROM transactions WHERE id = %s", (expense_id,))
+    assert get_transaction_counts(1) == {'total': 2, 'income': 0, 'expense': 1, 'debt': 1}
+
+    # Ledger transactions bilan mos (farq yo'q)
+    assert check_user_balances() == []
+
+
+def test_delete_never_underflows_counts(sqlite_db):
+    check_user_balances(repair=True)
+    transaction_id = _insert(sqlite_db, 'expense', 20)
+    # Ledger qo'lda buzilgan bo'lsa ham hisoblagich manfiy bo'lmaydi
+    sqlite_db.execute("UPDATE user_balances SET tx_count = 0, expense_count = 0")
+    sqlite_db.execute("DELETE FROM transactions WHERE id = %s", (transaction_id,))
+    assert get_transaction_counts(1) == {'total': 0, 'income': 0, 'expense': 0, 'debt': 0}